@@ -0,0 +1,218 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BASE_DIR), "src", "bigdata"))
+
+# Las Llamadas del Benchmark no se Registran en la Tabla 'metrics' del Proyecto
+os.environ.setdefault("METRICAS", "0")
+
+import numpy as np
+import pandas as pd
+import generadores
+import ingestion
+import cleaning
+import enrichment
+
+"""
+Benchmark reproducible de las etapas principales del flujo con datos sintéticos (ver generadores.py).
+Para cada escala (10^3 a 10^7 registros) se generan con la misma semilla los registros COVID, el CSV
+de Delitos Informáticos y el JSON de Bovinos en una carpeta temporal, y se mide:
+
+  - insertar_datos: carga masiva de los registros en 'covid_data'.
+  - simular_datos_sucios y operaciones_de_limpieza sobre la tabla cargada.
+  - agregar_delitos_informaticos e integrar_fuentes_externas sobre las fuentes externas.
+
+Cada etapa se ejecuta 'repeticiones' veces y se reporta el mejor tiempo, el throughput (registros
+de entrada por segundo) y el pico de memoria medido con tracemalloc en una ejecución adicional.
+Todo corre sin red y sin tocar las bases ni archivos de src/bigdata/static.
+
+    python benchmarks/benchmark.py                       # escalas 10^3, 10^4 y 10^5
+    python benchmarks/benchmark.py --escalas 3 4 5 6 7   # hasta 10^7 (requiere varios GB de RAM)
+    python benchmarks/benchmark.py --comparar benchmarks/resultados/anterior.json
+"""
+
+# Escalas por Defecto (Exponentes de 10)
+ESCALAS = [3, 4, 5]
+
+# Veces que se Ejecuta Cada Etapa (se Reporta el Mejor Tiempo)
+REPETICIONES = 3
+
+# Carpeta Donde se Guardan los Resultados en JSON
+RUTA_RESULTADOS = os.path.join(BASE_DIR, "resultados")
+
+
+def redirigir_rutas(carpeta):
+    """Apuntamos las bases de datos y archivos de los módulos a una carpeta temporal."""
+    ruta_bd = os.path.join(carpeta, "benchmark.db")
+    ingestion.DB_PATH = cleaning.RUTA_DB = enrichment.RUTA_BD = ruta_bd
+    enrichment.RUTA_DELITOS_INFORMATICOS_CSV = os.path.join(carpeta, "Delitos_Informaticos.csv")
+    return ruta_bd
+
+
+def medir(funcion, preparar, repeticiones=REPETICIONES, memoria=True):
+    """
+    Ejecutamos 'funcion(*preparar())' varias veces; la preparación de los argumentos no se mide.
+
+    Retorna:
+        Resultado de la última ejecución, mejor tiempo en segundos y pico de memoria en MB (o None).
+    """
+    tiempos, resultado = [], None
+    for _ in range(repeticiones):
+        argumentos = preparar()
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = funcion(*argumentos)
+            tiempos.append(time.perf_counter() - inicio)
+        del argumentos
+
+    pico_mb = None
+    if memoria:
+        argumentos = preparar()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcion(*argumentos)
+            pico_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return resultado, min(tiempos), pico_mb
+
+
+def _resultado(escala, etapa, filas, tiempo, pico_mb):
+    """Armamos la fila del reporte de una etapa."""
+    return {
+        "escala": escala,
+        "etapa": etapa,
+        "filas_entrada": int(filas),
+        "tiempo_s": round(tiempo, 6),
+        "filas_por_s": round(filas / tiempo, 1) if tiempo > 0 else None,
+        "memoria_pico_mb": round(pico_mb, 3) if pico_mb is not None else None,
+    }
+
+
+def ejecutar_escala(filas, carpeta, semilla=generadores.SEMILLA, repeticiones=REPETICIONES, memoria=True):
+    """Generamos los datos de una escala y medimos cada etapa; retornamos la lista de resultados."""
+    redirigir_rutas(carpeta)
+    resultados = []
+
+    # Registros COVID -> covid_data
+    registros = list(generadores.generar_registros_covid(filas, semilla))
+    conexion = ingestion.crear_db()
+    try:
+        _, tiempo, pico = medir(lambda datos: ingestion.insertar_datos(conexion, datos), lambda: (registros,),
+                                repeticiones, memoria)
+    finally:
+        conexion.close()
+    resultados.append(_resultado(filas, "insertar_datos", filas, tiempo, pico))
+    del registros
+
+    # Limpieza sobre la tabla cargada
+    df = cleaning.cargar_datos_desde_db()
+    df_sucio, tiempo, pico = medir(cleaning.simular_datos_sucios, lambda: (df,), repeticiones, memoria)
+    resultados.append(_resultado(filas, "simular_datos_sucios", len(df), tiempo, pico))
+    _, tiempo, pico = medir(cleaning.operaciones_de_limpieza, lambda: (df_sucio,), repeticiones, memoria)
+    resultados.append(_resultado(filas, "operaciones_de_limpieza", len(df_sucio), tiempo, pico))
+    del df, df_sucio
+
+    # Fuentes externas: CSV de Delitos Informáticos y JSON de Bovinos con el mismo catálogo de municipios
+    generadores.escribir_csv_delitos(
+        enrichment.RUTA_DELITOS_INFORMATICOS_CSV, filas, generadores.municipios_para(filas), semilla
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_info = enrichment.leer_delitos_informaticos_csv()
+        df_bovinos = enrichment.preparar_inventario_bovinos(generadores.generar_registros_bovinos(filas, semilla))
+    (df_agregado, _), tiempo, pico = medir(
+        enrichment.agregar_delitos_informaticos, lambda: (df_info,), repeticiones, memoria
+    )
+    resultados.append(_resultado(filas, "agregar_delitos_informaticos", len(df_info), tiempo, pico))
+    _, tiempo, pico = medir(
+        enrichment.integrar_fuentes_externas, lambda: (df_agregado, df_bovinos), repeticiones, memoria
+    )
+    resultados.append(_resultado(filas, "integrar_fuentes_externas", len(df_agregado) + len(df_bovinos), tiempo, pico))
+    return resultados
+
+
+def entorno():
+    """Describimos la máquina y las versiones, para saber si dos reportes son comparables."""
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def imprimir_reporte(resultados, base=None):
+    """Imprimimos la tabla de resultados y, si hay un reporte base, la razón de tiempos actual/base."""
+    tiempos_base = {(fila["escala"], fila["etapa"]): fila["tiempo_s"] for fila in (base or {}).get("resultados", [])}
+    print(f"\n{'escala':>10} {'etapa':<30} {'filas':>10} {'tiempo (s)':>11} {'filas/s':>14} {'memoria (MB)':>13}"
+          + (f" {'vs base':>8}" if base else ""))
+    for fila in resultados:
+        memoria = f"{fila['memoria_pico_mb']:13.2f}" if fila["memoria_pico_mb"] is not None else f"{'-':>13}"
+        linea = (f"{fila['escala']:>10,} {fila['etapa']:<30} {fila['filas_entrada']:>10,} "
+                 f"{fila['tiempo_s']:>11.4f} {fila['filas_por_s'] or 0:>14,.0f} {memoria}")
+        if base:
+            anterior = tiempos_base.get((fila["escala"], fila["etapa"]))
+            linea += f" {fila['tiempo_s'] / anterior:>7.2f}x" if anterior else f" {'-':>8}"
+        print(linea)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas del flujo con datos sintéticos.")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS, help="Exponentes de 10 (3 = 1.000 registros).")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--semilla", type=int, default=generadores.SEMILLA)
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria (más rápido).")
+    parser.add_argument("--comparar", help="Reporte JSON anterior contra el cual comparar los tiempos.")
+    parser.add_argument("--salida", help="Ruta del reporte JSON (por defecto benchmarks/resultados/benchmark_<fecha>.json).")
+    opciones = parser.parse_args(argumentos)
+
+    base = None
+    if opciones.comparar:
+        with open(opciones.comparar, "r", encoding="utf-8") as archivo:
+            base = json.load(archivo)
+
+    resultados = []
+    for exponente in opciones.escalas:
+        filas = 10 ** exponente
+        carpeta = tempfile.mkdtemp(prefix=f"benchmark_{filas}_")
+        print(f"Midiendo escala {filas:,} registros...")
+        try:
+            resultados.extend(ejecutar_escala(filas, carpeta, opciones.semilla, opciones.repeticiones,
+                                              not opciones.sin_memoria))
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    reporte = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "semilla": opciones.semilla,
+        "repeticiones": opciones.repeticiones,
+        "entorno": entorno(),
+        "resultados": resultados,
+    }
+    imprimir_reporte(resultados, base)
+
+    ruta_salida = opciones.salida or os.path.join(RUTA_RESULTADOS, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_salida)), exist_ok=True)
+    with open(ruta_salida, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    print(f"\nReporte guardado en: {ruta_salida}")
+
+
+if __name__ == "__main__":
+    main()
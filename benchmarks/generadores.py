@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+"""
+Generadores de datos sintéticos reproducibles (misma semilla -> mismos datos) con la forma de
+las tres fuentes del proyecto, para medir el flujo entre 10^3 y 10^7 registros sin red:
+
+  - Registros de 'covid_data' (los mismos campos que el API del COVID Tracking Project).
+  - El CSV de Delitos Informáticos con sus 17 columnas.
+  - Los registros JSON del Inventario Anual de Bovinos (tal como los devuelve el API de Socrata).
+
+Los municipios se toman de un mismo catálogo sintético: en Delitos Informáticos llegan en
+mayúsculas y sin tildes y en Bovinos con tildes, para ejercitar la normalización de nombres.
+Los datos se generan por bloques vectorizados, de modo que los 10^7 registros no se construyen
+fila por fila.
+"""
+
+# Semilla por Defecto de Todos los Generadores
+SEMILLA = 2024
+
+# Registros por Bloque Generado
+TAMANO_BLOQUE_GENERADOR = 100_000
+
+# Fechas que Cubren los Registros COVID (se Repiten como si Fueran Varios Estados)
+FECHAS_COVID = pd.date_range("2020-01-13", "2021-03-07", freq="D")[::-1]
+
+# Años de los Hechos en Delitos Informáticos y del Inventario de Bovinos
+ANIOS_DELITOS = np.arange(2010, 2023)
+ANIOS_BOVINOS = np.arange(2000, 2023)
+
+# Valores de las Columnas Categóricas de Delitos Informáticos
+CATEGORIAS_DELITOS = {
+    'CRIMINALIDAD': ['SI', 'NO'],
+    'ES_ARCHIVO': ['SI', 'NO'],
+    'ES_PRECLUSIÓN': ['SI', 'NO'],
+    'ESTADO': ['ACTIVO', 'INACTIVO'],
+    'ETAPA_CASO': ['INDAGACIÓN', 'INVESTIGACIÓN', 'JUICIO', 'EJECUCIÓN DE PENAS'],
+    'LEY': ['LEY 906', 'LEY 600', 'LEY 1098'],
+    'PAÍS_HECHO': ['Colombia'],
+    'DEPARTAMENTO_HECHO': ['ANTIOQUIA'],
+    'SECCIONAL': ['DIRECCIÓN SECCIONAL DE MEDELLÍN', 'DIRECCIÓN SECCIONAL DE ANTIOQUIA'],
+    'DELITO': [
+        'ACCESO ABUSIVO A UN SISTEMA INFORMATICO ART 269A LEY 1273 DE 2009',
+        'HURTO POR MEDIOS INFORMATICOS Y SEMEJANTES ART 269I LEY 1273 DE 2009',
+        'VIOLACION DE DATOS PERSONALES ART 269F LEY 1273 DE 2009',
+    ],
+    'GRUPO_DELITO': ['DELITOS INFORMATICOS', 'OTROS'],
+    'CONSUMADO': ['SI', 'NO', 'NO APLICA'],
+}
+
+# Orden de las Columnas del CSV Original
+COLUMNAS_DELITOS = [
+    'CRIMINALIDAD', 'ES_ARCHIVO', 'ES_PRECLUSIÓN', 'ESTADO', 'ETAPA_CASO', 'LEY', 'PAÍS_HECHO',
+    'DEPARTAMENTO_HECHO', 'MUNICIPIO_HECHO', 'SECCIONAL', 'AÑO_HECHOS', 'AÑO_ENTRADA', 'AÑO_DENUNCIA',
+    'DELITO', 'GRUPO_DELITO', 'CONSUMADO', 'TOTAL_PROCESOS',
+]
+
+
+def _bloques(filas, tamano_bloque=TAMANO_BLOQUE_GENERADOR):
+    """Recorremos [0, filas) en rangos (inicio, fin) de a lo sumo 'tamano_bloque' registros."""
+    for inicio in range(0, filas, tamano_bloque):
+        yield inicio, min(filas, inicio + tamano_bloque)
+
+
+def nombres_municipios(cantidad, tildes=True):
+    """Catálogo sintético de 'cantidad' municipios ('Santa Fé 00001' o 'SANTA FE 00001')."""
+    if tildes:
+        return np.array([f"Santa Fé {numero:05d}" for numero in range(1, cantidad + 1)], dtype=object)
+    return np.array([f"SANTA FE {numero:05d}" for numero in range(1, cantidad + 1)], dtype=object)
+
+
+def municipios_para(filas_bovinos):
+    """Cantidad de municipios necesaria para que el inventario de bovinos tenga 'filas_bovinos' registros."""
+    return max(1, -(-filas_bovinos // len(ANIOS_BOVINOS)))
+
+
+def generar_bloques_covid(filas, semilla=SEMILLA, tamano_bloque=TAMANO_BLOQUE_GENERADOR):
+    """
+    Generamos 'filas' registros con la forma de 'covid_data' como DataFrames de a lo sumo
+    'tamano_bloque' registros (p.ej. para cleaning.simular_datos_sucios_por_bloques).
+    """
+    rng = np.random.default_rng(semilla)
+    for inicio, fin in _bloques(filas, tamano_bloque):
+        cantidad = fin - inicio
+        posiciones = np.arange(inicio, fin)
+        fechas = FECHAS_COVID[posiciones % len(FECHAS_COVID)]
+        bloque = pd.DataFrame({
+            "hash": [f"{semilla:08x}{posicion:032x}" for posicion in posiciones],
+            "date": fechas.strftime("%Y%m%d").astype(int),
+            "positive": rng.integers(0, 30_000_000, cantidad),
+            "death": rng.integers(0, 550_000, cantidad),
+            "hospitalizedCurrently": rng.integers(0, 130_000, cantidad),
+            "totalTestResults": rng.integers(0, 365_000_000, cantidad),
+            "positiveIncrease": rng.integers(0, 300_000, cantidad),
+            "deathIncrease": rng.integers(0, 4_500, cantidad),
+            "lastModified": fechas.strftime("%Y-%m-%dT24:00:00Z"),
+        })
+        # Como en el API, una parte de las hospitalizaciones llega sin dato
+        bloque["hospitalizedCurrently"] = bloque["hospitalizedCurrently"].astype(object)
+        bloque.loc[rng.random(cantidad) < 0.1, "hospitalizedCurrently"] = None
+        yield bloque
+
+
+def generar_registros_covid(filas, semilla=SEMILLA):
+    """
+    Generamos 'filas' registros con la forma de 'covid_data' (diccionarios con las mismas claves
+    del API), bloque por bloque, para que 'insertar_datos' los consuma sin tenerlos todos en memoria.
+    """
+    for bloque in generar_bloques_covid(filas, semilla):
+        yield from bloque.to_dict("records")
+
+
+def escribir_json_covid(ruta, filas, semilla=SEMILLA):
+    """Escribimos los registros COVID como arreglo JSON (se puede usar como URL_API_COVID)."""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        archivo.write("[\n")
+        for posicion, registro in enumerate(generar_registros_covid(filas, semilla)):
+            registro = {clave: (valor.item() if hasattr(valor, "item") else valor) for clave, valor in registro.items()}
+            archivo.write(("," if posicion else "") + json.dumps(registro) + "\n")
+        archivo.write("]\n")
+    return ruta
+
+
+def escribir_csv_delitos(ruta, filas, municipios, semilla=SEMILLA):
+    """Escribimos un CSV de Delitos Informáticos con 'filas' registros y las 17 columnas del original."""
+    rng = np.random.default_rng(semilla + 1)
+    catalogo = nombres_municipios(municipios, tildes=False)
+    for inicio, fin in _bloques(filas):
+        cantidad = fin - inicio
+        bloque = {columna: rng.choice(valores, cantidad) for columna, valores in CATEGORIAS_DELITOS.items()}
+        bloque['MUNICIPIO_HECHO'] = rng.choice(catalogo, cantidad)
+        anios_hechos = rng.choice(ANIOS_DELITOS, cantidad)
+        bloque['AÑO_HECHOS'] = anios_hechos
+        bloque['AÑO_ENTRADA'] = anios_hechos + rng.integers(0, 2, cantidad)
+        bloque['AÑO_DENUNCIA'] = bloque['AÑO_ENTRADA']
+        bloque['TOTAL_PROCESOS'] = rng.integers(1, 40, cantidad)
+        pd.DataFrame(bloque)[COLUMNAS_DELITOS].to_csv(ruta, mode="w" if inicio == 0 else "a", header=inicio == 0, index=False)
+    return ruta
+
+
+def generar_registros_bovinos(filas, semilla=SEMILLA):
+    """Generamos 'filas' registros del Inventario de Bovinos (un registro por municipio y año, en texto como el API)."""
+    rng = np.random.default_rng(semilla + 2)
+    catalogo = nombres_municipios(municipios_para(filas))
+    registros = []
+    for inicio, fin in _bloques(filas):
+        cantidad = fin - inicio
+        posiciones = np.arange(inicio, fin)
+        bloque = pd.DataFrame({
+            "anio": ANIOS_BOVINOS[posiciones % len(ANIOS_BOVINOS)].astype(str),
+            "subregion": "VALLE DE ABURRÁ",
+            "rubro": "BOVINOS",
+            "MUNICIPIO": catalogo[posiciones // len(ANIOS_BOVINOS)],
+            "total_machos": rng.integers(0, 50_000, cantidad).astype(str),
+            "total_hembras": rng.integers(0, 80_000, cantidad).astype(str),
+            "total_bovinos": rng.integers(0, 130_000, cantidad).astype(str),
+            "pasto_corte": rng.integers(0, 5_000, cantidad).astype(str),
+            "pasto_natural": rng.integers(0, 60_000, cantidad).astype(str),
+            "pasto_mejorado": rng.integers(0, 40_000, cantidad).astype(str),
+            "Total Pastos (ha)": rng.integers(0, 100_000, cantidad).astype(str),
+        })
+        registros.extend(bloque.to_dict("records"))
+    return registros
+
+
+def escribir_json_bovinos(ruta, filas, semilla=SEMILLA):
+    """Escribimos los registros del Inventario de Bovinos como arreglo JSON."""
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(generar_registros_bovinos(filas, semilla), archivo, ensure_ascii=False)
+    return ruta
+
+
+def main(argumentos=None):
+    """Escribimos los tres conjuntos sintéticos en una carpeta (para ejecutar el flujo completo sin red)."""
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos con la forma de las fuentes del proyecto.")
+    parser.add_argument("--filas", type=int, default=10_000, help="Registros de cada fuente.")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--destino", default="datos_sinteticos", help="Carpeta de salida.")
+    opciones = parser.parse_args(argumentos)
+
+    os.makedirs(opciones.destino, exist_ok=True)
+    municipios = municipios_para(opciones.filas)
+    rutas = [
+        escribir_json_covid(os.path.join(opciones.destino, "covid_us_daily.json"), opciones.filas, opciones.semilla),
+        escribir_csv_delitos(os.path.join(opciones.destino, "Delitos_Informaticos.csv"), opciones.filas, municipios, opciones.semilla),
+        escribir_json_bovinos(os.path.join(opciones.destino, "inventario_bovinos.json"), opciones.filas, opciones.semilla),
+    ]
+    for ruta in rutas:
+        print(f"Generado: {ruta} ({os.path.getsize(ruta) / (1024 * 1024):.2f} MB)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,34 @@
+import os  # Importamos la librería OS para construir rutas
+import sys  # Importamos la librería SYS para ubicar los módulos del proyecto
 import pandas as pd  # Importamos la librería Pandas para manejar datos en formato tabular
 import json  # Importamos la librería JSON para manejar archivos JSON
 
+# Agregamos src/bigdata a la ruta de módulos para reutilizar la escritura de Excel del proyecto
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "bigdata"))
+import salida_excel  # noqa: E402  Escritura de Excel en streaming (o con pandas si MOTOR_EXCEL=pandas)
+
 def main():
+    # Omitimos el Excel en ejecuciones sin interfaz (GENERAR_EXCEL=0)
+    if not salida_excel.GENERAR_EXCEL:
+        print("Generación del Archivo Excel Omitida (GENERAR_EXCEL=0).")
+        return
+
     # Leemos el archivo JSON
     with open('data.json', 'r', encoding='utf-8') as f:
         data = json.load(f)  # Cargamos el contenido del archivo JSON en la variable 'data'
-    
+
     # Si el JSON es un diccionario único, convertirlo a una lista para procesarlo con Pandas
     if isinstance(data, dict):
         data = [data]  # Convertimos el diccionario en una lista de un solo elemento
-    
+
     # Creamos un DataFrame de Pandas con los datos del JSON
     df = pd.DataFrame(data)
-    
+
     # Guardamos el DataFrame en un archivo Excel
-    df.to_excel('output.xlsx', index=False)  # Guardamos sin incluir los índices de Pandas
-    
+    salida_excel.escribir_dataframe('output.xlsx', df)  # Guardamos sin incluir los índices de Pandas
+
     # Mensaje de confirmación
     print("Archivo Excel 'output.xlsx' generado Exitosamente.")
 
 if __name__ == '__main__':
-    main() 
+    main()
@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 setup(
     name="infra-arquitectura-bigdata_Martinez_Juli",
@@ -6,10 +6,40 @@ setup(
     author="Julian Jose Martinez Camacho",
     author_email="julian.martinezc@est.iudigital.edu.co",
     description="EA3 Proyecto Integrador: Enriquecimiento de Datos simulando una Plataforma de Big Data en la Nube. 🔍🚀",
-    py_modules=["EA3_Enriquecimiento_de_Datos_simulando_una_Plataforma_de_Big_Data_en_la_Nube"],
+    package_dir={"": "src/bigdata"},
+    py_modules=[
+        "ingestion",
+        "cleaning",
+        "cleaning_sql",
+        "enrichment",
+        "almacenamiento",
+        "http_cache",
+        "socrata",
+        "municipios",
+        "pipeline",
+        "planificador",
+        "metricas",
+        "salida_excel",
+        "esquema",
+        "series_tiempo",
+        "perfilador",
+        "cli",
+    ],
+    python_requires=">=3.9",
     install_requires=[
         'requests',
         "pandas",
+        "numpy",
         "openpyxl"
-    ]
-)
\ No newline at end of file
+    ],
+    extras_require={
+        "parquet": ["pyarrow"],
+        "excel": ["lxml"],
+    },
+    entry_points={
+        "console_scripts": [
+            "bigdata=cli:main",
+            "bigdata-pipeline=pipeline:main",
+        ],
+    },
+)
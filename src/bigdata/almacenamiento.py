@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import shutil
+import pandas as pd
+
+"""
+Capa de almacenamiento columnar (Parquet) para las tablas sucia, limpia y enriquecida.
+Cada capa se guarda comprimida con zstd y particionada por año y mes de su columna de fecha
+(formato YYYYMMDD), de modo que las etapas siguientes pueden leer solo las columnas y
+particiones que necesitan. Los CSV pasan a ser una exportación opcional (EXPORTAR_CSV).
+
+pyarrow es una dependencia opcional: si no está instalado, las funciones de escritura
+no hacen nada y las de lectura indican que la capa no está disponible.
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Carpeta Raíz de las Capas Parquet
+RUTA_PARQUET = os.path.join(BASE_DIR, "static", "parquet")
+
+# Capas: nombre -> (carpeta, columna de fecha YYYYMMDD usada para particionar, CSV equivalente)
+CAPAS = {
+    "sucia": ("covid_data_dirty", "date", os.path.join(BASE_DIR, "static", "xlsx", "Tabla_Datos_Sucios.csv")),
+    "limpia": ("covid_data_cleaned", "fecha", os.path.join(BASE_DIR, "static", "xlsx", "Tabla_Datos_Limpios.csv")),
+    "enriquecida": ("covid_data_enriched", "fecha", os.path.join(BASE_DIR, "static", "xlsx", "datos_enriquecidos.csv")),
+}
+
+# Columnas de Partición que se Agregan a Cada Capa
+COLUMNAS_PARTICION = ["anio_particion", "mes_particion"]
+
+# Compresión de los Archivos Parquet
+COMPRESION_PARQUET = os.environ.get("COMPRESION_PARQUET", "zstd")
+
+# Exportamos También los CSV (Desactivar con EXPORTAR_CSV=0)
+EXPORTAR_CSV = os.environ.get("EXPORTAR_CSV", "1") == "1"
+
+
+def parquet_disponible():
+    """Indicamos si pyarrow está instalado."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def ruta_capa(capa):
+    """Devolvemos la carpeta del dataset Parquet de una capa."""
+    return os.path.join(RUTA_PARQUET, CAPAS[capa][0])
+
+
+def capa_disponible(capa):
+    """Indicamos si la capa ya fue escrita en Parquet y puede leerse."""
+    return parquet_disponible() and os.path.isdir(ruta_capa(capa))
+
+
+def _preparar(df, columna_fecha):
+    """
+    Agregamos las columnas de partición y dejamos las columnas de texto con tipos mixtos
+    (p.ej. números forzados a cadena en la tabla sucia) como texto, que Parquet exige homogéneas.
+    """
+    preparado = df.copy(deep=False)
+    for columna in preparado.columns:
+        serie = preparado[columna]
+        if serie.dtype == object:
+            preparado[columna] = serie.astype(str).where(serie.notna(), None)
+
+    # Las filas sin fecha válida quedan en la partición año 0 / mes 0
+    fecha = pd.to_numeric(preparado[columna_fecha], errors="coerce").fillna(0).astype("int64")
+    preparado[COLUMNAS_PARTICION[0]] = fecha // 10000
+    preparado[COLUMNAS_PARTICION[1]] = fecha // 100 % 100
+    return preparado
+
+
+def escribir_capa(df, capa, reemplazar=True):
+    """
+    Escribimos un DataFrame en la capa Parquet indicada, particionado por año y mes.
+
+    Parámetros:
+        df: DataFrame a guardar.
+        capa: 'sucia', 'limpia' o 'enriquecida'.
+        reemplazar: Si es False se agregan archivos al dataset existente (escritura por bloques).
+    """
+    if not parquet_disponible():
+        print("pyarrow no está instalado: se omite la escritura en Parquet.")
+        return None
+    carpeta, columna_fecha, _ = CAPAS[capa]
+    ruta = ruta_capa(capa)
+    if reemplazar:
+        shutil.rmtree(ruta, ignore_errors=True)
+    os.makedirs(ruta, exist_ok=True)
+    _preparar(df, columna_fecha).to_parquet(
+        ruta,
+        engine="pyarrow",
+        compression=COMPRESION_PARQUET,
+        partition_cols=COLUMNAS_PARTICION,
+        index=False,
+    )
+    print(f"Capa Parquet '{capa}' Escrita en: {ruta}")
+    return ruta
+
+
+def _esquema_unificado(ruta):
+    """
+    Unificamos los esquemas de los archivos de una capa. Al escribir por bloques, una columna
+    puede quedar como 'null' en un archivo (todos sus valores nulos) y con su tipo real en otro;
+    sin unificar, pyarrow toma el esquema del primer archivo y falla al leer los demás.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(ruta, format="parquet", partitioning="hive")
+    esquemas = [fragmento.physical_schema for fragmento in dataset.get_fragments()]
+    return pa.unify_schemas([dataset.schema] + esquemas, promote_options="permissive")
+
+
+def leer_capa(capa, columnas=None, anios=None, meses=None):
+    """
+    Leemos una capa Parquet cargando solo las columnas y particiones pedidas.
+
+    Parámetros:
+        capa: 'sucia', 'limpia' o 'enriquecida'.
+        columnas: Lista de columnas a leer (None para todas).
+        anios, meses: Listas de años/meses de la columna de fecha a leer (None para todos).
+    """
+    filtros = []
+    if anios is not None:
+        filtros.append((COLUMNAS_PARTICION[0], "in", list(anios)))
+    if meses is not None:
+        filtros.append((COLUMNAS_PARTICION[1], "in", list(meses)))
+    df = pd.read_parquet(
+        ruta_capa(capa),
+        engine="pyarrow",
+        columns=columnas,
+        filters=filtros or None,
+        schema=_esquema_unificado(ruta_capa(capa)),
+    )
+    # Las columnas de partición solo sirven para filtrar; no forman parte de la tabla
+    return df.drop(columns=[col for col in COLUMNAS_PARTICION if col in df.columns])
+
+
+def exportar_csv(df, ruta, modo="w", encabezado=True):
+    """Exportamos a CSV solo si la exportación está activa (EXPORTAR_CSV)."""
+    if not EXPORTAR_CSV:
+        return False
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    df.to_csv(ruta, mode=modo, header=encabezado, index=False)
+    return True
+
+
+def _tamano_en_disco(ruta):
+    """Sumamos el tamaño de un archivo o de todos los archivos de una carpeta (bytes)."""
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        total += sum(os.path.getsize(os.path.join(raiz, archivo)) for archivo in archivos)
+    return total
+
+
+def comparar_con_csv(repeticiones=3):
+    """
+    Comparamos, para cada capa que exista en ambos formatos, el tamaño en disco y el tiempo
+    de lectura del CSV frente al dataset Parquet.
+
+    Retorna:
+        Lista de diccionarios con una fila por capa.
+    """
+    resultados = []
+    for capa, (_, _, ruta_csv) in CAPAS.items():
+        if not (capa_disponible(capa) and os.path.exists(ruta_csv)):
+            continue
+        tiempos_csv, tiempos_parquet = [], []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            pd.read_csv(ruta_csv, low_memory=False)
+            tiempos_csv.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            leer_capa(capa)
+            tiempos_parquet.append(time.perf_counter() - inicio)
+        resultados.append({
+            "capa": capa,
+            "csv_bytes": _tamano_en_disco(ruta_csv),
+            "parquet_bytes": _tamano_en_disco(ruta_capa(capa)),
+            "csv_lectura_s": min(tiempos_csv),
+            "parquet_lectura_s": min(tiempos_parquet),
+        })
+    return resultados
+
+
+if __name__ == "__main__":
+    if not parquet_disponible():
+        sys.exit("pyarrow no está instalado: pip install pyarrow")
+    print("=== COMPARACIÓN CSV vs PARQUET ===")
+    for fila in comparar_con_csv():
+        print(
+            f"{fila['capa']:<12} CSV {fila['csv_bytes'] / 1024:>9.1f} KB {fila['csv_lectura_s'] * 1000:>8.1f} ms | "
+            f"Parquet {fila['parquet_bytes'] / 1024:>9.1f} KB {fila['parquet_lectura_s'] * 1000:>8.1f} ms"
+        )
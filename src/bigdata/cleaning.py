@@ -1,7 +1,12 @@
 import os
+import time
 import sqlite3
 import pandas as pd
 import numpy as np
+import almacenamiento
+import esquema
+import metricas
+import perfilador
 from datetime import datetime
 
 """
@@ -20,6 +25,74 @@ RUTA_CSV_SUCIO = os.path.join(BASE_DIR, "static", "xlsx", "Tabla_Datos_Sucios.cs
 # Auditoría de Preprocesamiento y Limpieza
 RUTA_AUDITORIA = os.path.join(BASE_DIR, "static", "auditoria", "Informe_Limpieza.txt")
 
+# Modo por bloques: la memoria queda acotada por el tamaño del bloque y no por el de la tabla
+LIMPIEZA_POR_BLOQUES = os.environ.get("LIMPIEZA_POR_BLOQUES", "0") == "1"
+TAMANO_BLOQUE_LIMPIEZA = int(os.environ.get("TAMANO_BLOQUE_LIMPIEZA", "50000"))
+
+# Backend de limpieza: "pandas" (en memoria) o "sql" (dentro de SQLite, ver cleaning_sql.py)
+BACKEND_LIMPIEZA = os.environ.get("BACKEND_LIMPIEZA", "pandas").lower()
+
+# Tabla intermedia donde el modo por bloques deja los registros deduplicados y convertidos
+TABLA_ETAPA_LIMPIEZA = "covid_data_cleaning_stage"
+
+"""
+Plan de limpieza: columnas que se convierten a numérico e imputan con la mediana,
+columnas que se eliminan en una sola operación y renombrado a nombres en español.
+"""
+COLUMNAS_NUMERICAS_LIMPIEZA = ['positive', 'death', 'hospitalizedCurrently', 'totalTestResults']
+
+# Columnas enteras que se reducen a int32 (o menor) sin pérdida
+COLUMNAS_ENTERAS_LIMPIEZA = ['date', 'positiveIncrease', 'deathIncrease']
+
+COLUMNAS_A_ELIMINAR = [
+    'fecha_duplicada', 'positive_duplicada', 'death_duplicada',
+    'columna_inutil_1', 'columna_inutil_2', 'registro_nulo',
+    'fecha_sucia'
+]
+
+RENOMBRE_COLUMNAS = {
+    'date': 'fecha',
+    'positive': 'casos_positivos',
+    'death': 'fallecidos',
+    'hospitalizedCurrently': 'hospitalizados',
+    'totalTestResults': 'total_resultados',
+    'positiveIncrease': 'incremento_positivos',
+    'deathIncrease': 'incremento_fallecidos',
+    'lastModified': 'ultima_modificacion'
+}
+
+"""
+Registro de métricas derivadas: cada entrada define una columna calculada como
+(numerador / denominador) * 100, que vale 0 cuando el denominador es nulo o no es positivo.
+Para agregar una nueva tasa basta con añadir su entrada, sin escribir nuevas funciones por fila.
+"""
+METRICAS_DERIVADAS = {
+    'tasa_positividad': ('casos_positivos', 'total_resultados'),
+    'tasa_mortalidad': ('fallecidos', 'casos_positivos'),
+}
+
+# Columna con las Columnas Imputadas con la Mediana en Cada Registro (Nombres en Español Separados por Comas)
+COLUMNA_IMPUTADAS = 'columnas_imputadas'
+SIN_IMPUTACION = 'ninguna'
+
+"""
+Simulación de datos sucios: fracción de registros afectada por cada tipo de corrupción
+(se puede cambiar por llamada con el parámetro 'tasas' de simular_datos_sucios).
+"""
+TASAS_DATOS_SUCIOS = {
+    'duplicados': 0.20,     # Registros repetidos al final de la tabla
+    'nulos': 0.08,          # Valores nulos en cada columna de COLUMNAS_NULOS_SIMULADOS
+    'registro_nulo': 0.25,  # Valores "Dato Faltante" en la columna 'registro_nulo'
+    'error_tipo': 0.07,     # Valores convertidos a texto en cada columna de COLUMNAS_ERROR_TIPO
+    'fecha_sucia': 0.05,    # Valores nulos en 'fecha_sucia'
+}
+COLUMNAS_NULOS_SIMULADOS = ['positive', 'death', 'hospitalizedCurrently', 'totalTestResults']
+COLUMNAS_ERROR_TIPO = ['positive', 'death']
+
+# Semilla de la Simulación (la Misma Semilla Produce los Mismos Datos Sucios)
+SEMILLA_DATOS_SUCIOS = int(os.environ.get("SEMILLA_DATOS_SUCIOS", "42"))
+
+@metricas.instrumentar
 def cargar_datos_desde_db():
     """
     Cargamos los datos de la tabla 'covid_data' desde la base de datos SQLite.
@@ -32,74 +105,232 @@ def cargar_datos_desde_db():
     conexion.close()
     return df
 
+def cargar_datos_desde_db_por_bloques(conexion, tamano_bloque=None):
+    """
+    Leemos la tabla 'covid_data' por bloques de 'tamano_bloque' registros.
+
+    Retorna:
+        Iterador de DataFrames.
+    """
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE_LIMPIEZA
+    return pd.read_sql_query("SELECT * FROM covid_data", conexion, chunksize=tamano_bloque)
+
+@metricas.instrumentar
 def exportar_datos_sucios(df_sucio):
     """
-    Exportamos el DataFrame sucio a un archivo CSV para tener un registro
-    de cómo quedaron los datos antes de la limpieza.
+    Exportamos el DataFrame sucio a la capa Parquet 'sucia' y, si está activa la exportación,
+    a un archivo CSV para tener un registro de cómo quedaron los datos antes de la limpieza.
     """
-    df_sucio.to_csv(RUTA_CSV_SUCIO, index=False)
-    print(f"\nArchivo CSV de Datos Sucios Generado en: {RUTA_CSV_SUCIO}")
+    almacenamiento.escribir_capa(df_sucio, "sucia")
+    if almacenamiento.exportar_csv(df_sucio, RUTA_CSV_SUCIO):
+        print(f"\nArchivo CSV de Datos Sucios Generado en: {RUTA_CSV_SUCIO}")
 
+@metricas.instrumentar
 def guardar_tabla_sucia_en_db(df_sucio):
     """
     Guardamos la tabla sucia en la base de datos bajo el nombre 'covid_data_dirty'.
     Con la finalidad de tener un registro de la tabla sucia antes de limpiar.
+    La tabla anterior sigue disponible para los lectores hasta que la nueva está completa (ver esquema.py).
     """
     conexion = sqlite3.connect(RUTA_DB)
-    conexion.execute("DROP TABLE IF EXISTS covid_data_dirty;")
-    df_sucio.to_sql("covid_data_dirty", conexion, if_exists="replace", index=False)
-    conexion.close()
+    try:
+        esquema.reemplazar_tabla(conexion, "covid_data_dirty", df_sucio)
+    finally:
+        conexion.close()
     print("\nTabla 'covid_data_dirty' creada en la Base de Datos con los Datos Sucios.\n")
 
-def simular_datos_sucios(df):
+def _mascaras_datos_sucios():
+    """Lista de (tipo de corrupción, columna) con una máscara por elemento, en el orden del sorteo."""
+    return (
+        [('nulos', col) for col in COLUMNAS_NULOS_SIMULADOS]
+        + [('registro_nulo', 'registro_nulo')]
+        + [('error_tipo', col) for col in COLUMNAS_ERROR_TIPO]
+        + [('fecha_sucia', 'fecha_sucia')]
+    )
+
+def _simular_bloque_sucio(df, tasas, rng):
     """
-    A partir del DataFrame original, simulamos la generación de datos "sucios" (DELTA),
-    realizando las siguientes operaciones:
-    
-      1. Duplicar un 20% de los registros (añadiendo duplicados).
-      2. Introducir valores nulos en columnas numéricas 
-         (p.ej. 'positive', 'death', 'hospitalizedCurrently', 'totalTestResults').
-      3. Crear una columna 'registro_nulo' con valores faltantes (tipo 'object').
-      4. Forzar error de tipo en 'positive' y 'death', convirtiendo algunos valores a cadena.
-      5. Duplicar columnas ('date', 'positive', 'death') y crear columnas "columna_inutil_1", "columna_inutil_2".
-      6. Crear una 'fecha_sucia' duplicada con un 5% de valores nulos.
+    Ensuciamos un DataFrame con un único sorteo de NumPy: la primera columna del sorteo decide
+    qué registros se duplican y las siguientes dan las máscaras de cada corrupción para los
+    registros originales y para sus copias. Las columnas se modifican con operaciones vectorizadas
+    (sin 'sample' ni asignaciones con 'loc'), así que el costo crece linealmente con los registros.
     """
-    df_sucio = df.copy()
-    
-    # 1. Duplicamos un 20% de los registros
-    filas_duplicadas = df_sucio.sample(frac=0.20, random_state=42)
-    df_sucio = pd.concat([df_sucio, filas_duplicadas], ignore_index=True)
-    
-    # 2. Introducimos valores nulos en las columnas numéricas
-    columnas_numericas = ['positive', 'death', 'hospitalizedCurrently', 'totalTestResults']
-    for col in columnas_numericas:
-        indices = df_sucio.sample(frac=0.08, random_state=42).index  # 8% nulos
-        df_sucio.loc[indices, col] = None
-
-    # 3. Creamos la columna 'registro_nulo' como objeto para simular valores faltantes
-    df_sucio['registro_nulo'] = pd.Series(np.nan, index=df_sucio.index, dtype=object)
-    indices_regnull = df_sucio.sample(frac=0.25, random_state=42).index  # 25% de valores
-    df_sucio.loc[indices_regnull, 'registro_nulo'] = "Dato Faltante"
-    
-    # 4. Forzamos error de tipo en 'positive' y 'death': convertir algunos valores a cadena
-    for col in ['positive', 'death']:
-        indices_error_tipo = df_sucio.sample(frac=0.07, random_state=42).index  # 7% a string
-        df_sucio.loc[indices_error_tipo, col] = df_sucio.loc[indices_error_tipo, col].astype(str)
-    
-    # 5. Creamos columnas duplicadas e inservibles
+    mascaras = _mascaras_datos_sucios()
+    cantidad = len(df)
+    sorteo = rng.random((cantidad, 1 + 2 * len(mascaras)), dtype=np.float32)
+    duplicados = np.flatnonzero(sorteo[:, 0] < tasas['duplicados'])
+    umbrales = np.array([tasas[tipo] for tipo, _ in mascaras], dtype=np.float32)
+    marcas = np.concatenate([sorteo[:, 1:1 + len(mascaras)], sorteo[duplicados, 1 + len(mascaras):]]) < umbrales
+    marca = dict(zip(mascaras, marcas.T))
+    del sorteo
+
+    # 1. Duplicamos los registros sorteados (se agregan al final, como un delta repetido)
+    df_sucio = df.take(np.concatenate([np.arange(cantidad), duplicados]))
+    total = len(df_sucio)
+    df_sucio.index = pd.RangeIndex(total)  # Sin reset_index, que copiaría la tabla otra vez
+
+    # 2. Introducimos valores nulos en las columnas numéricas (siempre decimales, aunque el sorteo
+    #    no marque ningún valor, para que todos los bloques tengan los mismos tipos)
+    for col in COLUMNAS_NULOS_SIMULADOS:
+        df_sucio[col] = pd.to_numeric(df_sucio[col], errors="coerce").astype("float64").mask(marca[('nulos', col)])
+
+    # 3. Creamos la columna 'registro_nulo' con valores faltantes (categórica: un byte por registro)
+    registro_nulo = pd.Categorical.from_codes(
+        np.where(marca[('registro_nulo', 'registro_nulo')], 0, -1).astype(np.int8), categories=["Dato Faltante"]
+    )
+
+    # 4. Forzamos error de tipo: algunos valores no nulos pasan a texto (solo esas columnas quedan como objeto)
+    for col in COLUMNAS_ERROR_TIPO:
+        numeros = df_sucio[col].to_numpy()
+        seleccion = marca[('error_tipo', col)] & ~np.isnan(numeros)
+        valores = numeros.astype(object)
+        valores[seleccion] = numeros[seleccion].astype(str)
+        df_sucio[col] = valores
+
+    # 5 y 6. Columnas duplicadas, inservibles y 'fecha_sucia' con valores nulos
+    #        (se agregan en el mismo DataFrame: 'assign' copiaría todas las columnas)
+    df_sucio['registro_nulo'] = registro_nulo
     df_sucio['fecha_duplicada'] = df_sucio['date']
     df_sucio['positive_duplicada'] = df_sucio['positive']
     df_sucio['death_duplicada'] = df_sucio['death']
-    df_sucio['columna_inutil_1'] = "valor_repetido_en_todos_1"
-    df_sucio['columna_inutil_2'] = "valor_repetido_en_todos_2"
-    
-    # 6. Creamos 'fecha_sucia' con un 5% de valores nulos
-    df_sucio['fecha_sucia'] = df_sucio['date']
-    indices_datesucias = df_sucio.sample(frac=0.05, random_state=42).index 
-    df_sucio.loc[indices_datesucias, 'fecha_sucia'] = None
-    
+    df_sucio['columna_inutil_1'] = _columna_constante("valor_repetido_en_todos_1", total)
+    df_sucio['columna_inutil_2'] = _columna_constante("valor_repetido_en_todos_2", total)
+    df_sucio['fecha_sucia'] = df_sucio['date'].astype("float64").mask(marca[('fecha_sucia', 'fecha_sucia')])
     return df_sucio
 
+@metricas.instrumentar
+def simular_datos_sucios(df, tasas=None, semilla=None):
+    """
+    A partir del DataFrame original, simulamos la generación de datos "sucios" (DELTA),
+    realizando las siguientes operaciones (fracciones por defecto en TASAS_DATOS_SUCIOS):
+
+      1. Duplicar un 20% de los registros (añadiendo duplicados).
+      2. Introducir un 8% de valores nulos en cada columna numérica
+         ('positive', 'death', 'hospitalizedCurrently', 'totalTestResults').
+      3. Crear una columna 'registro_nulo' con un 25% de valores "Dato Faltante" y el resto faltantes.
+      4. Forzar error de tipo en 'positive' y 'death', convirtiendo un 7% de los valores a cadena.
+      5. Duplicar columnas ('date', 'positive', 'death') y crear columnas "columna_inutil_1", "columna_inutil_2".
+      6. Crear una 'fecha_sucia' duplicada con un 5% de valores nulos.
+
+    Parámetros:
+        tasas: Diccionario con las fracciones a cambiar (las demás se toman de TASAS_DATOS_SUCIOS).
+        semilla: Semilla del sorteo (por defecto SEMILLA_DATOS_SUCIOS).
+    """
+    tasas = {**TASAS_DATOS_SUCIOS, **(tasas or {})}
+    semilla = SEMILLA_DATOS_SUCIOS if semilla is None else semilla
+    return _simular_bloque_sucio(df, tasas, np.random.default_rng(semilla))
+
+def simular_datos_sucios_por_bloques(bloques, tasas=None, semilla=None):
+    """
+    Versión por bloques de simular_datos_sucios: recibe un iterable de DataFrames (p.ej. la lectura
+    por bloques de 'covid_data') y entrega cada bloque ensuciado, de modo que se pueden generar
+    deltas sucios de millones de registros con la memoria acotada por el tamaño del bloque.
+    Cada bloque usa su propio generador derivado de la semilla, por lo que el resultado es reproducible.
+    Los duplicados simulados quedan dentro del mismo bloque.
+    """
+    tasas = {**TASAS_DATOS_SUCIOS, **(tasas or {})}
+    semilla = SEMILLA_DATOS_SUCIOS if semilla is None else semilla
+    for numero, bloque in enumerate(bloques):
+        yield _simular_bloque_sucio(bloque, tasas, np.random.default_rng([semilla, numero]))
+
+def calcular_metricas_derivadas(df, metricas=None):
+    """
+    Calculamos de forma vectorizada las columnas del registro de métricas derivadas.
+    La división se hace con NumPy sobre arreglos completos, enmascarando los denominadores
+    nulos, cero o negativos, que producen 0 igual que la regla original por fila.
+
+    Parámetros:
+        df: DataFrame con las columnas de numerador y denominador ya numéricas.
+        metricas: Diccionario nombre -> (numerador, denominador). Por defecto METRICAS_DERIVADAS.
+    """
+    metricas = METRICAS_DERIVADAS if metricas is None else metricas
+    for nombre, (columna_numerador, columna_denominador) in metricas.items():
+        numerador = df[columna_numerador].to_numpy(dtype="float64")
+        denominador = df[columna_denominador].to_numpy(dtype="float64")
+        validos = denominador > 0  # NaN > 0 es False, por lo que los nulos también quedan en 0
+        resultado = np.zeros(len(df), dtype="float64")
+        np.divide(numerador, denominador, out=resultado, where=validos)
+        np.multiply(resultado, 100, out=resultado, where=validos)
+        df[nombre] = resultado
+    return df
+
+def _memoria_mb(df):
+    """Calculamos la memoria ocupada por un DataFrame en MB (incluyendo el contenido de los objetos)."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def _columna_constante(valor, cantidad):
+    """Creamos una columna categórica con un único valor repetido (ocupa un byte por fila)."""
+    return pd.Categorical.from_codes(np.zeros(cantidad, dtype=np.int8), categories=[valor])
+
+def etiquetas_imputadas(columnas):
+    """
+    Valores posibles de COLUMNA_IMPUTADAS para las columnas imputadas indicadas: la posición i
+    corresponde a la combinación cuyos bits marcan las columnas imputadas (0 -> SIN_IMPUTACION).
+    """
+    etiquetas = []
+    for codigo in range(1 << len(columnas)):
+        nombres = [RENOMBRE_COLUMNAS.get(col, col) for bit, col in enumerate(columnas) if codigo >> bit & 1]
+        etiquetas.append(",".join(nombres) or SIN_IMPUTACION)
+    return etiquetas
+
+def _transformar_datos_convertidos(df_limpio, medianas, fecha_actual):
+    """
+    Aplicamos los pasos de limpieza posteriores a la conversión numérica, comunes al
+    procesamiento en memoria y por bloques:
+      - Imputación de nulos con la mediana de cada columna numérica, registrando en
+        COLUMNA_IMPUTADAS qué columnas se imputaron en cada registro (categórica).
+      - Reducción de las columnas enteras a int32 cuando no hay pérdida.
+      - Columnas de auditoría constantes como categóricas.
+      - Renombrado a nombres en español (sin copiar los datos).
+      - Cálculo vectorizado de las métricas derivadas.
+    """
+    codigos = np.zeros(len(df_limpio), dtype=np.int8)
+    for bit, (columna, mediana) in enumerate(medianas.items()):
+        codigos |= df_limpio[columna].isna().to_numpy().astype(np.int8) << bit
+        df_limpio[columna] = df_limpio[columna].fillna(mediana)
+    df_limpio[COLUMNA_IMPUTADAS] = pd.Categorical.from_codes(codigos, categories=etiquetas_imputadas(list(medianas)))
+
+    limites_int32 = np.iinfo(np.int32)
+    for columna in COLUMNAS_ENTERAS_LIMPIEZA:
+        serie = df_limpio[columna]
+        if pd.api.types.is_integer_dtype(serie) and serie.between(limites_int32.min, limites_int32.max).all():
+            df_limpio[columna] = serie.astype(np.int32)
+
+    cantidad = len(df_limpio)
+    df_limpio['anio_auditoria'] = _columna_constante(fecha_actual.strftime("%Y"), cantidad)
+    df_limpio['mes_auditoria'] = _columna_constante(fecha_actual.strftime("%m"), cantidad)
+    df_limpio['dia_auditoria'] = _columna_constante(fecha_actual.strftime("%d"), cantidad)
+    df_limpio['fecha_completa_auditoria'] = _columna_constante(fecha_actual.strftime("%Y-%m-%d %H:%M:%S"), cantidad)
+
+    df_limpio.columns = [RENOMBRE_COLUMNAS.get(col, col) for col in df_limpio.columns]
+    return calcular_metricas_derivadas(df_limpio)
+
+def _detalles_transformacion(medianas, columnas_eliminadas, fecha_actual):
+    """Generamos las líneas del informe que describen los pasos 2 a 8 de la limpieza."""
+    anio = fecha_actual.strftime("%Y")
+    mes = fecha_actual.strftime("%m")
+    dia = fecha_actual.strftime("%d")
+    fecha_completa = fecha_actual.strftime("%Y-%m-%d %H:%M:%S")
+
+    detalles = [
+        f"Valores Nulos en '{columna}' Imputados con la Mediana: {mediana}"
+        for columna, mediana in medianas.items()
+    ]
+    detalles.append(f"Columna '{COLUMNA_IMPUTADAS}' Indica las Columnas Imputadas de Cada Registro")
+    # 'registro_nulo' se rellenaría con "Sin Dato", pero como se elimina junto con las demás columnas no se recorre
+    detalles.append("Valores Nulos en 'registro_nulo' Rellenados con 'Sin Dato'")
+    if columnas_eliminadas:
+        detalles.append(f"Columnas Eliminadas por ser Duplicadas e Innecesarias: {', '.join(columnas_eliminadas)}")
+    else:
+        detalles.append("No se Encontraron Columnas Duplicadas o Innecesarias para Eliminar.")
+    detalles.append(f"Columnas 'anio_auditoria', 'mes_auditoria' y 'dia_auditoria' Establecidas a la Fecha Actual: {anio}-{mes}-{dia}")
+    detalles.append(f"Columna 'fecha_completa_auditoria' Establecida a la Fecha y Hora Actual: {fecha_completa}")
+    detalles.append("Columnas Renombradas a Índices en Español")
+    detalles.append("Columna 'tasa_positividad' Calculada como (casos_positivos/total_resultados)*100")
+    detalles.append("Columna 'tasa_mortalidad' Calculada como (fallecidos/casos_positivos)*100")
+    return detalles
+
+@metricas.instrumentar
 def operaciones_de_limpieza(df_sucio):
     """
     Aplicamos una serie de operaciones de limpieza y transformación sobre los datos "sucios".
@@ -116,12 +347,21 @@ def operaciones_de_limpieza(df_sucio):
       - Cálculo de 'tasa_positividad' y 'tasa_mortalidad'.
       - Eliminación final de duplicados para asegurar que no queden registros idénticos.
       - Estadísticas después de limpiar (nulos, duplicados, etc.).
+
+    Las operaciones siguen un plan que evita pasadas y copias innecesarias: la máscara de
+    duplicados se calcula una sola vez y sirve tanto para contar como para filtrar, las columnas
+    sobrantes se eliminan en una sola operación antes de transformar, las columnas enteras se
+    reducen a int32 y las columnas constantes de auditoría se guardan como categóricas.
+    Al final se agrega la memoria y el tiempo de la limpieza al informe.
     """
     detalles_auditoria = []
+    inicio = time.perf_counter()
+    memoria_inicial = _memoria_mb(df_sucio)
 
     # ====== Estadísticas antes de limpiar ======
     cantidad_inicial = len(df_sucio)
-    duplicados_inicial = cantidad_inicial - len(df_sucio.drop_duplicates())
+    mascara_duplicados = df_sucio.duplicated()
+    duplicados_inicial = int(mascara_duplicados.sum())
     nulos_inicial = df_sucio.isnull().sum().to_dict()
 
     detalles_auditoria.append("=== ESTADO INICIAL DE LA TABLA SUCIA ===")
@@ -130,88 +370,29 @@ def operaciones_de_limpieza(df_sucio):
     detalles_auditoria.append(f"Nulos Iniciales (Por Columna): {nulos_inicial}")
     detalles_auditoria.append("")
 
-    # 1. Eliminamos registros duplicados
-    df_limpio = df_sucio.drop_duplicates().copy()
-    duplicados_eliminados = cantidad_inicial - len(df_limpio)
-    detalles_auditoria.append(f"Duplicados Eliminados: {duplicados_eliminados}")
-
-    # 2. Convertimos columnas a numérico y rellenamos valores nulos con la mediana
-    columnas_numericas = ['positive', 'death', 'hospitalizedCurrently', 'totalTestResults']
-    for columna in columnas_numericas:
-        df_limpio.loc[:, columna] = pd.to_numeric(df_limpio[columna], errors='coerce')
-        mediana = df_limpio[columna].median()
-        df_limpio.loc[:, columna] = df_limpio[columna].fillna(mediana)
-        detalles_auditoria.append(f"Valores Nulos en '{columna}' Imputados con la Mediana: {mediana}")
-
-    # 3. Rellenamos valores nulos en 'registro_nulo' con "Sin Dato"
-    df_limpio.loc[:, 'registro_nulo'] = df_limpio['registro_nulo'].fillna("Sin Dato")
-    detalles_auditoria.append("Valores Nulos en 'registro_nulo' Rellenados con 'Sin Dato'")
-
-    # 4. Eliminamos las columnas duplicadas e innecesarias
-    columnas_a_eliminar = [
-        'fecha_duplicada', 'positive_duplicada', 'death_duplicada',
-        'columna_inutil_1', 'columna_inutil_2', 'registro_nulo',
-        'fecha_sucia' 
-    ]
-    columnas_eliminadas = []
-    for col in columnas_a_eliminar:
-        if col in df_limpio.columns:
-            df_limpio.drop(columns=[col], inplace=True)
-            columnas_eliminadas.append(col)
-    
-    if columnas_eliminadas:
-        detalles_auditoria.append(f"Columnas Eliminadas por ser Duplicadas e Innecesarias: {', '.join(columnas_eliminadas)}")
-    else:
-        detalles_auditoria.append("No se Encontraron Columnas Duplicadas o Innecesarias para Eliminar.")
+    # 1. Eliminamos registros duplicados reutilizando la máscara (el filtrado ya produce un DataFrame nuevo)
+    #    y en la misma selección descartamos las columnas duplicadas e innecesarias (paso 4)
+    columnas_eliminadas = [col for col in COLUMNAS_A_ELIMINAR if col in df_sucio.columns]
+    columnas_conservadas = [col for col in df_sucio.columns if col not in columnas_eliminadas]
+    df_limpio = df_sucio.loc[~mascara_duplicados.to_numpy(), columnas_conservadas]
+    detalles_auditoria.append(f"Duplicados Eliminados: {duplicados_inicial}")
 
-    # 5. Asignamos la fecha y hora actuales para la auditoría
-    fecha_actual = datetime.now()
-    anio = fecha_actual.strftime("%Y")
-    mes = fecha_actual.strftime("%m")
-    dia = fecha_actual.strftime("%d")
-    fecha_completa = fecha_actual.strftime("%Y-%m-%d %H:%M:%S")
-    
-    df_limpio.loc[:, 'anio_auditoria'] = anio
-    df_limpio.loc[:, 'mes_auditoria'] = mes
-    df_limpio.loc[:, 'dia_auditoria'] = dia
-    detalles_auditoria.append(f"Columnas 'anio_auditoria', 'mes_auditoria' y 'dia_auditoria' Establecidas a la Fecha Actual: {anio}-{mes}-{dia}")
-    
-    df_limpio.loc[:, 'fecha_completa_auditoria'] = fecha_completa
-    detalles_auditoria.append(f"Columna 'fecha_completa_auditoria' Establecida a la Fecha y Hora Actual: {fecha_completa}")
-
-    # 6. Renombramos columnas a nombres en español
-    df_limpio = df_limpio.rename(columns={
-        'date': 'fecha',
-        'positive': 'casos_positivos',
-        'death': 'fallecidos',
-        'hospitalizedCurrently': 'hospitalizados',
-        'totalTestResults': 'total_resultados',
-        'positiveIncrease': 'incremento_positivos',
-        'deathIncrease': 'incremento_fallecidos',
-        'lastModified': 'ultima_modificacion'
-    })
-    detalles_auditoria.append("Columnas Renombradas a Índices en Español")
-
-    # 7. Calculamos la columna 'tasa_positividad'
-    df_limpio.loc[:, 'tasa_positividad'] = df_limpio.apply(
-        lambda x: (x['casos_positivos'] / x['total_resultados'] * 100)
-                  if x['total_resultados'] and x['total_resultados'] > 0 else 0,
-        axis=1
-    )
-    detalles_auditoria.append("Columna 'tasa_positividad' Calculada como (casos_positivos/total_resultados)*100")
+    # 2. Convertimos columnas a numérico y calculamos la mediana de cada una
+    medianas = {}
+    for columna in COLUMNAS_NUMERICAS_LIMPIEZA:
+        df_limpio[columna] = pd.to_numeric(df_limpio[columna], errors='coerce')
+        medianas[columna] = df_limpio[columna].median()
 
-    # 8. Calculamos la columna 'tasa_mortalidad'
-    df_limpio.loc[:, 'tasa_mortalidad'] = df_limpio.apply(
-        lambda x: (x['fallecidos'] / x['casos_positivos'] * 100)
-                  if x['casos_positivos'] and x['casos_positivos'] > 0 else 0,
-        axis=1
-    )
-    detalles_auditoria.append("Columna 'tasa_mortalidad' Calculada como (fallecidos/casos_positivos)*100")
+    # 2 a 8. Imputamos, agregamos auditoría, renombramos y calculamos las tasas
+    fecha_actual = datetime.now()
+    df_limpio = _transformar_datos_convertidos(df_limpio, medianas, fecha_actual)
+    detalles_auditoria.extend(_detalles_transformacion(medianas, columnas_eliminadas, fecha_actual))
 
     # 9. Eliminamos duplicados finales para asegurar que no queden registros idénticos
-    registros_antes = len(df_limpio)
-    df_limpio = df_limpio.drop_duplicates()
-    duplicados_final = registros_antes - len(df_limpio)
+    mascara_duplicados_final = df_limpio.duplicated()
+    duplicados_final = int(mascara_duplicados_final.sum())
+    if duplicados_final:
+        df_limpio = df_limpio.loc[~mascara_duplicados_final.to_numpy()]
     detalles_auditoria.append(f"Duplicados Finales Eliminados: {duplicados_final}")
 
     # ====== Estadísticas después de limpiar ======
@@ -223,37 +404,318 @@ def operaciones_de_limpieza(df_sucio):
     detalles_auditoria.append(f"Registros Finales: {cantidad_final}")
     detalles_auditoria.append(f"Nulos Finales (por columna): {nulos_final}")
 
+    # ====== Rendimiento de la limpieza ======
+    duracion = time.perf_counter() - inicio
+    memoria_final = _memoria_mb(df_limpio)
+    detalles_auditoria.append("")
+    detalles_auditoria.append("=== RENDIMIENTO DE LA LIMPIEZA ===")
+    detalles_auditoria.append(f"Memoria Tabla Sucia: {memoria_inicial:.3f} MB")
+    detalles_auditoria.append(f"Memoria Tabla Limpia: {memoria_final:.3f} MB")
+    detalles_auditoria.append(f"Tiempo de Limpieza: {duracion:.3f} s")
+
     return df_limpio, detalles_auditoria
 
-def exportar_datos_limpios(df_limpio, detalles_auditoria):
+@metricas.instrumentar
+def simular_y_guardar_datos_sucios_por_bloques(bloques, conexion):
     """
-    Exportamos el DataFrame limpio a un archivo CSV y generamos el informe de auditoría en un archivo de texto.
-    
-    Parámetros:
-        df_limpio: DataFrame con los datos limpios.
-        detalles_auditoria: Lista de mensajes que describen el proceso de limpieza.
+    Simulamos los datos sucios bloque a bloque, agregando cada bloque al CSV de datos sucios
+    y a la sombra de 'covid_data_dirty' antes de entregarlo a la limpieza. Al terminar, la sombra
+    reemplaza a la tabla en una sola transacción.
     """
-    df_limpio.to_csv(RUTA_CSV_LIMPIO, index=False)
-    
+    total = None
+    for numero, df_sucio in enumerate(simular_datos_sucios_por_bloques(bloques)):
+        almacenamiento.exportar_csv(df_sucio, RUTA_CSV_SUCIO, modo="w" if numero == 0 else "a", encabezado=numero == 0)
+        almacenamiento.escribir_capa(df_sucio, "sucia", reemplazar=numero == 0)
+        total = (total or 0) + esquema.cargar_tabla_sombra(conexion, "covid_data_dirty", df_sucio, crear=numero == 0)
+        conexion.commit()
+        yield df_sucio
+    if total is not None:
+        esquema.publicar_tabla_sombra(conexion, "covid_data_dirty", total)
+
+def _reiniciar_huellas(conexion, tabla):
+    """Creamos vacío el conjunto persistente de huellas de filas (tabla temporal de SQLite)."""
+    conexion.execute(f"DROP TABLE IF EXISTS temp.{tabla};")
+    conexion.execute(f"CREATE TEMP TABLE {tabla} (huella INTEGER PRIMARY KEY);")
+    conexion.execute("CREATE TEMP TABLE IF NOT EXISTS _huellas_bloque (huella INTEGER);")
+
+def _huellas_filas(df):
+    """
+    Calculamos la huella de 64 bits de cada fila. 'hash_pandas_object' pasa a texto los valores
+    de las columnas de objetos, así que 5.0 y "5.0" tendrían la misma huella; por eso en esas
+    columnas se agrega a la huella una marca de si el valor es una cadena, de modo que un número
+    y su forma en texto son filas distintas, igual que para DataFrame.duplicated.
+    """
+    marcas = {
+        col: df[col].map(lambda valor: isinstance(valor, str)).astype(bool)
+        for col in df.columns if df[col].dtype == object
+    }
+    if marcas:
+        df = pd.concat([df, pd.DataFrame(marcas, index=df.index)], axis=1)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+
+def _filas_nuevas(conexion, tabla, df):
+    """
+    Calculamos la huella de cada fila (ver '_huellas_filas') y devolvemos la máscara de las filas
+    que no se habían visto antes, ni en bloques anteriores ni dentro del mismo bloque. Las huellas
+    nuevas quedan registradas en la tabla temporal, de modo que la memoria de Python solo
+    depende del tamaño del bloque.
+    """
+    huellas = _huellas_filas(df)
+    primeras = ~pd.Series(huellas).duplicated().to_numpy()
+
+    conexion.execute("DELETE FROM _huellas_bloque;")
+    conexion.executemany("INSERT INTO _huellas_bloque VALUES (?);", ((int(h),) for h in huellas[primeras]))
+    vistas = [fila[0] for fila in conexion.execute(
+        f"SELECT b.huella FROM _huellas_bloque b JOIN {tabla} v ON v.huella = b.huella;"
+    )]
+    nuevas = primeras & ~np.isin(huellas, np.array(vistas, dtype=np.int64))
+    conexion.executemany(f"INSERT INTO {tabla} VALUES (?);", ((int(h),) for h in huellas[nuevas]))
+    return nuevas
+
+def _mediana_sql(conexion, tabla, columna):
+    """
+    Calculamos la mediana exacta de una columna en SQLite (promedio de los valores centrales ordenados).
+    Solo cuenta los valores numéricos, como Series.median después de pd.to_numeric.
+    """
+    numericos = f"typeof(\"{columna}\") IN ('integer', 'real')"
+    cantidad = conexion.execute(f'SELECT COUNT(*) FROM {tabla} WHERE {numericos};').fetchone()[0]
+    if cantidad == 0:
+        return np.nan
+    centrales = [fila[0] for fila in conexion.execute(
+        f'SELECT "{columna}" FROM {tabla} WHERE {numericos} ORDER BY "{columna}" LIMIT ? OFFSET ?;',
+        (2 - cantidad % 2, (cantidad - 1) // 2)
+    )]
+    return float(sum(centrales) / len(centrales))
+
+def _tipos_comunes(tipos, df):
+    """
+    Acumulamos los tipos de las columnas de un bloque de la primera pasada: si una columna cambia
+    de tipo entre bloques (p.ej. enteros en uno y decimales en otro por un nulo) se usa el tipo
+    común, el mismo que tendría la columna completa en memoria.
+    """
+    for columna, tipo in df.dtypes.items():
+        anterior = tipos.setdefault(columna, tipo)
+        if anterior != tipo:
+            numericos = all(
+                pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in (anterior, tipo)
+            )
+            tipos[columna] = np.result_type(anterior, tipo) if numericos else np.dtype(object)
+    return tipos
+
+def _sumar_nulos(acumulado, df):
+    """Acumulamos los nulos por columna de un bloque."""
+    nulos = df.isnull().sum()
+    return nulos if acumulado is None else acumulado.add(nulos, fill_value=0)
+
+@metricas.instrumentar
+def operaciones_de_limpieza_por_bloques(bloques_sucios, conexion, conexion_lectura=None, tamano_bloque=None):
+    """
+    Aplicamos las mismas operaciones de 'operaciones_de_limpieza' sin cargar la tabla completa:
+
+      1. Primera pasada: por cada bloque sucio acumulamos nulos y registros, descartamos los
+         duplicados con un conjunto persistente de huellas en SQLite, eliminamos las columnas
+         innecesarias, convertimos a numérico y guardamos el bloque en una tabla intermedia.
+      2. Medianas exactas calculadas por SQLite sobre la tabla intermedia (orden y desplazamiento).
+      3. Segunda pasada: por bloques imputamos, agregamos auditoría, renombramos, calculamos
+         las tasas, descartamos duplicados finales y agregamos el bloque a 'covid_data_cleaned'
+         y al CSV de datos limpios.
+
+    Las huellas distinguen un número de su versión en cadena, como la limpieza en memoria, y al
+    releer la tabla intermedia cada bloque recupera los tipos de la primera pasada (SQLite
+    devuelve como objetos las columnas que en un bloque son todas nulas), de modo que los
+    duplicados, las medianas y los registros finales coinciden con 'operaciones_de_limpieza'.
+
+    La tabla intermedia se relee con 'conexion_lectura' (otra conexión en modo WAL), ya que
+    SQLite no permite reemplazar tablas en una conexión con una lectura en curso.
+
+    Cada bloque sucio (primera pasada) y limpio (segunda pasada) se agrega además a su perfil
+    (ver perfilador.py), de modo que los perfiles salen de las mismas lecturas.
+
+    Retorna:
+        Tupla (cantidad de registros limpios, lista de mensajes del informe de auditoría,
+        perfiles de 'covid_data_dirty' y 'covid_data_cleaned' o None si PERFIL_DATOS=0).
+    """
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE_LIMPIEZA
+    conexion_lectura = conexion_lectura or conexion
+    inicio = time.perf_counter()
+    memoria_pico_sucia = 0.0
+    memoria_pico_limpia = 0.0
+    perfiles = None
+    if perfilador.GENERAR_PERFIL:
+        perfiles = {"covid_data_dirty": perfilador.nuevo_perfil(), "covid_data_cleaned": perfilador.nuevo_perfil()}
+
+    # ====== Primera pasada: estadísticas iniciales, deduplicación y conversión ======
+    cantidad_inicial = 0
+    duplicados_inicial = 0
+    nulos_inicial = None
+    columnas_eliminadas = []
+    tipos_etapa = {}
+    conexion.execute(f"DROP TABLE IF EXISTS {TABLA_ETAPA_LIMPIEZA};")
+    _reiniciar_huellas(conexion, "_huellas_sucias")
+    for bloque in bloques_sucios:
+        memoria_pico_sucia = max(memoria_pico_sucia, _memoria_mb(bloque))
+        cantidad_inicial += len(bloque)
+        nulos_inicial = _sumar_nulos(nulos_inicial, bloque)
+        if perfiles:
+            perfilador.actualizar_perfil(perfiles["covid_data_dirty"], bloque)
+
+        nuevas = _filas_nuevas(conexion, "_huellas_sucias", bloque)
+        duplicados_inicial += int((~nuevas).sum())
+
+        columnas_eliminadas = [col for col in COLUMNAS_A_ELIMINAR if col in bloque.columns]
+        columnas_conservadas = [col for col in bloque.columns if col not in columnas_eliminadas]
+        etapa = bloque.loc[nuevas, columnas_conservadas]
+        for columna in COLUMNAS_NUMERICAS_LIMPIEZA:
+            etapa[columna] = pd.to_numeric(etapa[columna], errors='coerce')
+        _tipos_comunes(tipos_etapa, etapa)
+        etapa.to_sql(TABLA_ETAPA_LIMPIEZA, conexion, if_exists="append", index=False)
+    conexion.commit()
+
+    detalles_auditoria = []
+    detalles_auditoria.append("=== ESTADO INICIAL DE LA TABLA SUCIA ===")
+    detalles_auditoria.append(f"Registros Iniciales: {cantidad_inicial}")
+    detalles_auditoria.append(f"Duplicados Iniciales: {duplicados_inicial}")
+    detalles_auditoria.append(f"Nulos Iniciales (Por Columna): {nulos_inicial.astype(int).to_dict() if nulos_inicial is not None else {}}")
+    detalles_auditoria.append("")
+    detalles_auditoria.append(f"Duplicados Eliminados: {duplicados_inicial}")
+
+    if cantidad_inicial == 0:
+        detalles_auditoria.append("No hay Registros para Limpiar.")
+        return 0, detalles_auditoria, perfiles
+
+    # ====== Medianas globales calculadas en SQLite ======
+    medianas = {
+        columna: _mediana_sql(conexion, TABLA_ETAPA_LIMPIEZA, columna)
+        for columna in COLUMNAS_NUMERICAS_LIMPIEZA
+    }
+    fecha_actual = datetime.now()
+    detalles_auditoria.extend(_detalles_transformacion(medianas, columnas_eliminadas, fecha_actual))
+
+    # ====== Segunda pasada: transformación y escritura incremental ======
+    cantidad_final = 0
+    duplicados_final = 0
+    nulos_final = None
+    _reiniciar_huellas(conexion, "_huellas_limpias")
+    bloques_etapa = pd.read_sql_query(
+        f"SELECT * FROM {TABLA_ETAPA_LIMPIEZA} ORDER BY rowid", conexion_lectura, chunksize=tamano_bloque
+    )
+    for numero, bloque in enumerate(bloques_etapa):
+        bloque = _transformar_datos_convertidos(bloque.astype(tipos_etapa), medianas, fecha_actual)
+        nuevas = _filas_nuevas(conexion, "_huellas_limpias", bloque)
+        duplicados_final += int((~nuevas).sum())
+        bloque = bloque.loc[nuevas]
+
+        cantidad_final += len(bloque)
+        nulos_final = _sumar_nulos(nulos_final, bloque)
+        if perfiles:
+            perfilador.actualizar_perfil(perfiles["covid_data_cleaned"], bloque)
+        memoria_pico_limpia = max(memoria_pico_limpia, _memoria_mb(bloque))
+
+        primero = numero == 0
+        esquema.cargar_tabla_sombra(conexion, "covid_data_cleaned", bloque, crear=primero)
+        almacenamiento.exportar_csv(bloque, RUTA_CSV_LIMPIO, modo="w" if primero else "a", encabezado=primero)
+        almacenamiento.escribir_capa(bloque, "limpia", reemplazar=primero)
+
+    conexion.execute(f"DROP TABLE IF EXISTS {TABLA_ETAPA_LIMPIEZA};")
+    conexion.commit()
+    esquema.publicar_tabla_sombra(conexion, "covid_data_cleaned", cantidad_final)
+    detalles_auditoria.append(f"Duplicados Finales Eliminados: {duplicados_final}")
+
+    # ====== Estadísticas después de limpiar ======
+    detalles_auditoria.append("")
+    detalles_auditoria.append("=== ESTADO FINAL DE LA TABLA LIMPIA ===")
+    detalles_auditoria.append(f"Registros Finales: {cantidad_final}")
+    detalles_auditoria.append(f"Nulos Finales (por columna): {nulos_final.astype(int).to_dict()}")
+
+    # ====== Rendimiento de la limpieza ======
+    duracion = time.perf_counter() - inicio
+    detalles_auditoria.append("")
+    detalles_auditoria.append("=== RENDIMIENTO DE LA LIMPIEZA (POR BLOQUES) ===")
+    detalles_auditoria.append(f"Tamaño de Bloque: {tamano_bloque} Registros")
+    detalles_auditoria.append(f"Memoria Máxima por Bloque Sucio: {memoria_pico_sucia:.3f} MB")
+    detalles_auditoria.append(f"Memoria Máxima por Bloque Limpio: {memoria_pico_limpia:.3f} MB")
+    detalles_auditoria.append(f"Tiempo de Limpieza: {duracion:.3f} s")
+
+    return cantidad_final, detalles_auditoria, perfiles
+
+def escribir_informe_auditoria(detalles_auditoria, perfiles=None):
+    """
+    Escribimos el informe de auditoría de la limpieza en un archivo de texto y, si se reciben
+    perfiles (nombre de tabla -> perfil), el perfil de datos en JSON junto a él.
+    """
+    os.makedirs(os.path.dirname(RUTA_AUDITORIA), exist_ok=True)
     with open(RUTA_AUDITORIA, "w", encoding="utf-8") as archivo:
         archivo.write("\n".join(detalles_auditoria))
-    
-    print(f"\nArchivo CSV de Datos Limpios Generado en: {RUTA_CSV_LIMPIO}")
     print(f"\nArchivo de Auditoría Generado en: {RUTA_AUDITORIA}")
+    if perfiles:
+        perfilador.escribir_perfiles(RUTA_AUDITORIA, perfiles)
 
+@metricas.instrumentar
+def exportar_datos_limpios(df_limpio, detalles_auditoria, df_sucio=None):
+    """
+    Exportamos el DataFrame limpio a la capa Parquet 'limpia' (y a CSV si está activa la exportación)
+    y generamos el informe de auditoría en un archivo de texto, con el perfil de datos en JSON.
+    
+    Parámetros:
+        df_limpio: DataFrame con los datos limpios.
+        detalles_auditoria: Lista de mensajes que describen el proceso de limpieza.
+        df_sucio: DataFrame sucio, para incluir también su perfil (opcional).
+    """
+    almacenamiento.escribir_capa(df_limpio, "limpia")
+    if almacenamiento.exportar_csv(df_limpio, RUTA_CSV_LIMPIO):
+        print(f"\nArchivo CSV de Datos Limpios Generado en: {RUTA_CSV_LIMPIO}")
+
+    perfiles = {}
+    if perfilador.GENERAR_PERFIL:
+        if df_sucio is not None:
+            perfiles["covid_data_dirty"] = perfilador.perfilar_dataframe(df_sucio)
+        perfiles["covid_data_cleaned"] = perfilador.perfilar_dataframe(df_limpio)
+    escribir_informe_auditoria(detalles_auditoria, perfiles)
+
+@metricas.instrumentar
 def actualizar_tabla_limpia(df_limpio):
     """
     Creamos o actualizamos la tabla 'covid_data_cleaned' en la base de datos SQLite con el DataFrame limpio.
     
     Parámetros:
         df_limpio: DataFrame con los datos limpios.
+
+    La tabla se carga en una sombra y la reemplaza en una sola transacción (ver esquema.py).
     """
     conexion = sqlite3.connect(RUTA_DB)
-    conexion.execute("DROP TABLE IF EXISTS covid_data_cleaned;")
-    df_limpio.to_sql("covid_data_cleaned", conexion, if_exists="replace", index=False)
-    conexion.close()
+    try:
+        esquema.reemplazar_tabla(conexion, "covid_data_cleaned", df_limpio)
+    finally:
+        conexion.close()
     print("\nTabla 'covid_data_cleaned' Creada/Actualizada en la Base de Datos con los Datos Limpios.\n")
 
+def main_por_bloques():
+    """
+    Variante del proceso completo que trabaja por bloques de TAMANO_BLOQUE_LIMPIEZA registros:
+    lee 'covid_data', simula y guarda los datos sucios, limpia y escribe 'covid_data_cleaned'
+    de forma incremental, sin tener nunca la tabla completa en memoria.
+    """
+    print(f"\nIniciando Limpieza por Bloques de {TAMANO_BLOQUE_LIMPIEZA} Registros...\n")
+    # Escribimos por una conexión y leemos por otra: en modo WAL las lecturas no bloquean las escrituras
+    conexion = sqlite3.connect(RUTA_DB)
+    esquema.configurar_escritura(conexion)
+    conexion_lectura = sqlite3.connect(RUTA_DB)
+    try:
+        bloques = cargar_datos_desde_db_por_bloques(conexion_lectura)
+        bloques_sucios = simular_y_guardar_datos_sucios_por_bloques(bloques, conexion)
+        cantidad_final, detalles_auditoria, perfiles = operaciones_de_limpieza_por_bloques(
+            bloques_sucios, conexion, conexion_lectura
+        )
+    finally:
+        conexion_lectura.close()
+        conexion.close()
+    if almacenamiento.EXPORTAR_CSV:
+        print(f"\nArchivo CSV de Datos Sucios Generado en: {RUTA_CSV_SUCIO}")
+        print(f"\nArchivo CSV de Datos Limpios Generado en: {RUTA_CSV_LIMPIO}")
+    print(f"\nTabla 'covid_data_cleaned' Creada por Bloques con {cantidad_final} Registros Limpios.\n")
+    escribir_informe_auditoria(detalles_auditoria, perfiles)
+    print("\n¡Preprocesamiento y Limpieza de Datos Completado con Éxito!\n")
+
 def main():
     """
     Función principal que orquesta el proceso completo:
@@ -265,6 +727,10 @@ def main():
       6. Exporta el DataFrame limpio a CSV y genera un informe de auditoría (antes y después).
       7. Actualiza la base de datos con la nueva tabla de datos limpios (covid_data_cleaned).
     """
+    if LIMPIEZA_POR_BLOQUES:
+        main_por_bloques()
+        return
+
     print("\nIniciando Proceso de Limpieza y Preprocesamiento de Datos...\n")
 
     # 1. Cargamos datos desde la base de datos
@@ -281,12 +747,32 @@ def main():
     # 4. Guardamos la tabla sucia en la base de datos
     guardar_tabla_sucia_en_db(df_sucio)
 
+    # 5 a 7 con el backend SQL: la limpieza y la escritura de 'covid_data_cleaned' ocurren en SQLite
+    if BACKEND_LIMPIEZA == "sql":
+        import cleaning_sql  # Importación diferida: cleaning_sql depende de este módulo
+        conexion = sqlite3.connect(RUTA_DB)
+        try:
+            detalles_auditoria = cleaning_sql.operaciones_de_limpieza_sql(conexion)
+            print("\nOperaciones de Limpieza y Transformación Aplicadas en SQLite\n")
+            perfil_limpio = cleaning_sql.exportar_tabla_limpia(conexion)
+            perfiles = None
+            if perfil_limpio is not None:
+                perfiles = {
+                    "covid_data_dirty": perfilador.perfilar_tabla(conexion, "covid_data_dirty"),
+                    "covid_data_cleaned": perfil_limpio,
+                }
+        finally:
+            conexion.close()
+        escribir_informe_auditoria(detalles_auditoria, perfiles)
+        print("\n¡Preprocesamiento y Limpieza de Datos Completado con Éxito!\n")
+        return
+
     # 5. Aplicamos operaciones de limpieza y transformación
     df_limpio, detalles_auditoria = operaciones_de_limpieza(df_sucio)
     print("\nOperaciones de Limpieza y Transformación Aplicadas\n")
 
     # 6. Exportamos los datos limpios y generamos el informe de auditoría
-    exportar_datos_limpios(df_limpio, detalles_auditoria)
+    exportar_datos_limpios(df_limpio, detalles_auditoria, df_sucio)
 
     # 7. Actualizamos la base de datos con la nueva tabla de datos limpios
     actualizar_tabla_limpia(df_limpio)
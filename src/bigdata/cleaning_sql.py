@@ -0,0 +1,316 @@
+import sys
+import time
+import sqlite3
+import pandas as pd
+from datetime import datetime
+import cleaning
+import almacenamiento
+import esquema
+import perfilador
+
+"""
+Backend SQL para la limpieza: ejecuta dentro de SQLite las mismas operaciones que
+'cleaning.operaciones_de_limpieza' sobre la tabla 'covid_data_dirty', sin pasar los datos por Python:
+
+  - Deduplicación con GROUP BY sobre todas las columnas (conservando la primera aparición). Las
+    columnas con números y textos mezclados se guardan sin afinidad (ver esquema.py), así que 5.0 y
+    '5.0' son valores distintos, igual que para DataFrame.duplicated.
+  - Conversión numérica con CAST, dejando en NULL los textos que no son números (p.ej. 'nan').
+  - Medianas exactas ordenando y desplazando hasta los valores centrales (solo valores numéricos).
+  - Imputación con COALESCE (y la columna de columnas imputadas), columnas de auditoría, renombrado
+    y tasas calculadas con CASE.
+  - Escritura de 'covid_data_cleaned' con CREATE TABLE AS SELECT en una tabla sombra que luego la reemplaza.
+
+Las cifras del informe (duplicados, medianas y nulos por columna) salen de agregados SQL.
+Ejecutar este módulo compara el backend SQL con el de pandas sobre los mismos datos sucios.
+"""
+
+# Tablas temporales del backend SQL
+TABLA_DEDUPLICADA = "_limpieza_sql_deduplicada"
+TABLA_CONVERTIDA = "_limpieza_sql_convertida"
+
+# Tablas que usa la comparación para no reemplazar 'covid_data_dirty' ni 'covid_data_cleaned'
+TABLA_COMPARACION_SUCIA = "covid_data_dirty_sql_benchmark"
+TABLA_COMPARACION = "covid_data_cleaned_sql_benchmark"
+
+
+def _q(nombre):
+    """Escapamos un identificador de SQLite."""
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def _columnas(conexion, tabla):
+    """Listamos las columnas de una tabla en su orden de definición."""
+    return [fila[1] for fila in conexion.execute(f"PRAGMA table_info({_q(tabla)});")]
+
+
+def _a_numero(columna):
+    """Expresión SQL equivalente a pd.to_numeric(errors='coerce'): los textos no numéricos quedan en NULL."""
+    c = _q(columna)
+    return (
+        f"CASE WHEN typeof({c}) IN ('integer', 'real') THEN CAST({c} AS REAL) "
+        f"WHEN typeof({c}) = 'text' AND trim({c}) GLOB '*[0-9]*' "
+        f"AND NOT trim({c}) GLOB '*[^0-9.eE+-]*' THEN CAST(trim({c}) AS REAL) "
+        f"ELSE NULL END"
+    )
+
+
+def _nulos_por_columna(conexion, tabla):
+    """Contamos los nulos de todas las columnas en una sola lectura de la tabla."""
+    columnas = _columnas(conexion, tabla)
+    sumas = ", ".join(f"COALESCE(SUM({_q(col)} IS NULL), 0)" for col in columnas)
+    valores = conexion.execute(f"SELECT {sumas} FROM {_q(tabla)};").fetchone()
+    return dict(zip(columnas, valores))
+
+
+def _mediana(conexion, tabla, columna):
+    """
+    Mediana exacta: promedio de los uno o dos valores centrales de la columna ordenada.
+    Solo cuenta los valores numéricos, como Series.median después de pd.to_numeric.
+    """
+    c = _q(columna)
+    numericos = f"typeof({c}) IN ('integer', 'real')"
+    return conexion.execute(f"""
+        SELECT AVG({c}) FROM (
+            SELECT {c} FROM {_q(tabla)} WHERE {numericos} ORDER BY {c}
+            LIMIT 2 - (SELECT COUNT(*) FROM {_q(tabla)} WHERE {numericos}) % 2
+            OFFSET ((SELECT COUNT(*) FROM {_q(tabla)} WHERE {numericos}) - 1) / 2
+        );
+    """).fetchone()[0]
+
+
+def operaciones_de_limpieza_sql(conexion, tabla_origen="covid_data_dirty", tabla_destino="covid_data_cleaned"):
+    """
+    Limpiamos 'tabla_origen' dentro de SQLite y escribimos el resultado en 'tabla_destino'.
+
+    Retorna:
+        Lista de mensajes del informe de auditoría, con el mismo formato que el backend de pandas.
+    """
+    inicio = time.perf_counter()
+    detalles_auditoria = []
+    columnas_origen = _columnas(conexion, tabla_origen)
+    grupo_origen = ", ".join(_q(col) for col in columnas_origen)
+
+    # ====== Estadísticas antes de limpiar ======
+    cantidad_inicial = conexion.execute(f"SELECT COUNT(*) FROM {_q(tabla_origen)};").fetchone()[0]
+    nulos_inicial = _nulos_por_columna(conexion, tabla_origen)
+
+    # 1. Eliminamos duplicados conservando la primera aparición de cada fila y el orden original
+    conexion.execute(f"DROP TABLE IF EXISTS temp.{TABLA_DEDUPLICADA};")
+    conexion.execute(f"""
+        CREATE TEMP TABLE {TABLA_DEDUPLICADA} AS
+        SELECT * FROM {_q(tabla_origen)}
+        WHERE rowid IN (SELECT MIN(rowid) FROM {_q(tabla_origen)} GROUP BY {grupo_origen})
+        ORDER BY rowid;
+    """)
+    cantidad_deduplicada = conexion.execute(f"SELECT COUNT(*) FROM {TABLA_DEDUPLICADA};").fetchone()[0]
+    duplicados_inicial = cantidad_inicial - cantidad_deduplicada
+
+    detalles_auditoria.append("=== ESTADO INICIAL DE LA TABLA SUCIA ===")
+    detalles_auditoria.append(f"Registros Iniciales: {cantidad_inicial}")
+    detalles_auditoria.append(f"Duplicados Iniciales: {duplicados_inicial}")
+    detalles_auditoria.append(f"Nulos Iniciales (Por Columna): {nulos_inicial}")
+    detalles_auditoria.append("")
+    detalles_auditoria.append(f"Duplicados Eliminados: {duplicados_inicial}")
+
+    # 2. Descartamos columnas innecesarias y convertimos a numérico
+    columnas_eliminadas = [col for col in cleaning.COLUMNAS_A_ELIMINAR if col in columnas_origen]
+    columnas_conservadas = [col for col in columnas_origen if col not in columnas_eliminadas]
+    seleccion = ", ".join(
+        f"{_a_numero(col)} AS {_q(col)}" if col in cleaning.COLUMNAS_NUMERICAS_LIMPIEZA else _q(col)
+        for col in columnas_conservadas
+    )
+    conexion.execute(f"DROP TABLE IF EXISTS temp.{TABLA_CONVERTIDA};")
+    conexion.execute(f"""
+        CREATE TEMP TABLE {TABLA_CONVERTIDA} AS
+        SELECT {seleccion} FROM {TABLA_DEDUPLICADA} ORDER BY rowid;
+    """)
+    medianas = {
+        columna: _mediana(conexion, TABLA_CONVERTIDA, columna)
+        for columna in cleaning.COLUMNAS_NUMERICAS_LIMPIEZA
+    }
+
+    # 2 a 8. Imputación, auditoría, renombrado y tasas en una sola consulta
+    fecha_actual = datetime.now()
+    detalles_auditoria.extend(cleaning._detalles_transformacion(
+        {col: float("nan") if med is None else float(med) for col, med in medianas.items()},
+        columnas_eliminadas,
+        fecha_actual,
+    ))
+    expresiones = {}
+    for col in columnas_conservadas:
+        if col in medianas:
+            expresiones[col] = f"CAST(COALESCE({_q(col)}, :{col}) AS REAL)"
+        else:
+            expresiones[col] = _q(col)
+    salida = [(cleaning.RENOMBRE_COLUMNAS.get(col, col), expr) for col, expr in expresiones.items()]
+    # Columnas imputadas de cada registro, con los mismos nombres y orden que cleaning.etiquetas_imputadas
+    marcas = " || ".join(
+        f"CASE WHEN {_q(col)} IS NULL THEN ',{cleaning.RENOMBRE_COLUMNAS.get(col, col)}' ELSE '' END"
+        for col in medianas
+    )
+    salida.append(
+        (cleaning.COLUMNA_IMPUTADAS, f"COALESCE(NULLIF(substr({marcas}, 2), ''), '{cleaning.SIN_IMPUTACION}')")
+    )
+    salida += [
+        ("anio_auditoria", "CAST(:anio AS TEXT)"),
+        ("mes_auditoria", "CAST(:mes AS TEXT)"),
+        ("dia_auditoria", "CAST(:dia AS TEXT)"),
+        ("fecha_completa_auditoria", "CAST(:fecha_completa AS TEXT)"),
+    ]
+    por_nombre = dict(salida)
+    for nombre, (numerador, denominador) in cleaning.METRICAS_DERIVADAS.items():
+        num, den = por_nombre[numerador], por_nombre[denominador]
+        salida.append((nombre, f"CAST(CASE WHEN {den} > 0 THEN {num} / {den} * 100 ELSE 0 END AS REAL)"))
+
+    columnas_salida = ", ".join(_q(nombre) for nombre, _ in salida)
+    parametros = {col: medianas[col] for col in medianas}
+    parametros.update({
+        "anio": fecha_actual.strftime("%Y"),
+        "mes": fecha_actual.strftime("%m"),
+        "dia": fecha_actual.strftime("%d"),
+        "fecha_completa": fecha_actual.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+    # 9. Eliminamos duplicados finales agrupando sobre las columnas de salida (en la tabla sombra)
+    sombra = esquema.nombre_sombra(tabla_destino)
+    conexion.execute(f"DROP TABLE IF EXISTS {_q(sombra)};")
+    conexion.execute(f"""
+        CREATE TABLE {_q(sombra)} AS
+        SELECT {columnas_salida} FROM (
+            SELECT rowid AS _orden, {", ".join(f"{expr} AS {_q(nombre)}" for nombre, expr in salida)}
+            FROM {TABLA_CONVERTIDA}
+        )
+        GROUP BY {columnas_salida}
+        ORDER BY MIN(_orden);
+    """, parametros)
+    cantidad_final = conexion.execute(f"SELECT COUNT(*) FROM {_q(sombra)};").fetchone()[0]
+    detalles_auditoria.append(f"Duplicados Finales Eliminados: {cantidad_deduplicada - cantidad_final}")
+
+    conexion.execute(f"DROP TABLE IF EXISTS temp.{TABLA_DEDUPLICADA};")
+    conexion.execute(f"DROP TABLE IF EXISTS temp.{TABLA_CONVERTIDA};")
+    conexion.commit()
+
+    # 10. La sombra reemplaza a la tabla destino en una sola transacción
+    esquema.publicar_tabla_sombra(conexion, tabla_destino, cantidad_final)
+
+    # ====== Estadísticas después de limpiar ======
+    detalles_auditoria.append("")
+    detalles_auditoria.append("=== ESTADO FINAL DE LA TABLA LIMPIA ===")
+    detalles_auditoria.append(f"Registros Finales: {cantidad_final}")
+    detalles_auditoria.append(f"Nulos Finales (por columna): {_nulos_por_columna(conexion, tabla_destino)}")
+
+    detalles_auditoria.append("")
+    detalles_auditoria.append("=== RENDIMIENTO DE LA LIMPIEZA (SQL) ===")
+    detalles_auditoria.append(f"Tiempo de Limpieza: {time.perf_counter() - inicio:.3f} s")
+    return detalles_auditoria
+
+
+def exportar_tabla_limpia(conexion, tabla="covid_data_cleaned", tamano_bloque=50000):
+    """
+    Exportamos la tabla limpia a la capa Parquet 'limpia' (y al CSV si está activo) leyendo por bloques.
+    En la misma lectura se construye el perfil de la tabla (ver perfilador.py).
+
+    Retorna:
+        Perfil de la tabla limpia, o None si PERFIL_DATOS=0.
+    """
+    perfil = perfilador.nuevo_perfil() if perfilador.GENERAR_PERFIL else None
+    bloques = pd.read_sql_query(f"SELECT * FROM {_q(tabla)}", conexion, chunksize=tamano_bloque)
+    for numero, bloque in enumerate(bloques):
+        almacenamiento.exportar_csv(bloque, cleaning.RUTA_CSV_LIMPIO, modo="w" if numero == 0 else "a", encabezado=numero == 0)
+        almacenamiento.escribir_capa(bloque, "limpia", reemplazar=numero == 0)
+        if perfil is not None:
+            perfilador.actualizar_perfil(perfil, bloque)
+    if almacenamiento.EXPORTAR_CSV:
+        print(f"\nArchivo CSV de Datos Limpios Generado en: {cleaning.RUTA_CSV_LIMPIO}")
+    return perfil
+
+
+def _sin_auditoria(df):
+    """
+    Quitamos las columnas de fecha de auditoría, que dependen del reloj, para comparar resultados,
+    y pasamos las categóricas (pandas) a texto, como las lee SQLite.
+    """
+    ignoradas = ["anio_auditoria", "mes_auditoria", "dia_auditoria", "fecha_completa_auditoria"]
+    df = df.drop(columns=ignoradas).reset_index(drop=True)
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def _iguales(izquierda, derecha):
+    """Indicamos si dos resultados de limpieza son iguales (sin las columnas de auditoría ni los tipos)."""
+    try:
+        pd.testing.assert_frame_equal(_sin_auditoria(izquierda), _sin_auditoria(derecha), check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def comparar_con_pandas(ruta_db=None, repeticiones=3, df_sucio=None):
+    """
+    Ejecutamos ambos backends sobre los mismos datos sucios y comparamos su tiempo y su resultado
+    (sin las columnas de fecha de auditoría, que dependen del reloj).
+
+    El backend de pandas limpia el DataFrame en memoria, como en el flujo normal, y el SQL una copia
+    de ese DataFrame guardada en TABLA_COMPARACION_SUCIA. También se limpia con pandas la tabla
+    releída de SQLite, para detectar diferencias que la ida y vuelta por la base de datos ocultaría.
+
+    Parámetros:
+        df_sucio: Datos sucios a comparar (por defecto se simulan a partir de 'covid_data').
+
+    Retorna:
+        Diccionario con los tiempos medios, la aceleración, si los resultados son equivalentes
+        y los duplicados iniciales de cada backend.
+    """
+    conexion = sqlite3.connect(ruta_db or cleaning.RUTA_DB)
+    try:
+        if df_sucio is None:
+            df_sucio = cleaning.simular_datos_sucios(pd.read_sql_query("SELECT * FROM covid_data", conexion))
+        esquema.reemplazar_tabla(conexion, TABLA_COMPARACION_SUCIA, df_sucio)
+
+        tiempos_pandas = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            df_pandas, detalles_pandas = cleaning.operaciones_de_limpieza(df_sucio)
+            tiempos_pandas.append(time.perf_counter() - inicio)
+        df_releido, _ = cleaning.operaciones_de_limpieza(
+            pd.read_sql_query(f"SELECT * FROM {TABLA_COMPARACION_SUCIA}", conexion)
+        )
+
+        tiempos_sql = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            detalles_sql = operaciones_de_limpieza_sql(conexion, TABLA_COMPARACION_SUCIA, TABLA_COMPARACION)
+            tiempos_sql.append(time.perf_counter() - inicio)
+        df_sql = pd.read_sql_query(f"SELECT * FROM {TABLA_COMPARACION}", conexion)
+        conexion.execute(f"DROP TABLE IF EXISTS {TABLA_COMPARACION};")
+        conexion.execute(f"DROP TABLE IF EXISTS {TABLA_COMPARACION_SUCIA};")
+        conexion.commit()
+    finally:
+        conexion.close()
+
+    media_pandas = sum(tiempos_pandas) / len(tiempos_pandas)
+    media_sql = sum(tiempos_sql) / len(tiempos_sql)
+    duplicados = {}
+    for backend, detalles in (("pandas", detalles_pandas), ("sql", detalles_sql)):
+        linea = next(linea for linea in detalles if linea.startswith("Duplicados Iniciales"))
+        duplicados[backend] = int(linea.split(": ")[1])
+    return {
+        "registros": len(df_sql),
+        "pandas_s": media_pandas,
+        "sql_s": media_sql,
+        "aceleracion": media_pandas / media_sql if media_sql else float("inf"),
+        "equivalentes": _iguales(df_pandas, df_sql) and _iguales(df_releido, df_sql),
+        "duplicados_iniciales": duplicados,
+    }
+
+
+if __name__ == "__main__":
+    resultado = comparar_con_pandas(sys.argv[1] if len(sys.argv) > 1 else None)
+    print("=== COMPARACIÓN DE BACKENDS DE LIMPIEZA ===")
+    print(f"Registros Limpios: {resultado['registros']}")
+    print(f"Duplicados Iniciales: pandas {resultado['duplicados_iniciales']['pandas']}, "
+          f"SQL {resultado['duplicados_iniciales']['sql']}")
+    print(f"pandas: {resultado['pandas_s']:.4f} s")
+    print(f"SQL:    {resultado['sql_s']:.4f} s")
+    print(f"Aceleración: {resultado['aceleracion']:.2f}x")
+    print(f"Resultados Equivalentes: {'SI' if resultado['equivalentes'] else 'NO'}")
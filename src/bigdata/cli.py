@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+import importlib
+import importlib.util
+
+"""
+Punto de entrada único del proyecto. Cada subcomando importa sus módulos (y con ellos pandas,
+numpy, requests y pyarrow) solo cuando se ejecuta, de modo que:
+
+  - 'todo' corre EA1 -> EA2 -> series de tiempo -> EA3 en un solo proceso y paga la importación de pandas una vez.
+    Si la ingesta no encuentra cambios en el API (caché vigente o 304), omite las etapas siguientes
+    (con '--forzar' las ejecuta igualmente).
+  - '--check' revisa el entorno (dependencias instaladas, carpetas, archivos de entrada) sin
+    importar librerías pesadas ni crear archivos, y termina en milisegundos.
+  - 'importtime' mide con 'python -X importtime' el arranque de un módulo y falla si supera el
+    presupuesto o si importa alguna librería pesada que no debería (para detectar regresiones).
+
+Uso:
+    python src/bigdata/cli.py --check
+    python src/bigdata/cli.py todo [--forzar]
+    python src/bigdata/cli.py ingesta | limpieza | series | enriquecimiento
+    python src/bigdata/cli.py pipeline --hasta operaciones_de_limpieza
+    python src/bigdata/cli.py importtime --modulo cli --limite-ms 50
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Etapas: subcomando -> módulo cuya función main() la ejecuta
+ETAPAS = {
+    "ingesta": "ingestion",
+    "limpieza": "cleaning",
+    "series": "series_tiempo",
+    "enriquecimiento": "enrichment",
+}
+
+# Etapas que se Omiten en 'todo' Cuando la Ingesta no Encuentra Cambios en el Origen
+ETAPAS_DEPENDIENTES = ("limpieza", "series", "enriquecimiento")
+
+# Dependencias que Revisa --check sin Importarlas: módulo -> obligatoria
+DEPENDENCIAS = {
+    "pandas": True,
+    "numpy": True,
+    "requests": True,
+    "openpyxl": True,
+    "pyarrow": False,
+    "lxml": False,
+}
+
+# Carpetas de Salida (Relativas a src/bigdata)
+CARPETAS_SALIDA = (
+    os.path.join("static", "db"),
+    os.path.join("static", "xlsx"),
+    os.path.join("static", "auditoria"),
+)
+
+# Archivos de Entrada que Necesita Cada Etapa (Relativos a src/bigdata)
+ARCHIVOS_ENTRADA = {
+    "enriquecimiento": (os.path.join("static", "xlsx", "Delitos_Informaticos.csv"),),
+}
+
+# Librerías que el Arranque de la Línea de Comandos no Debe Importar
+MODULOS_PESADOS = ("pandas", "numpy", "requests", "pyarrow", "openpyxl")
+
+# Presupuesto de Importación en Milisegundos (Ajustable con PRESUPUESTO_IMPORTACION_MS)
+PRESUPUESTO_IMPORTACION_MS = float(os.environ.get("PRESUPUESTO_IMPORTACION_MS", "50"))
+
+
+# 1. Verificación del Entorno
+
+def _carpeta_escribible(carpeta):
+    """Indicamos si la carpeta existe y se puede escribir o, si no existe, si se puede crear."""
+    while not os.path.exists(carpeta):
+        padre = os.path.dirname(carpeta)
+        if padre == carpeta:
+            return False
+        carpeta = padre
+    return os.access(carpeta, os.W_OK)
+
+
+def verificar_entorno(etapas=tuple(ETAPAS)):
+    """
+    Revisamos el entorno sin importar las dependencias (importlib.util.find_spec) ni crear archivos.
+    Los archivos de entrada y el origen del API solo se revisan para las etapas indicadas.
+
+    Retorna:
+        Lista de tuplas (comprobación, estado, detalle) con estado 'OK', 'AVISO' o 'ERROR'.
+    """
+    resultados = [(
+        "python",
+        "OK" if sys.version_info >= (3, 9) else "ERROR",
+        sys.version.split()[0],
+    )]
+    for modulo, obligatoria in DEPENDENCIAS.items():
+        instalada = importlib.util.find_spec(modulo) is not None
+        estado = "OK" if instalada else ("ERROR" if obligatoria else "AVISO")
+        resultados.append((modulo, estado, "instalada" if instalada else "no instalada"))
+    for carpeta in CARPETAS_SALIDA:
+        ruta = os.path.join(BASE_DIR, carpeta)
+        escribible = _carpeta_escribible(ruta)
+        detalle = ("existe" if os.path.isdir(ruta) else "se creará al escribir") if escribible else "sin permiso de escritura"
+        resultados.append((carpeta, "OK" if escribible else "ERROR", detalle))
+    for etapa in etapas:
+        for archivo in ARCHIVOS_ENTRADA.get(etapa, ()):
+            existe = os.path.isfile(os.path.join(BASE_DIR, archivo))
+            resultados.append((archivo, "OK" if existe else "ERROR", "existe" if existe else "no existe"))
+    url_api = os.environ.get("URL_API_COVID")
+    if "ingesta" in etapas and url_api and not url_api.startswith(("http://", "https://")):
+        # Misma regla que ingestion._ruta_local: file:// o ruta relativa a src/bigdata
+        ruta = url_api[len("file://"):] if url_api.startswith("file://") else url_api
+        existe = os.path.isfile(ruta if os.path.isabs(ruta) else os.path.join(BASE_DIR, ruta))
+        resultados.append(("URL_API_COVID", "OK" if existe else "ERROR", url_api))
+    return resultados
+
+
+# 2. Presupuesto de Importación
+
+def medir_importacion(modulo, repeticiones=3):
+    """
+    Importamos 'modulo' en un intérprete nuevo con -X importtime (la mejor de 'repeticiones').
+
+    Retorna:
+        Tupla (milisegundos acumulados del módulo, diccionario paquete -> milisegundos acumulados
+        de cada paquete de primer nivel que importa el módulo, sin contar el arranque del intérprete).
+    """
+    mejor, paquetes_mejor = None, {}
+    entorno = dict(os.environ, PYTHONPATH=BASE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            cwd=BASE_DIR, env=entorno, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise RuntimeError(f"No se Pudo Importar '{modulo}':\n{proceso.stderr.strip().splitlines()[-1]}")
+        # Cada línea es "import time: propio | acumulado | <sangría>nombre" y cada módulo aparece
+        # después de los que importa, con más sangría; recorremos hacia atrás desde 'modulo'
+        lineas = []
+        for linea in proceso.stderr.splitlines():
+            partes = linea[len("import time:"):].split("|") if linea.startswith("import time:") else []
+            if len(partes) == 3 and partes[1].strip().isdigit():
+                nombre = partes[2].rstrip()
+                lineas.append((len(nombre) - len(nombre.lstrip()), nombre.strip(), int(partes[1]) / 1000))
+        total, paquetes = None, {}
+        for posicion in range(len(lineas) - 1, -1, -1):
+            sangria, nombre, acumulado = lineas[posicion]
+            if nombre != modulo:
+                continue
+            total = acumulado
+            for sangria_hijo, hijo, acumulado_hijo in reversed(lineas[:posicion]):
+                if sangria_hijo <= sangria:
+                    break
+                paquete = hijo.split(".")[0]
+                paquetes[paquete] = max(paquetes.get(paquete, 0), acumulado_hijo)
+            break
+        if total is not None and (mejor is None or total < mejor):
+            mejor, paquetes_mejor = total, paquetes
+    return mejor, paquetes_mejor
+
+
+def verificar_importacion(modulo="cli", limite_ms=None, repeticiones=3):
+    """
+    Comprobamos que importar 'modulo' no supere el presupuesto ni importe librerías pesadas.
+
+    Retorna:
+        Tupla (cumple, milisegundos, librerías pesadas importadas, paquetes más costosos).
+    """
+    limite_ms = PRESUPUESTO_IMPORTACION_MS if limite_ms is None else limite_ms
+    milisegundos, paquetes = medir_importacion(modulo, repeticiones)
+    pesados = [paquete for paquete in MODULOS_PESADOS if paquete in paquetes]
+    costosos = sorted(paquetes.items(), key=lambda par: par[1], reverse=True)[:5]
+    return milisegundos <= limite_ms and not pesados, milisegundos, pesados, costosos
+
+
+# 3. Subcomandos
+
+def ejecutar_etapas(etapas, forzar=False):
+    """
+    Ejecutamos las etapas indicadas en este mismo proceso, importando cada módulo al llegar a ella.
+    Si la ingesta devuelve False (el origen no cambió), las etapas de ETAPAS_DEPENDIENTES se omiten,
+    salvo con 'forzar'.
+    """
+    origen_sin_cambios = False
+    for etapa in etapas:
+        if origen_sin_cambios and etapa in ETAPAS_DEPENDIENTES:
+            print(f"Etapa '{etapa}' Omitida: el Origen no Cambió desde la Última Ejecución\n")
+            continue
+        inicio = time.perf_counter()
+        resultado = importlib.import_module(ETAPAS[etapa]).main()
+        print(f"Etapa '{etapa}' Completada en {time.perf_counter() - inicio:.2f} s\n")
+        if etapa == "ingesta" and resultado is False and not forzar:
+            origen_sin_cambios = True
+
+
+def _imprimir_verificacion(resultados, inicio):
+    """Mostramos el resultado de verificar_entorno y cuánto tardó desde el arranque."""
+    print("=== VERIFICACIÓN DEL ENTORNO ===")
+    for comprobacion, estado, detalle in resultados:
+        print(f"  {estado:<6} {comprobacion:<45} {detalle}")
+    print(f"Verificación Completada en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+def main(argumentos=None):
+    """Punto de entrada de la línea de comandos (bigdata)."""
+    inicio = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Flujo de datos COVID-19 (EA1, EA2 y EA3).")
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Revisa el entorno y muestra lo que se ejecutaría, sin importar librerías pesadas ni escribir archivos.",
+    )
+    subcomandos = parser.add_subparsers(dest="comando")
+    for etapa, modulo in ETAPAS.items():
+        subcomandos.add_parser(etapa, help=f"Ejecuta {modulo}.py.")
+    todo = subcomandos.add_parser("todo", help="Ejecuta ingesta, limpieza, series de tiempo y enriquecimiento en un solo proceso.")
+    todo.add_argument(
+        "--forzar", action="store_true", help="Ejecuta todas las etapas aunque la ingesta no encuentre cambios en el origen.",
+    )
+    subcomandos.add_parser("pipeline", help="Ejecuta el grafo con caché (los demás argumentos pasan a pipeline.py).")
+    importacion = subcomandos.add_parser("importtime", help="Mide el tiempo de importación de un módulo.")
+    importacion.add_argument("--modulo", default="cli")
+    importacion.add_argument("--limite-ms", type=float, default=PRESUPUESTO_IMPORTACION_MS)
+    importacion.add_argument("--repeticiones", type=int, default=3)
+    args, resto = parser.parse_known_args(argumentos)
+    if resto and args.comando != "pipeline":
+        parser.error(f"Argumentos no reconocidos: {' '.join(resto)}")
+
+    if args.comando == "importtime":
+        cumple, milisegundos, pesados, costosos = verificar_importacion(args.modulo, args.limite_ms, args.repeticiones)
+        print(f"=== TIEMPO DE IMPORTACIÓN DE '{args.modulo}' ===")
+        print(f"  Total: {milisegundos:.1f} ms (Presupuesto: {args.limite_ms:.0f} ms)")
+        for paquete, tiempo in costosos:
+            print(f"  {paquete:<30} {tiempo:>8.1f} ms")
+        if pesados:
+            print(f"  Librerías Pesadas Importadas al Arrancar: {', '.join(pesados)}")
+        print("OK" if cumple else "ERROR: Arranque Fuera del Presupuesto")
+        return 0 if cumple else 1
+
+    etapas = [args.comando] if args.comando in ETAPAS else list(ETAPAS)
+    if args.check:
+        resultados = verificar_entorno(etapas)
+        _imprimir_verificacion(resultados, inicio)
+        if args.comando == "pipeline":
+            print(f"Se Ejecutaría: pipeline.py {' '.join(resto)}".rstrip())
+        else:
+            print(f"Se Ejecutaría: {' -> '.join(ETAPAS[etapa] + '.py' for etapa in etapas)}")
+        return 1 if any(estado == "ERROR" for _, estado, _ in resultados) else 0
+
+    if args.comando is None:
+        parser.print_help()
+        return 0
+    if args.comando == "pipeline":
+        return importlib.import_module("pipeline").main(resto)
+    ejecutar_etapas(etapas, forzar=getattr(args, "forzar", False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,17 @@
 import os
+import time
 import sqlite3
+import numpy as np
 import pandas as pd
-import requests
+from pandas.api.types import union_categoricals
+import socrata
+import almacenamiento
+import esquema
+import http_cache
+import municipios
+import planificador
+import metricas
+import perfilador
 from datetime import datetime
 
 # Rutas y Configuraciones
@@ -19,105 +29,245 @@ RUTA_DATOS_ENRIQUECIDOS = os.path.join(BASE_DIR, "static", "xlsx", "datos_enriqu
 # Ruta Donde se Guardará el Reporte de Enriquecimiento
 RUTA_REPORTE_ENRIQUECIMIENTO = os.path.join(BASE_DIR, "static", "auditoria", "reporte_enriquecimiento.txt")
 
+# Esquema del CSV de Delitos Informáticos: columna original -> (nombre unificado, tipo)
+ESQUEMA_DELITOS_INFORMATICOS = {
+    'CRIMINALIDAD': ('criminalidad', 'category'),
+    'ES_ARCHIVO': ('es_archivo', 'category'),
+    'ES_PRECLUSIÓN': ('es_preclusion', 'category'),
+    'ESTADO': ('estado', 'category'),
+    'ETAPA_CASO': ('etapa_caso', 'category'),
+    'LEY': ('ley', 'category'),
+    'PAÍS_HECHO': ('pais_hecho', 'category'),
+    'DEPARTAMENTO_HECHO': ('departamento_hecho', 'category'),
+    'MUNICIPIO_HECHO': ('municipio', 'object'),  # clave de unión
+    'SECCIONAL': ('seccional', 'category'),
+    'AÑO_HECHOS': ('a_o_hechos', 'Int16'),
+    'AÑO_ENTRADA': ('a_o_entrada', 'Int16'),
+    'AÑO_DENUNCIA': ('a_o_denuncia', 'Int16'),
+    'DELITO': ('delito', 'category'),
+    'GRUPO_DELITO': ('grupo_delito', 'category'),
+    'CONSUMADO': ('consumado', 'category'),
+    'TOTAL_PROCESOS': ('total_procesos', 'Int32'),
+}
+
+# Columnas del CSV que Usa el Enriquecimiento (Vacío para Leer las 17)
+COLUMNAS_DELITOS_USADAS = ['MUNICIPIO_HECHO', 'AÑO_HECHOS', 'GRUPO_DELITO', 'TOTAL_PROCESOS']
+
+# Motor de Lectura del CSV ('c' o 'pyarrow', que Lee en Paralelo)
+MOTOR_CSV_DELITOS = os.environ.get("MOTOR_CSV_DELITOS", "c")
+
+# Registros por Bloque al Leer Exportaciones Grandes (0 = Lectura Completa)
+TAMANO_BLOQUE_DELITOS = int(os.environ.get("TAMANO_BLOQUE_DELITOS", "0"))
+
+# Columnas por las que se Agregan los Delitos Informáticos antes de la Unión
+CLAVES_AGREGACION_DELITOS = ["id_municipio", "a_o_hechos", "grupo_delito"]
+
+# Columnas de Bovinos que se Suman por Año (una Vez por Municipio)
+COLUMNAS_BOVINOS_ANUALES = [
+    "total_machos", "total_hembras", "total_bovinos",
+    "total_pastos", "pasto_corte", "pasto_natural", "pasto_mejorado",
+]
+
+# Tabla con la Huella de Cada Periodo (YYYYMM) Enriquecido
+TABLA_HUELLAS_PERIODOS = "enrichment_periodos"
+
+# Recalculamos Solo los Periodos Cuyas Entradas Cambiaron (Desactivar con ENRIQUECIMIENTO_INCREMENTAL=0)
+ENRIQUECIMIENTO_INCREMENTAL = os.environ.get("ENRIQUECIMIENTO_INCREMENTAL", "1") == "1"
+
 # URL de la API del Inventario Anual de Bovinos en Antioquia 
 URL_INVENTARIO_BOVINOS_API = "https://www.datos.gov.co/resource/fy9z-8zxt.json"
 
-# Creamos los directorios si no existen
-os.makedirs(os.path.dirname(RUTA_DATOS_ENRIQUECIDOS), exist_ok=True)
-os.makedirs(os.path.dirname(RUTA_REPORTE_ENRIQUECIMIENTO), exist_ok=True)
-
 # 1. Lectura de Datos
 
-def cargar_dataset_limpio_desde_bd():
+@metricas.instrumentar
+def cargar_dataset_limpio_desde_bd(columnas=None, anios=None):
     """
-    Cargamos el dataset limpio (covid_data_cleaned) generado en la Actividad 2,
-    almacenado en la base de datos (ingestion.db).
+    Cargamos el dataset limpio (covid_data_cleaned) generado en la Actividad 2.
+    Si existe la capa Parquet 'limpia' leemos de ella solo las columnas y años pedidos;
+    en caso contrario lo leemos de la base de datos (ingestion.db).
     """
-    print("Cargando dataset base limpio desde la base de datos (covid_data_cleaned)...")
-    conexion = sqlite3.connect(RUTA_BD)
-    df_limpio = pd.read_sql_query("SELECT * FROM covid_data_cleaned", conexion)
-    conexion.close()
+    if almacenamiento.capa_disponible("limpia"):
+        print("Cargando dataset base limpio desde la capa Parquet (covid_data_cleaned)...")
+        df_limpio = almacenamiento.leer_capa("limpia", columnas=columnas, anios=anios)
+    else:
+        print("Cargando dataset base limpio desde la base de datos (covid_data_cleaned)...")
+        seleccion = ", ".join(f'"{columna}"' for columna in columnas) if columnas else "*"
+        if anios is not None:
+            # Rangos de fecha por año: usan el índice de 'fecha' (ver esquema.py)
+            consulta = esquema.consulta_por_anios("covid_data_cleaned", anios, seleccion)
+        else:
+            consulta = f"SELECT {seleccion} FROM covid_data_cleaned"
+        conexion = sqlite3.connect(RUTA_BD)
+        df_limpio = pd.read_sql_query(consulta, conexion)
+        conexion.close()
     print(f"Dataset limpio cargado: {len(df_limpio)} registros.")
     return df_limpio
 
-def leer_delitos_informaticos_csv():
+def _memoria_mb(df):
+    """Calculamos la memoria ocupada por un DataFrame en MB (incluyendo el contenido de los objetos)."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def _concatenar_bloques(bloques):
+    """Unimos los bloques leídos conservando las columnas categóricas (con la unión de sus categorías)."""
+    bloques = list(bloques)
+    if not bloques:
+        return pd.DataFrame()
+    categoricas = [col for col in bloques[0].columns if isinstance(bloques[0][col].dtype, pd.CategoricalDtype)]
+    df = pd.concat(bloques, ignore_index=True)
+    for col in categoricas:
+        df[col] = union_categoricals([bloque[col] for bloque in bloques])
+    return df
+
+@metricas.instrumentar
+def leer_delitos_informaticos_csv(columnas=COLUMNAS_DELITOS_USADAS, motor=None, tamano_bloque=None):
     """
-    Leemos el archivo CSV de Delitos Informáticos y renombramos columnas para unificar criterios.
-    Se renombra 'MUNICIPIO_HECHO' a 'municipio' para poder unir con la fuente de Bovinos.
+    Leemos el archivo CSV de Delitos Informáticos con el esquema declarado en
+    ESQUEMA_DELITOS_INFORMATICOS: solo se leen las columnas indicadas, cada una con un tipo
+    compacto (categorías para los textos repetidos, enteros pequeños para años y procesos),
+    y se renombran para unificar criterios ('MUNICIPIO_HECHO' pasa a 'municipio').
+
+    Parámetros:
+        columnas: Columnas originales a leer (None o vacío para las 17 del esquema).
+        motor: 'c' o 'pyarrow' (por defecto MOTOR_CSV_DELITOS).
+        tamano_bloque: Registros por bloque para exportaciones grandes (por defecto TAMANO_BLOQUE_DELITOS).
     """
     print("Leyendo archivo CSV de Delitos Informáticos...")
-    df_informaticos = pd.read_csv(RUTA_DELITOS_INFORMATICOS_CSV)
-    print(f"Delitos Informáticos leídos: {len(df_informaticos)} registros.")
+    columnas = list(columnas or ESQUEMA_DELITOS_INFORMATICOS)
+    motor = motor or MOTOR_CSV_DELITOS
+    tamano_bloque = TAMANO_BLOQUE_DELITOS if tamano_bloque is None else tamano_bloque
+    tipos = {col: ESQUEMA_DELITOS_INFORMATICOS[col][1] for col in columnas}
+
+    inicio = time.perf_counter()
+    if tamano_bloque > 0:
+        # El motor pyarrow no admite lectura por bloques, así que usamos el motor C
+        with pd.read_csv(RUTA_DELITOS_INFORMATICOS_CSV, usecols=columnas, dtype=tipos, chunksize=tamano_bloque) as lector:
+            df_informaticos = _concatenar_bloques(lector)
+    else:
+        df_informaticos = pd.read_csv(RUTA_DELITOS_INFORMATICOS_CSV, usecols=columnas, dtype=tipos, engine=motor)
+    tiempo_lectura = time.perf_counter() - inicio
 
     # Renombramos columnas a minúsculas y renombramos 'MUNICIPIO_HECHO' a 'municipio'
-    df_informaticos.rename(columns={
-        'CRIMINALIDAD': 'criminalidad',
-        'ES_ARCHIVO': 'es_archivo',
-        'ES_PRECLUSIÓN': 'es_preclusion',
-        'ESTADO': 'estado',
-        'ETAPA_CASO': 'etapa_caso',
-        'LEY': 'ley',
-        'PAÍS_HECHO': 'pais_hecho',
-        'DEPARTAMENTO_HECHO': 'departamento_hecho',
-        'MUNICIPIO_HECHO': 'municipio',  # clave de unión 
-        'SECCIONAL': 'seccional',
-        'AÑO_HECHOS': 'a_o_hechos',
-        'AÑO_ENTRADA': 'a_o_entrada',
-        'AÑO_DENUNCIA': 'a_o_denuncia',
-        'DELITO': 'delito',
-        'GRUPO_DELITO': 'grupo_delito',
-        'CONSUMADO': 'consumado',
-        'TOTAL_PROCESOS': 'total_procesos'
-    }, inplace=True)
-    
-    # Eliminamos espacios extra en la clave de unión
+    df_informaticos.rename(
+        columns={col: ESQUEMA_DELITOS_INFORMATICOS[col][0] for col in columnas}, inplace=True
+    )
+    df_informaticos.attrs["lectura"] = {"tiempo_s": tiempo_lectura, "memoria_mb": _memoria_mb(df_informaticos)}
+    print(
+        f"Delitos Informáticos leídos: {len(df_informaticos)} registros, {len(columnas)} columnas "
+        f"en {tiempo_lectura:.3f} s ({df_informaticos.attrs['lectura']['memoria_mb']:.2f} MB, motor {motor})."
+    )
+
+    # Eliminamos espacios extra (la clave 'id_municipio' se asigna después, en 'asignar_municipios')
     df_informaticos['municipio'] = df_informaticos['municipio'].str.strip()
     return df_informaticos
 
+def preparar_inventario_bovinos(datos_json):
+    """
+    Convertimos los registros JSON del Inventario Anual de Bovinos en un DataFrame: se renombra
+    'MUNICIPIO' a 'municipio' y 'Total Pastos (ha)' a 'total_pastos', el año pasa a entero y los
+    valores nulos de las columnas de pasto (pasto_mejorado, pasto_natural, pasto_corte y total_pastos)
+    se rellenan con la mediana.
+    """
+    df_bovinos = pd.DataFrame(datos_json)
+
+    # Renombramos 'MUNICIPIO' a 'municipio' y eliminamos espacios
+    if 'MUNICIPIO' in df_bovinos.columns:
+        df_bovinos.rename(columns={'MUNICIPIO': 'municipio'}, inplace=True)
+    if 'municipio' in df_bovinos.columns:
+        df_bovinos['municipio'] = df_bovinos['municipio'].astype(str).str.strip()
+
+    # El año llega como texto desde la API; lo convertimos para unir por municipio y año
+    if 'anio' in df_bovinos.columns:
+        df_bovinos['anio'] = pd.to_numeric(df_bovinos['anio'], errors="coerce").astype("Int64")
+
+    # Renombramos 'Total Pastos (ha)' a 'total_pastos' para facilitar el manejo
+    if 'Total Pastos (ha)' in df_bovinos.columns:
+        df_bovinos.rename(columns={'Total Pastos (ha)': 'total_pastos'}, inplace=True)
+
+    # Convertimos a numérico y rellenamos nulos con la mediana en las columnas de pasto y total_pastos
+    columnas_imputar = ["pasto_mejorado", "pasto_natural", "pasto_corte", "total_pastos"]
+    for col in columnas_imputar:
+        if col in df_bovinos.columns:
+            df_bovinos[col] = pd.to_numeric(df_bovinos[col], errors="coerce")
+            mediana = df_bovinos[col].median()
+            df_bovinos[col] = df_bovinos[col].fillna(mediana)
+
+    return df_bovinos
+
+@metricas.instrumentar
 def leer_inventario_bovinos_api():
     """
-    Leemos la API JSON del Inventario Anual de Bovinos en Antioquia.
-    Devolvemos un DataFrame con los datos y rellenamos los valores nulos en
-    las columnas de pasto (pasto_mejorado, pasto_natural, pasto_corte y en Total Pastos)
-    usando la mediana. Se renombra 'MUNICIPIO' a 'municipio' y 'Total Pastos (ha)' a 'total_pastos'.
+    Leemos la API JSON del Inventario Anual de Bovinos en Antioquia y la convertimos en
+    DataFrame con 'preparar_inventario_bovinos'.
     """
     print("Consultando API de Inventario Anual de Bovinos en Antioquia...")
     try:
-        respuesta = requests.get(URL_INVENTARIO_BOVINOS_API)
-        respuesta.raise_for_status()
-        datos_json = respuesta.json()
-        df_bovinos = pd.DataFrame(datos_json)
-        print(f"Inventario Bovinos desde API: {len(df_bovinos)} registros.\n")
-
-        # Renombramos 'MUNICIPIO' a 'municipio' y eliminamos espacios
-        if 'MUNICIPIO' in df_bovinos.columns:
-            df_bovinos.rename(columns={'MUNICIPIO': 'municipio'}, inplace=True)
-        if 'municipio' in df_bovinos.columns:
-            df_bovinos['municipio'] = df_bovinos['municipio'].astype(str).str.strip()
-
-        # Renombramos 'Total Pastos (ha)' a 'total_pastos' para facilitar el manejo
-        if 'Total Pastos (ha)' in df_bovinos.columns:
-            df_bovinos.rename(columns={'Total Pastos (ha)': 'total_pastos'}, inplace=True)
-
-        # Convertimos a numérico y rellenamos nulos con la mediana en las columnas de pasto y total_pastos
-        columnas_imputar = ["pasto_mejorado", "pasto_natural", "pasto_corte", "total_pastos"]
-        for col in columnas_imputar:
-            if col in df_bovinos.columns:
-                df_bovinos[col] = pd.to_numeric(df_bovinos[col], errors="coerce")
-                mediana = df_bovinos[col].median()
-                df_bovinos[col] = df_bovinos[col].fillna(mediana)
-
-        return df_bovinos
+        # Paginamos con $limit/$offset en Hilos Concurrentes; Cada Página Pasa por la Caché HTTP
+        datos_json = socrata.descargar_todo(URL_INVENTARIO_BOVINOS_API)
+        print(http_cache.resumen_estadisticas())
+        print(f"Inventario Bovinos desde API: {len(datos_json)} registros.\n")
+        return preparar_inventario_bovinos(datos_json)
     except Exception as e:
         print(f"Error al leer la API de Inventario Bovinos: {e}")
         return pd.DataFrame()
 
 # 2. Integración de Fuentes Externas mediante Merge
 
+@metricas.instrumentar
+def asignar_municipios(df_info, df_bovinos):
+    """
+    Registramos en 'dim_municipio' los municipios de ambas fuentes y les asignamos 'id_municipio'.
+    Las lecturas no escriben en la base de datos (pueden correr en paralelo con la ingesta); esta es
+    la única escritura de la dimensión y se hace una sola vez, con las dos fuentes juntas.
+    """
+    municipios.construir_dimension(RUTA_BD, df_info, df_bovinos)
+    return df_info, df_bovinos
+
+@metricas.instrumentar
+def agregar_delitos_informaticos(df_info):
+    """
+    Agregamos los Delitos Informáticos por municipio, año de los hechos y grupo de delito,
+    sumando 'total_procesos' y contando los registros originales ('registros_delitos').
+    Así cada municipio y año aporta pocas filas a la unión con el Inventario Bovinos
+    (una por municipio y año) en lugar del producto cruzado de ambos conjuntos.
+
+    Retorna:
+        DataFrame agregado y diccionario con registros y memoria antes y después.
+    """
+    if municipios.COLUMNA_ID not in df_info.columns:
+        municipios.construir_dimension(RUTA_BD, df_info)
+
+    df_agregado = (
+        df_info.groupby(CLAVES_AGREGACION_DELITOS, observed=True, sort=True)
+        .agg(
+            municipio=("municipio", "first"),
+            total_procesos=("total_procesos", "sum"),
+            registros_delitos=("total_procesos", "size"),
+        )
+        .reset_index()
+    )
+    detalles_agregacion = {
+        "registros_antes": len(df_info),
+        "registros_despues": len(df_agregado),
+        "memoria_antes_mb": _memoria_mb(df_info),
+        "memoria_despues_mb": _memoria_mb(df_agregado),
+    }
+    print(
+        f"Delitos Informáticos agregados: {detalles_agregacion['registros_antes']} -> "
+        f"{detalles_agregacion['registros_despues']} registros "
+        f"({detalles_agregacion['memoria_antes_mb']:.2f} MB -> {detalles_agregacion['memoria_despues_mb']:.2f} MB)"
+    )
+    return df_agregado, detalles_agregacion
+
+@metricas.instrumentar
 def integrar_fuentes_externas(df_info, df_bovinos):
     """
-    Integramos los DataFrames de Delitos Informáticos e Inventario Bovinos utilizando merge
-    sobre la columna 'municipio'. Se realiza un inner join para conservar solo los registros coincidentes.
+    Integramos los Delitos Informáticos (agregados por municipio, año y grupo de delito) con el
+    Inventario Bovinos utilizando merge sobre la clave entera 'id_municipio' de la dimensión de
+    municipios (nombres normalizados sin tildes ni mayúsculas) y el año ('a_o_hechos' = 'anio').
+    Se realiza un inner join para conservar solo los registros coincidentes.
+
+    Retorna:
+        DataFrame integrado y diccionario con la tasa de coincidencia y el tiempo de la unión.
     """
     # Verificamos que ambas fuentes tengan la columna 'municipio'
     if 'municipio' not in df_info.columns:
@@ -125,11 +275,35 @@ def integrar_fuentes_externas(df_info, df_bovinos):
     if 'municipio' not in df_bovinos.columns:
         raise KeyError("El DataFrame de Inventario Bovinos no contiene la columna 'municipio'")
     
-    # Realizamos el merge entre los dos DataFrames externos
-    df_externos = pd.merge(df_info, df_bovinos, on="municipio", how="inner")
-    return df_externos
-
-def generar_reporte_enriquecimiento(df_base, df_info, df_bovinos, df_externos, df_final):
+    # Asignamos la clave de la dimensión a las fuentes que aún no la tengan
+    faltantes = [df for df in (df_info, df_bovinos) if municipios.COLUMNA_ID not in df.columns]
+    if faltantes:
+        municipios.construir_dimension(RUTA_BD, *faltantes)
+
+    detalles_union = {
+        "coincidencia_delitos": municipios.tasa_coincidencia(df_info, df_bovinos),
+        "coincidencia_bovinos": municipios.tasa_coincidencia(df_bovinos, df_info),
+    }
+
+    # Realizamos el merge sobre el entero y el año; el nombre se conserva tal como llega en Delitos Informáticos
+    inicio = time.perf_counter()
+    df_externos = pd.merge(
+        df_info[df_info[municipios.COLUMNA_ID] >= 0].astype({"a_o_hechos": "Int64"}),
+        df_bovinos.drop(columns=["municipio"]),
+        left_on=[municipios.COLUMNA_ID, "a_o_hechos"],
+        right_on=[municipios.COLUMNA_ID, "anio"],
+        how="inner",
+    )
+    detalles_union["tiempo_union_s"] = time.perf_counter() - inicio
+    print(
+        f"Unión por id_municipio y año: {len(df_externos)} registros en {detalles_union['tiempo_union_s']:.3f} s "
+        f"(Coincidencia Delitos {detalles_union['coincidencia_delitos']:.1f}%, "
+        f"Bovinos {detalles_union['coincidencia_bovinos']:.1f}%)"
+    )
+    return df_externos, detalles_union
+
+def generar_reporte_enriquecimiento(df_base, df_info, df_bovinos, df_externos, df_final, detalles_union=None,
+                                    detalles_agregacion=None, detalles_periodos=None):
     """
     Generamos un reporte de auditoría que documenta:
       - Cantidad de registros y columnas en cada dataset original.
@@ -149,31 +323,251 @@ def generar_reporte_enriquecimiento(df_base, df_info, df_bovinos, df_externos, d
     reporte.append("=== Delitos Informáticos (CSV) ===")
     reporte.append(f"  - Registros: {len(df_info)}")
     reporte.append(f"  - Columnas: {list(df_info.columns)}")
+    if "lectura" in df_info.attrs:
+        reporte.append(f"  - Tiempo de lectura: {df_info.attrs['lectura']['tiempo_s']:.3f} s")
+        reporte.append(f"  - Memoria: {df_info.attrs['lectura']['memoria_mb']:.2f} MB")
     reporte.append("")
 
+    if detalles_agregacion:
+        reporte.append("=== Delitos Informáticos Agregados (municipio, año de los hechos y grupo de delito) ===")
+        reporte.append(f"  - Registros: {detalles_agregacion['registros_antes']} -> {detalles_agregacion['registros_despues']}")
+        reporte.append(f"  - Memoria: {detalles_agregacion['memoria_antes_mb']:.2f} MB -> {detalles_agregacion['memoria_despues_mb']:.2f} MB")
+        reporte.append("")
+
     reporte.append("=== Inventario Anual de Bovinos (API) ===")
     reporte.append(f"  - Registros: {len(df_bovinos)}")
     reporte.append(f"  - Columnas: {list(df_bovinos.columns)}")
     reporte.append("")
 
-    reporte.append("=== Fuentes Externas Integradas (Merge por 'municipio') ===")
+    reporte.append("=== Fuentes Externas Integradas (Merge por 'id_municipio' y año) ===")
     reporte.append(f"  - Registros: {len(df_externos)}")
     reporte.append(f"  - Columnas: {list(df_externos.columns)}")
+    if detalles_union:
+        reporte.append(f"  - Coincidencia Delitos Informáticos: {detalles_union['coincidencia_delitos']:.1f}% de los registros")
+        reporte.append(f"  - Coincidencia Inventario Bovinos: {detalles_union['coincidencia_bovinos']:.1f}% de los registros")
+        reporte.append(f"  - Tiempo de la unión: {detalles_union['tiempo_union_s']:.3f} s")
     reporte.append("")
 
     reporte.append("=== Dataset Final Enriquecido ===")
     reporte.append(f"  - Registros (filas): {len(df_final)}")
     reporte.append(f"  - Columnas totales: {list(df_final.columns)}")
+    if detalles_periodos:
+        reporte.append(f"  - Años de las fuentes externas: {detalles_periodos['anios_externos']}")
+        reporte.append(
+            f"  - Periodos (YYYYMM) recalculados: {detalles_periodos['periodos_recalculados']} de {detalles_periodos['periodos_total']}"
+        )
     reporte.append("")
 
     reporte.append("Observaciones:")
-    reporte.append("  - Se integraron las fuentes externas (Delitos Informáticos e Inventario Bovinos) usando merge sobre la columna 'municipio'.")
-    reporte.append("  - El dataset base (COVID limpio) no posee clave geográfica, por lo que se realizó una concatenación horizontal con una muestra representativa (444 filas) del dataset resultante de la integración de las fuentes externas.")
+    reporte.append("  - Se integraron las fuentes externas (Delitos Informáticos e Inventario Bovinos) usando merge sobre la clave entera 'id_municipio' de la dimensión de municipios (tabla 'dim_municipio'), que normaliza mayúsculas, tildes y espacios de los nombres, y el año de los hechos contra el año del inventario.")
+    reporte.append("  - Antes de la unión, los Delitos Informáticos se agregaron por municipio, año de los hechos y grupo de delito (suma de 'total_procesos'), evitando el producto cruzado con el inventario.")
+    reporte.append("  - El dataset base (COVID limpio) no posee clave geográfica, por lo que se unió por tiempo: cada fecha toma, mediante merge_asof, el resumen anual de las fuentes externas del último año disponible que no sea posterior a ella (columna 'anio_fuentes_externas').")
+    reporte.append("  - Solo se recalculan los periodos (YYYYMM) cuyas filas base o fila anual externa cambiaron; sus huellas se guardan en la tabla 'enrichment_periodos'.")
     reporte.append("  - Las columnas 'pasto_mejorado', 'pasto_natural', 'pasto_corte' y 'total_pastos' fueron convertidas a numérico y sus valores nulos imputados con la mediana.")
     
     return "\n".join(reporte)
 
-# 3. Función Principal
+# 3. Unión Temporal con el Dataset Base
+
+def resumir_fuentes_externas_por_anio(df_externos):
+    """
+    Resumimos las fuentes externas integradas en una fila por año ('anio'), ordenada por año:
+    procesos y registros de delitos, municipios con datos y los totales de bovinos y pastos
+    (estos últimos una sola vez por municipio, aunque tenga varios grupos de delito).
+    """
+    if df_externos.empty:
+        return pd.DataFrame(columns=["anio", "inicio_anio"])
+    df_externos = df_externos.dropna(subset=["anio"])
+    anual = df_externos.groupby("anio", sort=True).agg(
+        total_procesos=("total_procesos", "sum"),
+        registros_delitos=("registros_delitos", "sum"),
+        municipios_con_datos=(municipios.COLUMNA_ID, "nunique"),
+    )
+    columnas_bovinos = [col for col in COLUMNAS_BOVINOS_ANUALES if col in df_externos.columns]
+    if columnas_bovinos:
+        por_municipio = df_externos.drop_duplicates([municipios.COLUMNA_ID, "anio"])
+        bovinos = por_municipio[columnas_bovinos].apply(pd.to_numeric, errors="coerce")
+        anual = anual.join(bovinos.groupby(por_municipio["anio"]).sum())
+    anual = anual.reset_index()
+    anual["anio"] = anual["anio"].astype("int64")
+    anual["inicio_anio"] = pd.to_datetime(anual["anio"].astype(str), format="%Y")
+    return anual.sort_values("inicio_anio", ignore_index=True)
+
+def preparar_dataset_base(df_base):
+    """Agregamos al dataset base la fecha como datetime y su periodo (YYYYMM), ordenado por fecha."""
+    df = df_base.copy()
+    df["fecha_dt"] = pd.to_datetime(df["fecha"].astype("Int64").astype(str), format="%Y%m%d", errors="coerce")
+    df = df[df["fecha_dt"].notna()]
+    df["periodo"] = (df["fecha"].astype("int64") // 100).astype("int32")
+    return df.sort_values("fecha_dt", ignore_index=True)
+
+def unir_por_periodo(df_base_preparado, df_anual):
+    """
+    Unimos cada día del dataset base con el resumen anual de las fuentes externas mediante
+    merge_asof: cada fecha toma el último año disponible que no sea posterior a ella.
+    Ambos lados deben venir ordenados por su clave temporal.
+    """
+    df = pd.merge_asof(
+        df_base_preparado,
+        df_anual.rename(columns={"anio": "anio_fuentes_externas"}),
+        left_on="fecha_dt",
+        right_on="inicio_anio",
+        direction="backward",
+    )
+    return df.drop(columns=["fecha_dt", "inicio_anio"])
+
+def _huella(df):
+    """Calculamos una huella estable del contenido de un DataFrame (independiente del índice)."""
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df, index=False).to_numpy().sum(dtype=np.uint64))
+
+def calcular_huellas_periodos(df_base_preparado, df_anual):
+    """
+    Calculamos la huella de las entradas de cada periodo: las filas del dataset base de ese mes
+    (sin las columnas de auditoría, que cambian en cada ejecución) y la fila anual externa que le corresponde.
+
+    Retorna:
+        Diccionario periodo (YYYYMM) -> huella en texto.
+    """
+    columnas = [col for col in df_base_preparado.columns if not col.endswith("_auditoria") and col != "fecha_dt"]
+    anios_externos = df_anual["anio"].to_numpy() if not df_anual.empty else np.array([], dtype="int64")
+    huellas_anuales = [_huella(df_anual.iloc[[i]]) for i in range(len(df_anual))]
+    huellas = {}
+    for periodo, grupo in df_base_preparado[columnas].groupby("periodo", sort=True):
+        posicion = np.searchsorted(anios_externos, periodo // 100, side="right") - 1
+        huella_externa = huellas_anuales[posicion] if posicion >= 0 else 0
+        huellas[int(periodo)] = f"{_huella(grupo):016x}-{huella_externa:016x}"
+    return huellas
+
+def _leer_huellas_guardadas(conexion):
+    """Leemos las huellas de la ejecución anterior (creando la tabla si no existe)."""
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_HUELLAS_PERIODOS} (
+            periodo INTEGER PRIMARY KEY,
+            huella TEXT NOT NULL,
+            actualizado_en TEXT
+        )
+    """)
+    return dict(conexion.execute(f"SELECT periodo, huella FROM {TABLA_HUELLAS_PERIODOS}").fetchall())
+
+def _guardar_huellas(conexion, huellas):
+    """Reemplazamos las huellas guardadas por las de la ejecución actual."""
+    ahora = datetime.now().isoformat(timespec="seconds")
+    with conexion:
+        conexion.execute(f"DELETE FROM {TABLA_HUELLAS_PERIODOS}")
+        conexion.executemany(
+            f"INSERT INTO {TABLA_HUELLAS_PERIODOS} (periodo, huella, actualizado_en) VALUES (?, ?, ?)",
+            [(periodo, huella, ahora) for periodo, huella in huellas.items()],
+        )
+        esquema.registrar_version(conexion, TABLA_HUELLAS_PERIODOS)
+
+@metricas.instrumentar
+def enriquecer_por_periodos(df_base, df_externos, conexion, incremental=None):
+    """
+    Enriquecemos el dataset base uniendo cada fecha con el resumen anual de las fuentes externas.
+    Con el modo incremental solo se recalculan los periodos (YYYYMM) cuyas entradas cambiaron
+    desde la ejecución anterior; el resto se reutiliza de la capa Parquet 'enriquecida'.
+    Las huellas nuevas no se guardan aquí sino en exportar_dataset_enriquecido, una vez escrita la capa.
+
+    Retorna:
+        DataFrame enriquecido ordenado por fecha y diccionario con los periodos recalculados
+        y las huellas de cada periodo.
+    """
+    incremental = ENRIQUECIMIENTO_INCREMENTAL if incremental is None else incremental
+    df_anual = resumir_fuentes_externas_por_anio(df_externos)
+    df_base_preparado = preparar_dataset_base(df_base)
+    huellas = calcular_huellas_periodos(df_base_preparado, df_anual)
+    anteriores = _leer_huellas_guardadas(conexion)
+
+    reutilizables = set()
+    if incremental and almacenamiento.capa_disponible("enriquecida"):
+        reutilizables = {periodo for periodo, huella in huellas.items() if anteriores.get(periodo) == huella}
+
+    df_previo = pd.DataFrame()
+    if reutilizables:
+        df_previo = almacenamiento.leer_capa("enriquecida", anios=sorted({periodo // 100 for periodo in reutilizables}))
+        if "periodo" in df_previo.columns:
+            df_previo = df_previo[df_previo["periodo"].isin(reutilizables)]
+        else:
+            reutilizables, df_previo = set(), pd.DataFrame()
+
+    df_recalculado = unir_por_periodo(
+        df_base_preparado[~df_base_preparado["periodo"].isin(reutilizables)], df_anual
+    )
+    partes = [df for df in (df_previo, df_recalculado) if not df.empty]
+    df_final = pd.concat(partes, ignore_index=True) if partes else df_recalculado
+    # Ordenamos por fecha (y por huella de fila para que los días repetidos queden siempre igual)
+    orden = ["fecha", "hash"] if "hash" in df_final.columns else ["fecha"]
+    df_final = df_final.sort_values(orden, kind="mergesort", ignore_index=True)
+
+    detalles_periodos = {
+        "periodos_total": len(huellas),
+        "periodos_recalculados": len(huellas) - len(reutilizables),
+        "anios_externos": df_anual["anio"].tolist() if not df_anual.empty else [],
+        "huellas": huellas,
+    }
+    print(
+        f"Unión temporal: {len(df_final)} registros; {detalles_periodos['periodos_recalculados']} de "
+        f"{detalles_periodos['periodos_total']} periodos recalculados."
+    )
+    return df_final, detalles_periodos
+
+@metricas.instrumentar
+def exportar_dataset_enriquecido(df_final, huellas=None):
+    """
+    Guardamos el dataset final enriquecido en la capa Parquet 'enriquecida' y, opcionalmente, en CSV.
+    Si se reciben las huellas de los periodos (ver enriquecer_por_periodos), las anteriores se borran
+    antes de escribir la capa y las nuevas se guardan después: si la escritura falla, la siguiente
+    ejecución no reutiliza periodos de una capa que no corresponde a sus huellas.
+    """
+    conexion = sqlite3.connect(RUTA_BD) if huellas is not None else None
+    try:
+        if conexion is not None:
+            _leer_huellas_guardadas(conexion)
+            with conexion:
+                conexion.execute(f"DELETE FROM {TABLA_HUELLAS_PERIODOS}")
+                esquema.registrar_version(conexion, TABLA_HUELLAS_PERIODOS)
+        almacenamiento.escribir_capa(df_final, "enriquecida")
+        if almacenamiento.exportar_csv(df_final, RUTA_DATOS_ENRIQUECIDOS):
+            print(f"Dataset enriquecido exportado en: {RUTA_DATOS_ENRIQUECIDOS}\n")
+        if conexion is not None:
+            _guardar_huellas(conexion, huellas)
+    finally:
+        if conexion is not None:
+            conexion.close()
+
+def perfilar_datasets(df_base, df_info, df_bovinos, df_externos, df_final):
+    """
+    Perfilamos por bloques los datasets del reporte (ver perfilador.py).
+
+    Retorna:
+        Diccionario nombre -> perfil (vacío si PERFIL_DATOS=0).
+    """
+    if not perfilador.GENERAR_PERFIL:
+        return {}
+    datasets = {
+        "dataset_base": df_base,
+        "delitos_informaticos": df_info,
+        "inventario_bovinos": df_bovinos,
+        "fuentes_externas": df_externos,
+        "dataset_enriquecido": df_final,
+    }
+    return {nombre: perfilador.perfilar_dataframe(df) for nombre, df in datasets.items()}
+
+def escribir_reporte_enriquecimiento(reporte, perfiles=None):
+    """
+    Escribimos el reporte de auditoría del enriquecimiento en un archivo de texto y, si se reciben
+    perfiles, el perfil de datos en JSON junto a él.
+    """
+    os.makedirs(os.path.dirname(RUTA_REPORTE_ENRIQUECIMIENTO), exist_ok=True)
+    with open(RUTA_REPORTE_ENRIQUECIMIENTO, "w", encoding="utf-8") as archivo_reporte:
+        archivo_reporte.write(reporte)
+    print(f"Reporte de enriquecimiento generado en: {RUTA_REPORTE_ENRIQUECIMIENTO}\n")
+    if perfiles:
+        perfilador.escribir_perfiles(RUTA_REPORTE_ENRIQUECIMIENTO, perfiles)
+
+# 4. Función Principal
 
 def main():
     """
@@ -181,40 +575,45 @@ def main():
       1. Carga del dataset base (COVID limpio).
       2. Lectura de Delitos Informáticos (CSV).
       3. Lectura del Inventario Anual de Bovinos (API).
-      4. Integración de las fuentes externas mediante merge sobre 'municipio'.
-      5. Concatenación horizontal de la muestra (444 filas) del dataset base con la muestra integrada de fuentes externas.
-      6. Exportación del dataset final a CSV y generación de un reporte de auditoría en TXT.
+         (Las tres cargas son independientes y se ejecutan en paralelo con el planificador.)
+      4. Agregación de los Delitos Informáticos e integración de las fuentes externas mediante merge sobre 'id_municipio' y año.
+      5. Unión temporal de cada fecha del dataset base con el resumen anual de las fuentes externas
+         (recalculando solo los periodos cuyas entradas cambiaron).
+      6. Exportación del dataset final a Parquet/CSV y generación de un reporte de auditoría en TXT
+         con el perfil de datos de cada dataset en JSON.
     """
     print("\n=== Iniciando Proceso de Enriquecimiento (EA3) ===")
 
-    # 1. Cargamos el dataset base (COVID limpio)
-    df_base = cargar_dataset_limpio_desde_bd()
-
-    # 2. Leemos los Delitos Informáticos (CSV)
-    df_info = leer_delitos_informaticos_csv()
-
-    # 3. Leemos el Inventario Anual de Bovinos (API)
-    df_bovinos = leer_inventario_bovinos_api()
-
-    # 4. Integramos las fuentes externas (merge sobre 'municipio')
-    df_externos = integrar_fuentes_externas(df_info, df_bovinos)
-
-    # Tomamos una muestra representativa de 444 filas de cada fuente
-    df_base_444 = df_base.head(444).reset_index(drop=True)
-    df_externos_444 = df_externos.head(444).reset_index(drop=True)
-
-    # 5. Concatemanos horizontalmente el dataset base con la integración de fuentes externas
-    df_final = pd.concat([df_base_444, df_externos_444], axis=1)
-
-    # 6. Exportamos a CSV el dataset final enriquecido
-    df_final.to_csv(RUTA_DATOS_ENRIQUECIDOS, index=False)
-    print(f"Dataset enriquecido exportado en: {RUTA_DATOS_ENRIQUECIDOS}\n")
-
-    # 7. Generamos el reporte de auditoría
-    reporte = generar_reporte_enriquecimiento(df_base, df_info, df_bovinos, df_externos, df_final)
-    with open(RUTA_REPORTE_ENRIQUECIMIENTO, "w", encoding="utf-8") as archivo_reporte:
-        archivo_reporte.write(reporte)
-    print(f"Reporte de enriquecimiento generado en: {RUTA_REPORTE_ENRIQUECIMIENTO}\n")
+    # 1 a 3. Cargamos en paralelo el dataset base (COVID limpio), los Delitos Informáticos (CSV)
+    #        y el Inventario Anual de Bovinos (API): son lecturas independientes
+    cargas, traza = planificador.ejecutar({
+        "dataset_limpio": planificador.tarea(cargar_dataset_limpio_desde_bd),
+        "delitos_informaticos": planificador.tarea(leer_delitos_informaticos_csv),
+        "inventario_bovinos": planificador.tarea(leer_inventario_bovinos_api),
+    })
+    planificador.imprimir_linea_de_tiempo(traza, "LÍNEA DE TIEMPO DE LAS CARGAS")
+    df_base = cargas["dataset_limpio"]
+    df_info, df_bovinos = asignar_municipios(cargas["delitos_informaticos"], cargas["inventario_bovinos"])
+
+    # 4. Agregamos los delitos e integramos las fuentes externas (merge sobre 'id_municipio' y año)
+    df_info_agregado, detalles_agregacion = agregar_delitos_informaticos(df_info)
+    df_externos, detalles_union = integrar_fuentes_externas(df_info_agregado, df_bovinos)
+
+    # 5. Unimos cada fecha del dataset base con el resumen anual de las fuentes externas
+    conexion = sqlite3.connect(RUTA_BD)
+    try:
+        df_final, detalles_periodos = enriquecer_por_periodos(df_base, df_externos, conexion)
+    finally:
+        conexion.close()
+
+    # 6. Guardamos el dataset final enriquecido en Parquet y, opcionalmente, en CSV (y después las huellas)
+    exportar_dataset_enriquecido(df_final, detalles_periodos["huellas"])
+
+    # 7. Generamos el reporte de auditoría y el perfil de datos de cada dataset
+    reporte = generar_reporte_enriquecimiento(
+        df_base, df_info, df_bovinos, df_externos, df_final, detalles_union, detalles_agregacion, detalles_periodos
+    )
+    escribir_reporte_enriquecimiento(reporte, perfilar_datasets(df_base, df_info, df_bovinos, df_externos, df_final))
 
     print("=== Proceso de Enriquecimiento Finalizado ===\n")
 
@@ -0,0 +1,423 @@
+import os
+import sys
+import sqlite3
+import datetime
+import itertools
+import pandas as pd
+
+"""
+Mantenimiento del esquema de ingestion.db: índices sobre la columna de fecha de cada tabla
+COVID y tablas de resumen que se actualizan en cada escritura, de modo que las lecturas
+frecuentes dejan de recorrer la tabla completa:
+
+  - 'resumen_tablas': filas, primera y última fecha de covid_data, covid_data_dirty y covid_data_cleaned.
+    La auditoría de la ingesta lee el conteo de aquí en lugar de ejecutar COUNT(*).
+    Cada escritura de una tabla (también de las que no tienen fecha) suma 1 a su 'version', en la
+    misma transacción que los datos; la caché del pipeline la usa como huella de la tabla.
+  - 'resumen_mensual_covid': registros, incrementos y acumulados de covid_data por mes (AAAAMM).
+    La ingesta incremental recalcula solo los meses que tocó.
+
+La muestra de Excel (ORDER BY date DESC LIMIT n) y la lectura por años del dataset limpio
+recorren el índice de fecha en lugar de ordenar o filtrar la tabla completa.
+Ejecutar este módulo revisa con EXPLAIN QUERY PLAN, en solo lectura, que esas consultas usen los índices.
+
+Las tablas que se reescriben desde pandas (covid_data_dirty y covid_data_cleaned) no se borran
+antes de escribirlas: las filas se cargan en una tabla sombra ('<tabla>__sombra') con INSERT de
+varias filas y, en una sola transacción, la sombra reemplaza a la tabla, se crea su índice y se
+actualiza su resumen. En modo WAL los lectores siguen viendo la versión anterior completa hasta
+el COMMIT, nunca una tabla ausente o a medio escribir.
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_BD = os.path.join(BASE_DIR, "static", "db", "ingestion.db")
+
+# Columna de Fecha (AAAAMMDD) de Cada Tabla; sobre Ella se Crea el Índice 'idx_<tabla>_<columna>'
+COLUMNAS_FECHA = {
+    "covid_data": "date",
+    "covid_data_dirty": "date",
+    "covid_data_cleaned": "fecha",
+}
+
+# Tablas de Resumen
+TABLA_RESUMEN = "resumen_tablas"
+TABLA_RESUMEN_MENSUAL = "resumen_mensual_covid"
+
+# Sufijo de la Tabla Sombra donde se Carga la Nueva Versión de una Tabla
+SUFIJO_SOMBRA = "__sombra"
+
+# PRAGMAs de la Conexión que Reescribe las Tablas
+PRAGMAS_ESCRITURA = {
+    "journal_mode": "WAL",    # Los Lectores no se Bloquean Mientras se Carga la Sombra
+    "synchronous": "NORMAL",  # En WAL Basta con Sincronizar en los Puntos de Control
+    "cache_size": -65536,     # Caché de Páginas de 64 MB (Valores Negativos en KB)
+    "temp_store": "MEMORY",
+}
+
+# Filas por Sentencia INSERT (Acotadas por el Límite de Parámetros de SQLite)
+FILAS_POR_INSERT = int(os.environ.get("FILAS_POR_INSERT", "1000"))
+LIMITE_PARAMETROS_SQLITE = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# Filas que se Convierten a Tipos de Python a la Vez (Acota la Memoria de la Conversión)
+TAMANO_BLOQUE_CONVERSION = 50_000
+
+
+def _q(nombre):
+    """Escapamos un identificador de SQLite."""
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def _ahora():
+    """Fecha y hora actual en el formato de las demás marcas de la base de datos."""
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def nombre_indice(tabla):
+    """Nombre del índice de fecha de una tabla."""
+    return f"idx_{tabla}_{COLUMNAS_FECHA[tabla]}"
+
+
+def _tiene_columna(conexion, tabla, columna):
+    """Indicamos si la tabla existe y tiene la columna (PRAGMA table_info no devuelve filas si no existe)."""
+    return any(fila[1] == columna for fila in conexion.execute(f"PRAGMA table_info({_q(tabla)});"))
+
+
+def crear_indices(conexion, tablas=None):
+    """
+    Creamos (si no existen) los índices de fecha de las tablas indicadas (por defecto todas las de
+    COLUMNAS_FECHA). Se omiten las tablas que aún no existen o no tienen la columna de fecha.
+
+    Retorna:
+        Lista de los índices presentes tras la llamada.
+    """
+    presentes = []
+    for tabla in tablas or COLUMNAS_FECHA:
+        columna = COLUMNAS_FECHA[tabla]
+        if not _tiene_columna(conexion, tabla, columna):
+            continue
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS {_q(nombre_indice(tabla))} ON {_q(tabla)} ({_q(columna)});")
+        presentes.append(nombre_indice(tabla))
+    return presentes
+
+
+def eliminar_indices(conexion, tablas=None):
+    """Eliminamos los índices de fecha (antes de una carga masiva es más rápido recrearlos al final)."""
+    for tabla in tablas or COLUMNAS_FECHA:
+        conexion.execute(f"DROP INDEX IF EXISTS {_q(nombre_indice(tabla))};")
+
+
+def crear_tablas_resumen(conexion):
+    """Creamos las tablas de resumen si no existen."""
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_RESUMEN} (
+            tabla TEXT PRIMARY KEY,
+            filas INTEGER,
+            primera_fecha INTEGER,
+            ultima_fecha INTEGER,
+            actualizado_en TEXT,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    if not _tiene_columna(conexion, TABLA_RESUMEN, "version"):
+        # Bases de datos creadas antes de registrar la versión de cada tabla
+        conexion.execute(f"ALTER TABLE {TABLA_RESUMEN} ADD COLUMN version INTEGER NOT NULL DEFAULT 0;")
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_RESUMEN_MENSUAL} (
+            mes INTEGER PRIMARY KEY,
+            registros INTEGER,
+            primera_fecha INTEGER,
+            ultima_fecha INTEGER,
+            incremento_positivos INTEGER,
+            incremento_fallecidos INTEGER,
+            positivos_acumulados INTEGER,
+            fallecidos_acumulados INTEGER,
+            actualizado_en TEXT
+        );
+    """)
+
+
+def _extremo_fecha(conexion, tabla, orden):
+    """Primera o última fecha no nula de la tabla: con el índice de fecha es una búsqueda, no un recorrido."""
+    columna = _q(COLUMNAS_FECHA[tabla])
+    fila = conexion.execute(
+        f"SELECT {columna} FROM {_q(tabla)} WHERE {columna} IS NOT NULL ORDER BY {columna} {orden} LIMIT 1;"
+    ).fetchone()
+    return fila[0] if fila else None
+
+
+def actualizar_resumen_mensual(conexion, meses=None):
+    """
+    Recalculamos el resumen mensual de covid_data. Con 'meses' (AAAAMM) solo se recalculan esos
+    meses, cada uno como un rango del índice de fecha; con None se reconstruye completo.
+    Los acumulados son el máximo del mes, porque 'positive' y 'death' son series acumuladas.
+    """
+    crear_tablas_resumen(conexion)
+    seleccion = f"""
+        INSERT INTO {TABLA_RESUMEN_MENSUAL}
+        SELECT date / 100, COUNT(*), MIN(date), MAX(date), SUM(positiveIncrease), SUM(deathIncrease),
+               MAX(positive), MAX(death), ?
+        FROM covid_data
+    """
+    if meses is None:
+        conexion.execute(f"DELETE FROM {TABLA_RESUMEN_MENSUAL};")
+        conexion.execute(seleccion + " WHERE date IS NOT NULL GROUP BY date / 100;", (_ahora(),))
+        return
+    for mes in sorted({int(mes) for mes in meses}):
+        conexion.execute(f"DELETE FROM {TABLA_RESUMEN_MENSUAL} WHERE mes = ?;", (mes,))
+        conexion.execute(seleccion + " WHERE date BETWEEN ? AND ? GROUP BY date / 100;", (_ahora(), mes * 100, mes * 100 + 99))
+
+
+def actualizar_resumen(conexion, tabla, filas=None, filas_agregadas=None, meses=None):
+    """
+    Actualizamos el resumen de 'tabla' después de escribirla (sin confirmar la transacción, para que
+    el resumen quede en la misma transacción que los datos).
+
+    Parámetros:
+        filas: Total de filas si quien escribe ya lo conoce (p.ej. una recarga completa).
+        filas_agregadas: Filas nuevas de una escritura incremental; se suman al conteo guardado.
+        meses: Solo para covid_data; meses (AAAAMM) afectados. None recalcula todo el resumen mensual.
+
+    Si no se indica ni 'filas' ni 'filas_agregadas' el conteo se recalcula con COUNT(*).
+    """
+    crear_tablas_resumen(conexion)
+    if filas is None and filas_agregadas is not None:
+        anterior = conexion.execute(f"SELECT filas FROM {TABLA_RESUMEN} WHERE tabla = ?;", (tabla,)).fetchone()
+        if anterior is not None:
+            filas = anterior[0] + filas_agregadas
+    if filas is None:
+        filas = conexion.execute(f"SELECT COUNT(*) FROM {_q(tabla)};").fetchone()[0]
+    conexion.execute(f"""
+        INSERT INTO {TABLA_RESUMEN} (tabla, filas, primera_fecha, ultima_fecha, actualizado_en, version)
+        VALUES (?,?,?,?,?,1)
+        ON CONFLICT(tabla) DO UPDATE SET
+            filas = excluded.filas, primera_fecha = excluded.primera_fecha, ultima_fecha = excluded.ultima_fecha,
+            actualizado_en = excluded.actualizado_en, version = version + 1;
+    """, (tabla, filas, _extremo_fecha(conexion, tabla, "ASC"), _extremo_fecha(conexion, tabla, "DESC"), _ahora()))
+    if tabla == "covid_data":
+        actualizar_resumen_mensual(conexion, meses)
+
+
+def registrar_version(conexion, tabla):
+    """
+    Sumamos 1 a la versión de una tabla sin resumen de fechas después de escribirla (sin confirmar la
+    transacción, para que la versión quede en la misma transacción que los datos).
+    """
+    crear_tablas_resumen(conexion)
+    conexion.execute(f"""
+        INSERT INTO {TABLA_RESUMEN} (tabla, actualizado_en, version) VALUES (?, ?, 1)
+        ON CONFLICT(tabla) DO UPDATE SET actualizado_en = excluded.actualizado_en, version = version + 1;
+    """, (tabla, _ahora()))
+
+
+def leer_version(conexion, tabla):
+    """
+    Versión registrada de una tabla (búsqueda por clave primaria, sin escribir: sirve en conexiones
+    de solo lectura). None si la tabla nunca registró una escritura o la base es anterior a las versiones.
+    """
+    try:
+        fila = conexion.execute(f"SELECT version FROM {TABLA_RESUMEN} WHERE tabla = ?;", (tabla,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return fila[0] if fila and fila[0] else None
+
+
+def configurar_escritura(conexion):
+    """Aplicamos PRAGMAS_ESCRITURA a la conexión (fuera de una transacción: journal_mode no cambia dentro de una)."""
+    for pragma, valor in PRAGMAS_ESCRITURA.items():
+        conexion.execute(f"PRAGMA {pragma}={valor};")
+
+
+def nombre_sombra(tabla):
+    """Nombre de la tabla sombra de 'tabla'."""
+    return tabla + SUFIJO_SOMBRA
+
+
+def _filas_sqlite(df):
+    """Recorremos el DataFrame como tuplas de tipos de Python, con los nulos de pandas convertidos a None."""
+    for inicio in range(0, len(df), TAMANO_BLOQUE_CONVERSION):
+        bloque = df.iloc[inicio:inicio + TAMANO_BLOQUE_CONVERSION]
+        columnas = []
+        for _, serie in bloque.items():
+            valores = serie.to_numpy(dtype=object)
+            nulos = serie.isna().to_numpy()
+            if nulos.any():
+                valores[nulos] = None
+            columnas.append(valores)
+        yield from zip(*columnas)
+
+
+def _insertar_filas(conexion, tabla, df):
+    """Insertamos las filas del DataFrame con sentencias INSERT de varias filas. Retorna las filas insertadas."""
+    if df.shape[1] == 0:
+        return 0
+    por_sentencia = max(1, min(FILAS_POR_INSERT, LIMITE_PARAMETROS_SQLITE // df.shape[1]))
+    marcador = "(" + ", ".join("?" for _ in df.columns) + ")"
+    encabezado = f"INSERT INTO {_q(tabla)} ({', '.join(_q(str(columna)) for columna in df.columns)}) VALUES "
+    consulta_completa = encabezado + ", ".join([marcador] * por_sentencia)
+    filas = _filas_sqlite(df)
+    total = 0
+    while True:
+        lote = list(itertools.islice(filas, por_sentencia))
+        if not lote:
+            break
+        # Los lotes completos reutilizan la misma sentencia preparada; solo el último cambia de tamaño
+        consulta = consulta_completa if len(lote) == por_sentencia else encabezado + ", ".join([marcador] * len(lote))
+        conexion.execute(consulta, [valor for fila in lote for valor in fila])
+        total += len(lote)
+    return total
+
+
+def _columnas_mixtas(df):
+    """
+    Columnas de tipo objeto con valores de distintos tipos (p.ej. números y textos en la tabla sucia).
+    Se declaran sin tipo: con TEXT, SQLite guardaría 14890771.0 y '14890771.0' como el mismo texto.
+    """
+    return {
+        str(columna): ""
+        for columna, serie in df.items()
+        if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ("string", "empty", "bytes")
+    }
+
+
+def cargar_tabla_sombra(conexion, tabla, df, crear=True):
+    """
+    Agregamos las filas del DataFrame a la tabla sombra de 'tabla' (sin confirmar).
+    Con 'crear' la sombra se crea de nuevo con el mismo esquema que generaría DataFrame.to_sql,
+    salvo las columnas con tipos mixtos, que quedan sin afinidad para conservar el tipo de cada valor.
+
+    Retorna:
+        Número de filas insertadas.
+    """
+    sombra = nombre_sombra(tabla)
+    if crear:
+        conexion.execute(f"DROP TABLE IF EXISTS {_q(sombra)};")
+        conexion.execute(pd.io.sql.get_schema(df, sombra, con=conexion, dtype=_columnas_mixtas(df)))
+    return _insertar_filas(conexion, sombra, df)
+
+
+def publicar_tabla_sombra(conexion, tabla, filas=None):
+    """
+    Reemplazamos 'tabla' por su sombra en una sola transacción: DROP de la tabla anterior, RENAME de la
+    sombra, índice de fecha y resumen (solo para las tablas de COLUMNAS_FECHA). Luego confirmamos.
+    'filas' es el total cargado, si se conoce, para no recontar la tabla.
+    """
+    if not conexion.in_transaction:
+        conexion.execute("BEGIN IMMEDIATE;")
+    try:
+        conexion.execute(f"DROP TABLE IF EXISTS {_q(tabla)};")
+        conexion.execute(f"ALTER TABLE {_q(nombre_sombra(tabla))} RENAME TO {_q(tabla)};")
+        if tabla in COLUMNAS_FECHA:
+            crear_indices(conexion, [tabla])
+            actualizar_resumen(conexion, tabla, filas=filas)
+        else:
+            registrar_version(conexion, tabla)
+        conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+
+
+def reemplazar_tabla(conexion, tabla, df):
+    """
+    Reemplazamos 'tabla' por el contenido del DataFrame en una única transacción (carga en la sombra
+    y publicación), con los PRAGMAs de escritura. Equivale a to_sql(if_exists="replace", index=False).
+
+    Retorna:
+        Número de filas escritas.
+    """
+    configurar_escritura(conexion)
+    # IMMEDIATE toma el bloqueo de escritura al empezar (esperando el timeout si otro escribe): una
+    # transacción diferida que empieza leyendo falla de inmediato si otra conexión escribió entre medio
+    conexion.execute("BEGIN IMMEDIATE;")
+    try:
+        filas = cargar_tabla_sombra(conexion, tabla, df)
+    except Exception:
+        conexion.rollback()
+        raise
+    publicar_tabla_sombra(conexion, tabla, filas)
+    return filas
+
+
+def leer_resumen(conexion, tabla):
+    """
+    Leemos el resumen de una tabla (búsqueda por clave primaria). Si aún no existe, por ejemplo en
+    una base de datos creada antes de este módulo, se calcula y se guarda en ese momento.
+
+    Retorna:
+        Diccionario con filas, primera_fecha, ultima_fecha y actualizado_en.
+    """
+    crear_tablas_resumen(conexion)
+    consulta = f"SELECT filas, primera_fecha, ultima_fecha, actualizado_en FROM {TABLA_RESUMEN} WHERE tabla = ?;"
+    fila = conexion.execute(consulta, (tabla,)).fetchone()
+    if fila is None:
+        crear_indices(conexion, [tabla])
+        actualizar_resumen(conexion, tabla)
+        conexion.commit()
+        fila = conexion.execute(consulta, (tabla,)).fetchone()
+    return dict(zip(("filas", "primera_fecha", "ultima_fecha", "actualizado_en"), fila))
+
+
+def consulta_por_anios(tabla, anios, seleccion="*"):
+    """
+    Consulta de las filas de los años indicados como rangos de la columna de fecha
+    (fecha BETWEEN AAAA0000 AND AAAA9999), que a diferencia de CAST(fecha / 10000 ...) sí usa el índice.
+    """
+    columna = _q(COLUMNAS_FECHA[tabla])
+    rangos = " OR ".join(
+        f"{columna} BETWEEN {int(anio) * 10000} AND {int(anio) * 10000 + 9999}" for anio in sorted(set(anios))
+    )
+    return f"SELECT {seleccion} FROM {_q(tabla)} WHERE {rangos or '0'}"
+
+
+# Consultas Frecuentes que Deben Usar el Índice de Fecha: descripción -> (tabla, consulta, parámetros)
+CONSULTAS_VERIFICADAS = {
+    "Muestra de Excel (últimas fechas)": ("covid_data", "SELECT * FROM covid_data ORDER BY date DESC LIMIT ?", (50,)),
+    "Resumen mensual (rango de un mes)": (
+        "covid_data", "SELECT COUNT(*) FROM covid_data WHERE date BETWEEN ? AND ?", (20210100, 20210199),
+    ),
+    "Última fecha de la tabla sucia": (
+        "covid_data_dirty", "SELECT date FROM covid_data_dirty WHERE date IS NOT NULL ORDER BY date DESC LIMIT 1", (),
+    ),
+    "Dataset limpio por años": ("covid_data_cleaned", consulta_por_anios("covid_data_cleaned", [2020, 2021]), ()),
+}
+
+
+def plan_de_consulta(conexion, consulta, parametros=()):
+    """Devolvemos el detalle de EXPLAIN QUERY PLAN de una consulta (una línea por paso)."""
+    return [fila[-1] for fila in conexion.execute(f"EXPLAIN QUERY PLAN {consulta}", parametros)]
+
+
+def verificar_planes(conexion):
+    """
+    Comprobamos que cada consulta de CONSULTAS_VERIFICADAS use el índice de fecha de su tabla
+    y no recorra ni ordene la tabla completa. Solo lee: no crea índices, así que una tabla cuyo
+    índice falta en sqlite_master cuenta como error. Se omiten las tablas que aún no existen.
+
+    Retorna:
+        Lista de tuplas (descripción, usa el índice, plan).
+    """
+    resultados = []
+    for descripcion, (tabla, consulta, parametros) in CONSULTAS_VERIFICADAS.items():
+        if not _tiene_columna(conexion, tabla, COLUMNAS_FECHA[tabla]):
+            continue
+        existe_indice = conexion.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?;", (nombre_indice(tabla),)
+        ).fetchone() is not None
+        plan = plan_de_consulta(conexion, consulta, parametros)
+        usa_indice = existe_indice and any(nombre_indice(tabla) in paso for paso in plan) and not any(
+            paso.startswith("USE TEMP B-TREE") or paso in (f"SCAN {tabla}", f"SCAN TABLE {tabla}") for paso in plan
+        )
+        resultados.append((descripcion, usa_indice, plan))
+    return resultados
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_BD
+    conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        resultados = verificar_planes(conexion)
+    finally:
+        conexion.close()
+    print("=== PLANES DE CONSULTA (EXPLAIN QUERY PLAN) ===")
+    for descripcion, usa_indice, plan in resultados:
+        print(f"{'OK   ' if usa_indice else 'ERROR'} {descripcion}: {' | '.join(plan)}")
+    if not all(usa_indice for _, usa_indice, _ in resultados):
+        sys.exit("Hay consultas que no usan el índice de fecha.")
@@ -0,0 +1,192 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import threading
+import requests
+
+"""
+Caché HTTP en disco compartida por las fuentes de datos remotas (API del COVID Tracking Project
+y API de datos.gov.co). El cuerpo de cada respuesta se guarda comprimido con gzip junto a sus
+metadatos (ETag, Last-Modified y huella del contenido), de modo que las siguientes ejecuciones:
+
+  - Reutilizan la copia local sin ir a la red mientras no se cumpla el TTL.
+  - Envían peticiones condicionales (If-None-Match / If-Modified-Since) cuando el TTL venció.
+  - Informan si el contenido cambió, para que las etapas siguientes puedan omitirse con un 304.
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Carpeta Donde se Guardan los Cuerpos Comprimidos y sus Metadatos
+RUTA_CACHE_HTTP = os.path.join(BASE_DIR, "static", "cache", "http")
+
+# Segundos Durante los que una Respuesta se Considera Vigente sin Consultar el Origen
+TTL_CACHE_HTTP = int(os.environ.get("HTTP_CACHE_TTL", "3600"))
+
+# Ignoramos la Caché y Descargamos Siempre el Contenido Completo
+FORZAR_DESCARGA = os.environ.get("HTTP_CACHE_FORZAR", "0") == "1"
+
+# Tamaño de los Fragmentos al Copiar la Respuesta al Disco (Bytes)
+TAMANO_FRAGMENTO = 64 * 1024
+
+# Contadores de Uso de la Caché Durante la Ejecución Actual
+ESTADISTICAS = {"aciertos": 0, "no_modificados": 0, "descargas": 0}
+_CANDADO_ESTADISTICAS = threading.Lock()
+
+# Último Resultado Obtenido por Cada URL y sus Parámetros (Permite a las Etapas Consultar si el Origen Cambió)
+# (las páginas de Socrata comparten la URL, así que la clave incluye los parámetros, como la de la caché)
+ULTIMOS_RESULTADOS = {}
+
+
+def _registrar(clave, estado, resultado):
+    """Actualizamos los Contadores y el Último Resultado de la Entrada (Seguro Entre Hilos)"""
+    with _CANDADO_ESTADISTICAS:
+        ESTADISTICAS[estado] += 1
+        ULTIMOS_RESULTADOS[clave] = resultado
+    return resultado
+
+
+def _clave(url, params=None):
+    """Calculamos el Nombre de la Entrada a Partir de la URL y sus Parámetros Ordenados"""
+    texto = url + "?" + json.dumps(sorted((params or {}).items()), ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _rutas(clave):
+    """Devolvemos las Rutas del Cuerpo Comprimido y del Archivo de Metadatos de una Entrada"""
+    return (
+        os.path.join(RUTA_CACHE_HTTP, f"{clave}.body.gz"),
+        os.path.join(RUTA_CACHE_HTTP, f"{clave}.meta.json"),
+    )
+
+
+def _leer_metadatos(ruta_meta, ruta_cuerpo):
+    """Leemos los Metadatos de una Entrada; si Falta el Cuerpo la Entrada no es Válida"""
+    if not (os.path.exists(ruta_meta) and os.path.exists(ruta_cuerpo)):
+        return None
+    with open(ruta_meta, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _guardar_metadatos(ruta_meta, metadatos):
+    """Escribimos los Metadatos de Forma Atómica"""
+    temporal = ruta_meta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(metadatos, archivo, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta_meta)
+
+
+def obtener(url, params=None, ttl=None, forzar=None, sesion=None, timeout=60):
+    """
+    Obtenemos una URL a través de la caché en disco.
+
+    Retorna:
+        Diccionario con la ruta del cuerpo comprimido ('ruta'), el estado de la consulta
+        ('acierto', 'no_modificado' o 'descarga') y si el contenido cambió respecto a la
+        copia anterior ('modificado').
+    """
+    ttl = TTL_CACHE_HTTP if ttl is None else ttl
+    forzar = FORZAR_DESCARGA if forzar is None else forzar
+    os.makedirs(RUTA_CACHE_HTTP, exist_ok=True)
+
+    clave = _clave(url, params)
+    ruta_cuerpo, ruta_meta = _rutas(clave)
+    metadatos = None if forzar else _leer_metadatos(ruta_meta, ruta_cuerpo)
+    ahora = time.time()
+
+    # 1. Copia Vigente: no Consultamos el Origen
+    if metadatos is not None and ahora - metadatos["guardado_en"] < ttl:
+        return _registrar(clave, "aciertos", {"ruta": ruta_cuerpo, "estado": "acierto", "modificado": False})
+
+    # 2. Petición Condicional con los Validadores de la Copia Anterior
+    cabeceras = {}
+    if metadatos is not None:
+        if metadatos.get("etag"):
+            cabeceras["If-None-Match"] = metadatos["etag"]
+        if metadatos.get("last_modified"):
+            cabeceras["If-Modified-Since"] = metadatos["last_modified"]
+
+    cliente = sesion or requests
+    respuesta = cliente.get(url, params=params, headers=cabeceras, stream=True, timeout=timeout)
+    if respuesta.status_code == 304:
+        respuesta.close()
+        if metadatos is not None and os.path.exists(ruta_cuerpo):
+            metadatos["guardado_en"] = ahora
+            _guardar_metadatos(ruta_meta, metadatos)
+            return _registrar(clave, "no_modificados", {"ruta": ruta_cuerpo, "estado": "no_modificado", "modificado": False})
+        # Un 304 no Trae Cuerpo: sin Copia Local que Reutilizar Repetimos la Petición sin Validadores
+        respuesta = cliente.get(url, params=params, headers={}, stream=True, timeout=timeout)
+        if respuesta.status_code == 304:
+            respuesta.close()
+            raise requests.HTTPError(f"304 sin Copia Local para {url}", response=respuesta)
+
+    with respuesta:
+        respuesta.raise_for_status()
+
+        # 3. Descarga Completa: Copiamos por Fragmentos al Archivo Comprimido y Calculamos su Huella
+        huella = hashlib.sha256()
+        temporal = ruta_cuerpo + ".tmp"
+        with gzip.open(temporal, "wb", compresslevel=6) as destino:
+            for fragmento in respuesta.iter_content(chunk_size=TAMANO_FRAGMENTO):
+                huella.update(fragmento)
+                destino.write(fragmento)
+        os.replace(temporal, ruta_cuerpo)
+
+        huella_anterior = _leer_huella_previa(ruta_meta)
+        nuevos_metadatos = {
+            "url": url,
+            "params": params or {},
+            "etag": respuesta.headers.get("ETag"),
+            "last_modified": respuesta.headers.get("Last-Modified"),
+            "sha256": huella.hexdigest(),
+            "guardado_en": ahora,
+        }
+        _guardar_metadatos(ruta_meta, nuevos_metadatos)
+
+    return _registrar(clave, "descargas", {
+        "ruta": ruta_cuerpo,
+        "estado": "descarga",
+        "modificado": huella_anterior != nuevos_metadatos["sha256"],
+    })
+
+
+def _leer_huella_previa(ruta_meta):
+    """Recuperamos la Huella del Contenido Guardado Anteriormente (Aunque se Haya Forzado la Descarga)"""
+    if not os.path.exists(ruta_meta):
+        return None
+    with open(ruta_meta, "r", encoding="utf-8") as archivo:
+        return json.load(archivo).get("sha256")
+
+
+def abrir(resultado):
+    """Abrimos el Cuerpo Descomprimido de una Entrada como Archivo Binario para Leerlo por Fragmentos"""
+    return gzip.open(resultado["ruta"], "rb")
+
+
+def leer_json(resultado):
+    """Cargamos el Cuerpo de una Entrada como JSON"""
+    with abrir(resultado) as archivo:
+        return json.load(archivo)
+
+
+def fue_modificado(url, params=None):
+    """Indicamos si la Última Consulta de la URL con esos Parámetros Trajo Contenido Nuevo (True si no se ha Consultado)"""
+    resultado = ULTIMOS_RESULTADOS.get(_clave(url, params))
+    return True if resultado is None else resultado["modificado"]
+
+
+def resumen_estadisticas():
+    """Generamos un Texto con los Aciertos, Revalidaciones y Descargas de la Caché"""
+    consultas = sum(ESTADISTICAS.values())
+    reutilizadas = ESTADISTICAS["aciertos"] + ESTADISTICAS["no_modificados"]
+    tasa = (reutilizadas / consultas * 100) if consultas else 0
+    return (
+        f"Caché HTTP: {ESTADISTICAS['aciertos']} Aciertos, {ESTADISTICAS['no_modificados']} No Modificados (304), "
+        f"{ESTADISTICAS['descargas']} Descargas ({tasa:.1f}% Reutilizado)"
+    )
+
+
+def limpiar_cache():
+    """Eliminamos Todas las Entradas de la Caché en Disco"""
+    shutil.rmtree(RUTA_CACHE_HTTP, ignore_errors=True)
@@ -1,8 +1,16 @@
 import os
+import json
+import time
+import codecs
 import sqlite3
+import itertools
 import requests
-import pandas as pd
 import datetime
+import http_cache
+import esquema
+import metricas
+import perfilador
+import salida_excel
 
 
 # Configuramos las Rutas para la Base de Datos, el Archivo de Excel y la Auditoría
@@ -11,28 +19,143 @@ DB_PATH = os.path.join(BASE_DIR, "static", "db", "ingestion.db")
 XLSX_PATH = os.path.join(BASE_DIR, "static", "xlsx", "ingestion.xlsx")
 AUDIT_PATH = os.path.join(BASE_DIR, "static", "auditoria", "ingestion.txt")
 
+# URL del API (Puede Apuntar a un Archivo Local o file:// para Ejecutar sin Red, p.ej. static/fixtures/covid_us_daily.json)
+URL_API_COVID = os.environ.get("URL_API_COVID", "https://api.covidtracking.com/v1/us/daily.json")
 
-# Nos Aseguramos que las Carpetas de Almacenamiento Existan
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-os.makedirs(os.path.dirname(XLSX_PATH), exist_ok=True)
-os.makedirs(os.path.dirname(AUDIT_PATH), exist_ok=True)
+# Extracción en Streaming: los Registros se Leen y se Insertan por Lotes sin Cargar Toda la Respuesta en Memoria
+INGESTA_STREAMING = os.environ.get("INGESTA_STREAMING", "0") == "1"
 
+# Tamaño de Cada Fragmento Leído de la Respuesta HTTP o del Archivo Local (Bytes)
+TAMANO_BLOQUE_LECTURA = 64 * 1024
 
-def extraer_datos_api():
+# Tamaño de Lote para la Carga Masiva en SQLite (Ajustable con la Variable de Entorno TAMANO_LOTE_INGESTA)
+TAMANO_LOTE = int(os.environ.get("TAMANO_LOTE_INGESTA", "5000"))
+
+# Claves por Consulta al Buscar Registros Existentes en la Ingesta Incremental (por Debajo del Límite de Parámetros de SQLite)
+CLAVES_POR_CONSULTA = 500
+
+# Modo de Ingesta: "completo" (Borra y Recarga la Tabla) o "incremental" (Upsert por hash/lastModified)
+MODO_INGESTA = os.environ.get("MODO_INGESTA", "completo").lower()
+
+# Registros del Archivo de Excel de Muestra (Ajustable con la Variable de Entorno FILAS_MUESTRA_EXCEL)
+FILAS_MUESTRA_EXCEL = int(os.environ.get("FILAS_MUESTRA_EXCEL", "50"))
+
+# Nombre de la Fuente en la Tabla de Marcas de Agua (Watermark)
+FUENTE_COVID = "covidtracking_us_daily"
+
+# Columnas de la Tabla covid_data en el Orden de Inserción
+COLUMNAS_COVID = (
+    "hash",
+    "date",
+    "positive",
+    "death",
+    "hospitalizedCurrently",
+    "totalTestResults",
+    "positiveIncrease",
+    "deathIncrease",
+    "lastModified",
+)
+
+
+def _es_url_remota(url):
+    """Indicamos si la Fuente es HTTP(S) o un Archivo Local (Ruta o file://)"""
+    return url.startswith(("http://", "https://"))
+
+
+def _ruta_local(url):
+    """Convertimos una URL file:// o una Ruta Relativa al Módulo en una Ruta Absoluta"""
+    ruta = url[len("file://"):] if url.startswith("file://") else url
+    return ruta if os.path.isabs(ruta) else os.path.join(BASE_DIR, ruta)
+
+
+@metricas.instrumentar
+def extraer_datos_api(url=URL_API_COVID):
     """Obtenemos los Datos Históricos del COVID-19 en EE.UU. Desde una API"""
-    url = "https://api.covidtracking.com/v1/us/daily.json"
     try:
-        response = requests.get(url)
-        response.raise_for_status() # Lanzamos Error si la Respuesta no es Exitosa
-        return response.json()
+        if not _es_url_remota(url):
+            with open(_ruta_local(url), "r", encoding="utf-8") as archivo:
+                return json.load(archivo)
+        # La Descarga Pasa por la Caché HTTP (Peticiones Condicionales y TTL)
+        return http_cache.leer_json(http_cache.obtener(url))
     except requests.exceptions.RequestException as e:
         print(f"❌ Error al Extraer los Datos del API: {e}")
         raise
 
 
+def iterar_arreglo_json(fragmentos):
+    """Parseamos de Forma Incremental un Arreglo JSON que Llega en Fragmentos de Bytes y Producimos sus Elementos Uno a Uno"""
+    decodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    posicion = 0
+    dentro_del_arreglo = False
+    fin_de_datos = False
+    fragmentos = iter(fragmentos)
+
+    while True:
+        # Descartamos lo ya Consumido y Agregamos el Siguiente Fragmento
+        fragmento = next(fragmentos, None)
+        if fragmento is None:
+            buffer = buffer[posicion:] + utf8.decode(b"", final=True)
+            fin_de_datos = True
+        else:
+            buffer = buffer[posicion:] + utf8.decode(fragmento)
+        posicion = 0
+
+        while True:
+            # Saltamos Espacios y Separadores Entre Elementos
+            while posicion < len(buffer) and (buffer[posicion].isspace() or (dentro_del_arreglo and buffer[posicion] == ",")):
+                posicion += 1
+            if posicion >= len(buffer):
+                break
+            if not dentro_del_arreglo:
+                if buffer[posicion] != "[":
+                    raise ValueError("La Respuesta JSON no es un Arreglo")
+                dentro_del_arreglo = True
+                posicion += 1
+                continue
+            if buffer[posicion] == "]":
+                return
+            try:
+                elemento, fin = decodificador.raw_decode(buffer, posicion)
+            except json.JSONDecodeError:
+                if fin_de_datos:
+                    raise
+                break  # Elemento Incompleto: Esperamos el Siguiente Fragmento
+            # Un Escalar Cortado Puede ser Válido por sí Solo ("1" de "12", "-0" de "-0.5"): Solo Aceptamos
+            # el Elemento Cuando le Sigue una Coma o el Cierre del Arreglo
+            siguiente = fin
+            while siguiente < len(buffer) and buffer[siguiente].isspace():
+                siguiente += 1
+            if not fin_de_datos and (siguiente >= len(buffer) or buffer[siguiente] not in ",]"):
+                break  # Esperamos el Siguiente Fragmento
+            yield elemento
+            posicion = fin
+
+        if fin_de_datos:
+            raise ValueError("El Arreglo JSON Terminó de Forma Inesperada")
+
+
+def extraer_datos_api_stream(url=URL_API_COVID, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+    """Obtenemos los Datos Históricos del COVID-19 como un Generador de Registros, Leyendo la Respuesta por Fragmentos"""
+    try:
+        if not _es_url_remota(url):
+            with open(_ruta_local(url), "rb") as archivo:
+                yield from iterar_arreglo_json(iter(lambda: archivo.read(tamano_bloque), b""))
+            return
+        # La Caché Descarga por Fragmentos a un Archivo Comprimido que Luego Leemos en Streaming
+        resultado = http_cache.obtener(url)
+        with http_cache.abrir(resultado) as archivo:
+            yield from iterar_arreglo_json(iter(lambda: archivo.read(tamano_bloque), b""))
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error al Extraer los Datos del API en Streaming: {e}")
+        raise
+
+
 def crear_db():
     """Creamos la Base de Datos SQLite y la Tabla si no Existe"""
     try:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)  # Las Carpetas se Crean al Escribir, no al Importar
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         cursor.execute("""
@@ -48,6 +171,17 @@ def crear_db():
                 lastModified TEXT
             );
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ingestion_watermark (
+                fuente TEXT PRIMARY KEY,
+                ultima_fecha INTEGER,
+                ultima_modificacion TEXT,
+                actualizado_en TEXT
+            );
+        """)
+        # Índice de Fecha y Tablas de Resumen (ver esquema.py)
+        esquema.crear_indices(conn, ["covid_data"])
+        esquema.crear_tablas_resumen(conn)
         conn.commit()
         return conn
     except sqlite3.Error as e:
@@ -55,112 +189,307 @@ def crear_db():
         raise
 
 
-def insertar_datos(conn, datos):
-    """Guardamos los Datos Obtenidos en la Base de Datos"""
+@metricas.instrumentar
+def insertar_datos(conn, datos, tamano_lote=TAMANO_LOTE):
+    """Guardamos los Datos Obtenidos en la Base de Datos con una Carga Masiva por Lotes"""
+    consulta = f"""
+        INSERT INTO covid_data ({", ".join(COLUMNAS_COVID)})
+        VALUES ({", ".join("?" for _ in COLUMNAS_COVID)})
+    """
+    filas = (tuple(registro.get(columna) for columna in COLUMNAS_COVID) for registro in datos)
     try:
+        conn.execute("PRAGMA journal_mode=WAL;")  # WAL Permite Lecturas Mientras se Escribe
+        inicio = time.perf_counter()
+        total = 0
+
+        # Todo el Reemplazo Ocurre en una Única Transacción Explícita
         cursor = conn.cursor()
+        cursor.execute("BEGIN;")
         cursor.execute("DELETE FROM covid_data;")  # Limpiamos la Tabla Antes de Insertar Nuevos Datos
-       
-        for registro in datos:
-            cursor.execute("""
-                INSERT INTO covid_data (
-                    hash,
-                    date,
-                    positive,
-                    death,
-                    hospitalizedCurrently,
-                    totalTestResults,
-                    positiveIncrease,
-                    deathIncrease,
-                    lastModified
-                ) VALUES (?,?,?,?,?,?,?,?,?)
-            """, (
-                registro.get("hash"),
-                registro.get("date"),
-                registro.get("positive"),
-                registro.get("death"),
-                registro.get("hospitalizedCurrently"),
-                registro.get("totalTestResults"),
-                registro.get("positiveIncrease"),
-                registro.get("deathIncrease"),
-                registro.get("lastModified")
-            ))
+        esquema.eliminar_indices(conn, ["covid_data"])  # El Índice se Construye una Sola Vez al Final de la Carga
+        while True:
+            lote = list(itertools.islice(filas, tamano_lote))
+            if not lote:
+                break
+            cursor.executemany(consulta, lote)
+            total += len(lote)
+        esquema.crear_indices(conn, ["covid_data"])
+        esquema.actualizar_resumen(conn, "covid_data", filas=total)
         conn.commit()
+
+        duracion = time.perf_counter() - inicio
+        velocidad = total / duracion if duracion > 0 else float("inf")
+        print(f"Carga Masiva: {total} Registros en {duracion:.3f} s ({velocidad:,.0f} Registros/s, Lotes de {tamano_lote})")
+        return total
     except sqlite3.Error as e:
+        conn.rollback()
         print(f"❌ Error al Insertar Datos: {e}")
         raise
 
 
-def generar_archivo_muestra(conn):
-    """Creamos un Archivo de Excel con 50 Registros de Muestra"""
+def _buscar_existentes(conn, claves):
+    """Consultamos lastModified y date de las Claves que ya Están en covid_data (por Tramos de CLAVES_POR_CONSULTA)"""
+    claves = list(dict.fromkeys(clave for clave in claves if clave is not None))
+    existentes = {}
+    for inicio in range(0, len(claves), CLAVES_POR_CONSULTA):
+        tramo = claves[inicio:inicio + CLAVES_POR_CONSULTA]
+        existentes.update(
+            (clave, (modificacion, fecha)) for clave, modificacion, fecha in conn.execute(
+                f"SELECT hash, lastModified, date FROM covid_data WHERE hash IN ({', '.join('?' for _ in tramo)});",
+                tramo,
+            )
+        )
+    return existentes
+
+
+@metricas.instrumentar
+def insertar_datos_incremental(conn, datos, tamano_lote=TAMANO_LOTE):
+    """
+    Aplicamos un Upsert Incremental: Insertamos Registros Nuevos, Actualizamos los que Cambiaron su lastModified y Omitimos el Resto.
+    Solo se Buscan en covid_data las Claves de Cada Lote; un hash Nuevo se Inserta Aunque su lastModified sea Antiguo,
+    y la Marca de Agua Solo Clasifica como Omitidos a los Registros ya Existentes y sin Cambios.
+    """
+    columnas_actualizables = [columna for columna in COLUMNAS_COVID if columna != "hash"]
+    consulta = f"""
+        INSERT INTO covid_data ({", ".join(COLUMNAS_COVID)})
+        VALUES ({", ".join("?" for _ in COLUMNAS_COVID)})
+        ON CONFLICT(hash) DO UPDATE SET
+            {", ".join(f"{columna} = excluded.{columna}" for columna in columnas_actualizables)}
+        WHERE excluded.lastModified IS NOT covid_data.lastModified
+    """
     try:
-        query = """
-            SELECT
-                date,
-                positive,
-                death,
-                hospitalizedCurrently,
-                totalTestResults,
-                positiveIncrease,
-                deathIncrease
+        conn.execute("PRAGMA journal_mode=WAL;")
+        inicio = time.perf_counter()
+
+        marca = (obtener_watermark(conn) or {}).get("ultima_modificacion")
+        resumen = {"insertados": 0, "actualizados": 0, "sin_cambios": 0, "omitidos_por_marca": 0}
+        ultima_fecha = None
+        ultima_modificacion = None
+        meses_afectados = set()
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN;")
+        registros = iter(datos)
+        while True:
+            leidos = list(itertools.islice(registros, tamano_lote))
+            if not leidos:
+                break
+
+            # Buscamos Solo las Claves del Lote; la Marca de Agua no Descarta hashes que Aún no Existen
+            existentes = _buscar_existentes(conn, (registro.get("hash") for registro in leidos))
+
+            lote = []
+            for registro in leidos:
+                clave = registro.get("hash")
+                modificacion = registro.get("lastModified")
+                fecha = registro.get("date")
+                previo = existentes.get(clave)
+                if previo is None:
+                    resumen["insertados"] += 1
+                elif previo[0] != modificacion:
+                    resumen["actualizados"] += 1
+                    # Si la Actualización Cambia la Fecha, el Mes Anterior También Debe Recalcularse
+                    if previo[1] is not None:
+                        meses_afectados.add(previo[1] // 100)
+                elif marca is not None and modificacion is not None and modificacion <= marca:
+                    resumen["omitidos_por_marca"] += 1
+                    continue
+                else:
+                    resumen["sin_cambios"] += 1
+                    continue
+                if clave is not None:
+                    existentes[clave] = (modificacion, fecha)
+                lote.append(tuple(registro.get(columna) for columna in COLUMNAS_COVID))
+
+                if fecha is not None:
+                    meses_afectados.add(fecha // 100)
+                if fecha is not None and (ultima_fecha is None or fecha > ultima_fecha):
+                    ultima_fecha = fecha
+                if modificacion is not None and (ultima_modificacion is None or modificacion > ultima_modificacion):
+                    ultima_modificacion = modificacion
+            if lote:
+                cursor.executemany(consulta, lote)
+
+        # Registramos la Marca de Agua Solo si Hubo Cambios, Conservando la Anterior si es Mayor
+        if ultima_fecha is not None or ultima_modificacion is not None:
+            cursor.execute("""
+                INSERT INTO ingestion_watermark (fuente, ultima_fecha, ultima_modificacion, actualizado_en)
+                VALUES (?,?,?,?)
+                ON CONFLICT(fuente) DO UPDATE SET
+                    ultima_fecha = MAX(COALESCE(ultima_fecha, excluded.ultima_fecha), COALESCE(excluded.ultima_fecha, ultima_fecha)),
+                    ultima_modificacion = MAX(COALESCE(ultima_modificacion, excluded.ultima_modificacion), COALESCE(excluded.ultima_modificacion, ultima_modificacion)),
+                    actualizado_en = excluded.actualizado_en
+            """, (FUENTE_COVID, ultima_fecha, ultima_modificacion, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+        # Resúmenes en la Misma Transacción: Sumamos los Insertados y Recalculamos Solo los Meses Tocados
+        esquema.actualizar_resumen(conn, "covid_data", filas_agregadas=resumen["insertados"], meses=meses_afectados)
+        conn.commit()
+
+        duracion = time.perf_counter() - inicio
+        print(
+            f"Ingesta Incremental en {duracion:.3f} s: {resumen['insertados']} Insertados, "
+            f"{resumen['actualizados']} Actualizados, {resumen['sin_cambios']} Sin Cambios, "
+            f"{resumen['omitidos_por_marca']} Omitidos por la Marca de Agua"
+        )
+        return resumen
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"❌ Error en la Ingesta Incremental: {e}")
+        raise
+
+
+def obtener_watermark(conn, fuente=FUENTE_COVID):
+    """Consultamos la Última Fecha y lastModified Ingeridos para una Fuente"""
+    fila = conn.execute(
+        "SELECT ultima_fecha, ultima_modificacion, actualizado_en FROM ingestion_watermark WHERE fuente = ?;",
+        (fuente,)
+    ).fetchone()
+    if fila is None:
+        return None
+    return {"ultima_fecha": fila[0], "ultima_modificacion": fila[1], "actualizado_en": fila[2]}
+
+
+def origen_sin_cambios(conn, url=URL_API_COVID):
+    """Indicamos si el API Respondió sin Cambios (Caché Vigente o 304) y la Tabla ya Tiene Datos"""
+    if not _es_url_remota(url) or http_cache.fue_modificado(url):
+        return False
+    return conn.execute("SELECT EXISTS (SELECT 1 FROM covid_data);").fetchone()[0] == 1
+
+
+@metricas.instrumentar
+def generar_archivo_muestra(conn, filas_muestra=FILAS_MUESTRA_EXCEL):
+    """
+    Creamos un Archivo de Excel con los Registros de Muestra más Recientes (50 por Defecto).
+    Las Filas Pasan del Cursor de SQLite al Archivo sin Construir un DataFrame (ver salida_excel.py)
+    y se Leen Recorriendo el Índice de Fecha Hacia Atrás, sin Ordenar la Tabla.
+    """
+    if not salida_excel.GENERAR_EXCEL:
+        print("Generación del Archivo de Excel Omitida (GENERAR_EXCEL=0)")
+        return
+    try:
+        columnas = [
+            "date",
+            "positive",
+            "death",
+            "hospitalizedCurrently",
+            "totalTestResults",
+            "positiveIncrease",
+            "deathIncrease",
+        ]
+        query = f"""
+            SELECT {", ".join(columnas)}
             FROM covid_data
             ORDER BY date DESC
-            LIMIT 50
+            LIMIT ?
         """
-        df = pd.read_sql_query(query, conn)
-        df["timestamp"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        df.to_excel(XLSX_PATH, index=False)
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor = conn.execute(query, (filas_muestra,))
+        os.makedirs(os.path.dirname(XLSX_PATH), exist_ok=True)
+        salida_excel.escribir_filas(XLSX_PATH, columnas + ["timestamp"], (fila + (timestamp,) for fila in cursor))
         print(f"Archivo de Excel Generado en: {XLSX_PATH}")
     except Exception as e:
         print(f"❌ Error al Generar el Archivo de Excel: {e}")
         raise
 
 
-def generar_auditoria(api_datos, conn):
-    """Generamos un Pequeño Informe de Auditoría Comparando la API y la Base de Datos"""
+@metricas.instrumentar
+def generar_auditoria(api_datos, conn, resumen_incremental=None, total_extraidos=None):
+    """
+    Generamos un Pequeño Informe de Auditoría Comparando la API y la Base de Datos.
+    En Modo Streaming api_datos Solo Contiene el Primer Registro y total_extraidos el Conteo Real.
+    Los Datos de la Base se Leen de la Tabla de Resumen (ver esquema.py) en Lugar de Contar la Tabla.
+    Junto al Informe se Escribe el Perfil de 'covid_data' (ver perfilador.py), Leído por Bloques.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM covid_data;")
-        count_db = cursor.fetchone()[0]
-        count_api = len(api_datos)
+        resumen_db = esquema.leer_resumen(conn, "covid_data")
+        count_db = resumen_db["filas"]
+        count_api = len(api_datos) if total_extraidos is None else total_extraidos
        
         auditoria = (
             f"Registros COVID-19 Extraidos: {count_api}\n"
             f"Registros en DB: {count_db}\n"
             f"Consistencia: {'OK' if count_api == count_db else 'ERROR'}\n"
             f"Ultima Fecha Registrada: {api_datos[0]['date'] if api_datos else 'N/A'}\n"
+            f"Ultima Fecha en DB: {resumen_db['ultima_fecha'] if resumen_db['ultima_fecha'] is not None else 'N/A'}\n"
             f"Total Casos Positivos: {api_datos[0]['positive'] if api_datos else 'N/A'}\n"
             f"Total Fallecidos: {api_datos[0]['death'] if api_datos else 'N/A'}\n"
             f"Fecha/Hora Auditoria: {datetime.datetime.now()}\n"
         )
+        if resumen_incremental is not None:
+            auditoria += (
+                f"Modo de Ingesta: incremental\n"
+                f"Registros Insertados: {resumen_incremental['insertados']}\n"
+                f"Registros Actualizados: {resumen_incremental['actualizados']}\n"
+                f"Registros Sin Cambios: {resumen_incremental['sin_cambios']}\n"
+                f"Registros Omitidos por la Marca de Agua: {resumen_incremental['omitidos_por_marca']}\n"
+            )
+        if _es_url_remota(URL_API_COVID):
+            auditoria += f"{http_cache.resumen_estadisticas()}\n"
        
+        os.makedirs(os.path.dirname(AUDIT_PATH), exist_ok=True)
         with open(AUDIT_PATH, "w") as f:
             f.write(auditoria)
         print(f"Auditoría Generada en: {AUDIT_PATH}")
+        if perfilador.GENERAR_PERFIL:
+            perfilador.escribir_perfiles(AUDIT_PATH, {"covid_data": perfilador.perfilar_tabla(conn, "covid_data")})
     except Exception as e:
         print(f"❌ Error al Generar la Auditoría: {e}")
         raise
 
 
 def main():
-    """Orquestamos el Flujo de Extracción, Almacenamiento y Auditoría de Datos"""
+    """
+    Orquestamos el Flujo de Extracción, Almacenamiento y Auditoría de Datos.
+    Devolvemos False si el API no Reportó Cambios y se Omitió la Carga (True en otro Caso), para
+    que 'cli todo' Pueda Omitir también las Etapas Siguientes.
+    """
     try:
         print("Comenzando la Ingesta de Datos de COVID-19...")
-       
-        api_datos = extraer_datos_api()
-        print(f"¡Datos obtenidos! Se han obtenido {len(api_datos)} Registros Históricos del COVID-19 en EE.UU")
-
 
         conn = crear_db()
-        insertar_datos(conn, api_datos)
-        print("Los Datos del COVID-19 se han Almacenado en la Base de  Datos SQLite")
+        resumen_incremental = None
+        total_extraidos = None
+        if INGESTA_STREAMING:
+            # Los Registros Fluyen del API a SQLite por Lotes; Solo Guardamos el Primero para la Auditoría
+            registros = extraer_datos_api_stream()
+            primero = next(registros, None)
+            api_datos = [primero] if primero is not None else []
+            sin_cambios = origen_sin_cambios(conn)
+            if sin_cambios:
+                registros.close()
+                total_extraidos = esquema.leer_resumen(conn, "covid_data")["filas"]
+            else:
+                registros = itertools.chain(api_datos, registros)
+                if MODO_INGESTA == "incremental":
+                    resumen_incremental = insertar_datos_incremental(conn, registros)
+                    total_extraidos = sum(resumen_incremental.values())
+                else:
+                    total_extraidos = insertar_datos(conn, registros)
+                print(f"¡Datos obtenidos en Streaming! Se han Procesado {total_extraidos} Registros Históricos del COVID-19 en EE.UU")
+        else:
+            api_datos = extraer_datos_api()
+            print(f"¡Datos obtenidos! Se han obtenido {len(api_datos)} Registros Históricos del COVID-19 en EE.UU")
+            sin_cambios = origen_sin_cambios(conn)
+            if not sin_cambios:
+                if MODO_INGESTA == "incremental":
+                    resumen_incremental = insertar_datos_incremental(conn, api_datos)
+                else:
+                    insertar_datos(conn, api_datos)
 
+        if _es_url_remota(URL_API_COVID):
+            print(http_cache.resumen_estadisticas())
+        if sin_cambios:
+            # Nada Cambió en el Origen: Omitimos la Carga y la Regeneración del Excel de Muestra
+            print("El API no Reporta Cambios (Caché Vigente o 304): se Omite la Carga en la Base de Datos")
+        else:
+            print("Los Datos del COVID-19 se han Almacenado en la Base de  Datos SQLite")
+            generar_archivo_muestra(conn)
 
-        generar_archivo_muestra(conn)
-        generar_auditoria(api_datos, conn)
+        generar_auditoria(api_datos, conn, resumen_incremental, total_extraidos)
        
         conn.close()
         print("¡Proceso Finalizado con Éxito!")
+        return not sin_cambios
     except Exception as e:
         print(f"❌ Error en el Proceso Principal: {e}")
         raise
@@ -0,0 +1,317 @@
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import inspect
+import sqlite3
+import resource
+import threading
+import functools
+import tracemalloc
+from datetime import datetime
+
+"""
+Instrumentación ligera de las etapas del flujo. El decorador 'instrumentar' registra, por cada
+llamada a una función de ingestion.py, cleaning.py o enrichment.py:
+
+  - Tiempo de reloj y tiempo de CPU del hilo que la ejecuta.
+  - Pico de RSS del proceso desde que arrancó (no el de la llamada) y, si METRICAS_TRACEMALLOC=1,
+    el pico de memoria de Python durante la llamada (tracemalloc).
+  - Filas de entrada (DataFrames y listas recibidos) y de salida (DataFrame o lista devuelta).
+  - Bytes leídos y escritos por el proceso según /proc/self/io (solo Linux; incluye a los demás hilos).
+
+En las funciones generadoras se mide solo el tiempo que pasa dentro del generador (cada next),
+no el del código que consume sus valores, y las filas de salida son las de todos los valores entregados.
+
+Los registros se acumulan en memoria y se escriben al terminar el proceso, de una vez, en un archivo
+JSON Lines y en la tabla 'metrics' de ingestion.db, de modo que se pueden comparar las ejecuciones
+entre sí (python src/bigdata/metricas.py). Los procesos trabajadores del planificador reciben el
+identificador de la ejecución con iniciar_proceso_trabajador y escriben sus registros al cerrarse.
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Archivo JSON Lines con una Línea por Llamada Instrumentada
+RUTA_METRICAS_JSONL = os.path.join(BASE_DIR, "static", "metricas", "metricas.jsonl")
+
+# Base de Datos con la Tabla 'metrics'
+RUTA_BD_METRICAS = os.path.join(BASE_DIR, "static", "db", "ingestion.db")
+
+# Activamos o Desactivamos la Instrumentación (METRICAS=0 la Desactiva)
+METRICAS_ACTIVAS = os.environ.get("METRICAS", "1") == "1"
+
+# Medimos el Pico de Memoria con tracemalloc (Más Preciso pero Ralentiza la Ejecución)
+USAR_TRACEMALLOC = os.environ.get("METRICAS_TRACEMALLOC", "0") == "1"
+
+# Identificador de la Ejecución Actual (Agrupa las Métricas de una Misma Corrida; ver id_ejecucion)
+ID_EJECUCION = os.environ.get("METRICAS_ID_EJECUCION") or None
+
+_CANDADO_ESCRITURA = threading.Lock()
+_PROFUNDIDAD = threading.local()
+_PENDIENTES = []
+
+
+def id_ejecucion():
+    """Identificador de la ejecución actual (se genera con la fecha y hora en el primer uso)."""
+    global ID_EJECUCION
+    with _CANDADO_ESCRITURA:
+        if ID_EJECUCION is None:
+            ID_EJECUCION = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        return ID_EJECUCION
+
+
+def iniciar_proceso_trabajador(identificador):
+    """
+    Inicializador de los procesos trabajadores: registran con el identificador de la ejecución
+    que los lanzó y escriben sus métricas pendientes al cerrarse (atexit no corre en ellos).
+    """
+    from multiprocessing import util
+
+    global ID_EJECUCION
+    ID_EJECUCION = identificador
+    util.Finalize(None, vaciar, exitpriority=10)
+
+
+def _bytes_io():
+    """Leemos los bytes leídos y escritos por el proceso (rchar/wchar de /proc/self/io) o (None, None)."""
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as archivo:
+            valores = dict(linea.split(": ") for linea in archivo.read().splitlines())
+        return int(valores["rchar"]), int(valores["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _rss_pico_proceso_mb():
+    """
+    Pico de RSS del proceso desde que arrancó, en MB (ru_maxrss está en KB en Linux y en bytes en macOS).
+    No baja al terminar una llamada, así que no mide la memoria de cada función por separado.
+    """
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / (1024 * 1024) if sys.platform == "darwin" else maximo / 1024
+
+
+def contar_filas(valor):
+    """Contamos las filas de un DataFrame o lista; en una tupla, las del primer elemento que las tenga."""
+    if isinstance(valor, tuple):
+        for elemento in valor:
+            filas = contar_filas(elemento)
+            if filas is not None:
+                return filas
+        return None
+    if isinstance(valor, list) or (hasattr(valor, "shape") and hasattr(valor, "columns")):
+        return len(valor)
+    return None
+
+
+def crear_tabla_metricas(conexion):
+    """Creamos la tabla 'metrics' si no existe (y agregamos la columna renombrada a las tablas anteriores)."""
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            id_ejecucion TEXT,
+            etapa TEXT,
+            funcion TEXT,
+            inicio TEXT,
+            duracion_s REAL,
+            cpu_s REAL,
+            rss_pico_proceso_mb REAL,
+            memoria_pico_mb REAL,
+            filas_entrada INTEGER,
+            filas_salida INTEGER,
+            bytes_leidos INTEGER,
+            bytes_escritos INTEGER,
+            error TEXT
+        )
+    """)
+    columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(metrics)")}
+    if "rss_pico_proceso_mb" not in columnas:
+        conexion.execute("ALTER TABLE metrics ADD COLUMN rss_pico_proceso_mb REAL")
+
+
+def registrar(metrica):
+    """Acumulamos una métrica en memoria hasta que se llame a vaciar (seguro entre hilos)."""
+    with _CANDADO_ESCRITURA:
+        _PENDIENTES.append(metrica)
+
+
+def vaciar():
+    """
+    Escribimos las métricas acumuladas en el archivo JSON Lines y en la tabla 'metrics' (una sola
+    transacción). Se llama al terminar el proceso; puede llamarse antes para escribir lo acumulado.
+    """
+    with _CANDADO_ESCRITURA:
+        metricas = _PENDIENTES[:]
+        del _PENDIENTES[:]
+    if not metricas:
+        return
+    os.makedirs(os.path.dirname(RUTA_METRICAS_JSONL), exist_ok=True)
+    with open(RUTA_METRICAS_JSONL, "a", encoding="utf-8") as archivo:
+        archivo.writelines(json.dumps(metrica, ensure_ascii=False) + "\n" for metrica in metricas)
+    try:
+        conexion = sqlite3.connect(RUTA_BD_METRICAS, timeout=30)
+        try:
+            with conexion:
+                crear_tabla_metricas(conexion)
+                columnas = list(metricas[0])
+                conexion.executemany(
+                    f"INSERT INTO metrics ({', '.join(columnas)}) VALUES ({', '.join('?' for _ in columnas)})",
+                    [[metrica[columna] for columna in columnas] for metrica in metricas],
+                )
+        finally:
+            conexion.close()
+    except sqlite3.Error as e:
+        print(f"No se Pudieron Registrar las Métricas en la Base de Datos: {e}")
+
+
+atexit.register(vaciar)
+
+
+def _metrica(etapa, funcion, inicio, duracion, cpu, filas, filas_salida, bytes_io, memoria_pico, error):
+    """Armamos el registro de una llamada medida (ver registrar)."""
+    filas_entrada = [valor for valor in filas if valor is not None]
+    return {
+        "id_ejecucion": id_ejecucion(),
+        "etapa": etapa,
+        "funcion": funcion.__name__,
+        "inicio": inicio.isoformat(timespec="milliseconds"),
+        "duracion_s": round(duracion, 6),
+        "cpu_s": round(cpu, 6),
+        "rss_pico_proceso_mb": round(_rss_pico_proceso_mb(), 3),
+        "memoria_pico_mb": memoria_pico,
+        "filas_entrada": sum(filas_entrada) if filas_entrada else None,
+        "filas_salida": filas_salida,
+        "bytes_leidos": bytes_io[0],
+        "bytes_escritos": bytes_io[1],
+        "error": error,
+    }
+
+
+def _instrumentar_generador(funcion, etapa):
+    """Versión de 'instrumentar' para funciones generadoras: acumula solo lo medido dentro de cada next."""
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not METRICAS_ACTIVAS:
+            return (yield from funcion(*args, **kwargs))
+
+        filas = [contar_filas(valor) for valor in list(args) + list(kwargs.values())]
+        generador = funcion(*args, **kwargs)
+        inicio = datetime.now()
+        duracion, cpu, leidos, escritos = 0.0, 0.0, None, None
+        filas_salida, error = None, None
+        try:
+            while True:
+                leidos_inicio, escritos_inicio = _bytes_io()
+                reloj_inicio, cpu_inicio = time.perf_counter(), time.thread_time()
+                try:
+                    valor = next(generador)
+                except StopIteration as fin:
+                    return fin.value
+                finally:
+                    duracion += time.perf_counter() - reloj_inicio
+                    cpu += time.thread_time() - cpu_inicio
+                    leidos_fin, escritos_fin = _bytes_io()
+                    if leidos_inicio is not None:
+                        leidos = (leidos or 0) + leidos_fin - leidos_inicio
+                        escritos = (escritos or 0) + escritos_fin - escritos_inicio
+                filas_valor = contar_filas(valor)
+                if filas_valor is not None:
+                    filas_salida = (filas_salida or 0) + filas_valor
+                yield valor
+        except GeneratorExit:
+            # El consumidor dejó de iterar antes del final: no es un error del generador
+            generador.close()
+            raise
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            bytes_io = (leidos, escritos)
+            registrar(_metrica(etapa, funcion, inicio, duracion, cpu, filas, filas_salida, bytes_io, None, error))
+
+    return envoltura
+
+
+def instrumentar(funcion):
+    """Decorador que mide cada llamada a la función y registra el resultado (ver docstring del módulo)."""
+    # Usamos el nombre del archivo para que la etapa no quede como '__main__' al correr el módulo como script
+    etapa = os.path.splitext(os.path.basename(funcion.__globals__.get("__file__") or funcion.__module__))[0]
+    if inspect.isgeneratorfunction(funcion):
+        return _instrumentar_generador(funcion, etapa)
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not METRICAS_ACTIVAS:
+            return funcion(*args, **kwargs)
+
+        # Solo la llamada más externa de cada hilo mide tracemalloc, para no reiniciar el pico de otra
+        profundidad = getattr(_PROFUNDIDAD, "valor", 0)
+        medir_memoria = USAR_TRACEMALLOC and profundidad == 0
+        if medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        filas = [contar_filas(valor) for valor in list(args) + list(kwargs.values())]
+        leidos_inicio, escritos_inicio = _bytes_io()
+        inicio = datetime.now()
+        reloj_inicio, cpu_inicio = time.perf_counter(), time.thread_time()
+        resultado, error = None, None
+        _PROFUNDIDAD.valor = profundidad + 1
+        try:
+            resultado = funcion(*args, **kwargs)
+            return resultado
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _PROFUNDIDAD.valor = profundidad
+            duracion, cpu = time.perf_counter() - reloj_inicio, time.thread_time() - cpu_inicio
+            leidos_fin, escritos_fin = _bytes_io()
+            bytes_io = (None, None)
+            if leidos_inicio is not None:
+                bytes_io = (leidos_fin - leidos_inicio, escritos_fin - escritos_inicio)
+            memoria_pico = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3) if medir_memoria else None
+            registrar(_metrica(
+                etapa, funcion, inicio, duracion, cpu, filas, contar_filas(resultado), bytes_io, memoria_pico, error,
+            ))
+
+    return envoltura
+
+
+def comparar_ejecuciones(conexion, ejecuciones=2):
+    """
+    Comparamos la duración total por función de las últimas ejecuciones registradas.
+
+    Retorna:
+        Lista de identificadores (de la más antigua a la más reciente) y diccionario
+        funcion -> lista de duraciones (None si la función no se ejecutó).
+    """
+    crear_tabla_metricas(conexion)
+    ids = [fila[0] for fila in conexion.execute(
+        "SELECT id_ejecucion FROM metrics GROUP BY id_ejecucion ORDER BY MIN(inicio) DESC LIMIT ?", (ejecuciones,)
+    )][::-1]
+    tabla = {}
+    for posicion, id_ejecucion in enumerate(ids):
+        for etapa, funcion, duracion in conexion.execute(
+            "SELECT etapa, funcion, SUM(duracion_s) FROM metrics WHERE id_ejecucion = ? GROUP BY etapa, funcion",
+            (id_ejecucion,),
+        ):
+            tabla.setdefault(f"{etapa}.{funcion}", [None] * len(ids))[posicion] = duracion
+    return ids, tabla
+
+
+if __name__ == "__main__":
+    conexion = sqlite3.connect(RUTA_BD_METRICAS)
+    try:
+        ids, tabla = comparar_ejecuciones(conexion, int(sys.argv[1]) if len(sys.argv) > 1 else 2)
+    finally:
+        conexion.close()
+    if not ids:
+        sys.exit("No hay métricas registradas.")
+    print("=== DURACIÓN POR FUNCIÓN (s) ===")
+    print(f"{'funcion':<55}" + "".join(f"{id_ejecucion[:15]:>17}" for id_ejecucion in ids))
+    for nombre, duraciones in sorted(tabla.items()):
+        celdas = "".join(f"{duracion:>17.3f}" if duracion is not None else f"{'-':>17}" for duracion in duraciones)
+        print(f"{nombre:<55}{celdas}")
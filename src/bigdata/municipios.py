@@ -0,0 +1,114 @@
+import sqlite3
+import unicodedata
+import pandas as pd
+import esquema
+
+"""
+Dimensión de municipios compartida por las fuentes externas del enriquecimiento (EA3).
+Los nombres llegan escritos de forma distinta en cada fuente ("ITAGUI" en el CSV de delitos,
+"Itagüí" en la API de bovinos), por lo que aquí:
+
+  - Normalizamos cada nombre a una clave sin tildes, en minúsculas y con espacios simples.
+  - Guardamos cada clave una sola vez en la tabla 'dim_municipio' de ingestion.db con un
+    identificador entero estable entre ejecuciones.
+  - Asignamos a cada fuente la columna entera 'id_municipio', de modo que los merge se hacen
+    sobre enteros en lugar de cadenas de texto.
+"""
+
+# Tabla de la Dimensión en la Base de Datos
+TABLA_DIMENSION = "dim_municipio"
+
+# Columna con la Clave Sustituta que se Agrega a Cada Fuente
+COLUMNA_ID = "id_municipio"
+
+
+def normalizar_nombre(nombre):
+    """Convertimos un nombre de municipio en su clave normalizada (sin tildes, minúsculas, espacios simples)."""
+    if nombre is None or (isinstance(nombre, float) and pd.isna(nombre)):
+        return None
+    descompuesto = unicodedata.normalize("NFKD", str(nombre).casefold())
+    sin_tildes = "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+    limpio = "".join(caracter if caracter.isalnum() else " " for caracter in sin_tildes)
+    return " ".join(limpio.split()) or None
+
+
+def normalizar_serie(serie):
+    """Normalizamos una columna de nombres calculando la clave una sola vez por valor distinto."""
+    claves = {valor: normalizar_nombre(valor) for valor in serie.dropna().unique()}
+    return serie.map(claves)
+
+
+def crear_dimension(conexion):
+    """Creamos la tabla de la dimensión si no existe."""
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_DIMENSION} (
+            id_municipio INTEGER PRIMARY KEY,
+            clave TEXT NOT NULL UNIQUE,
+            nombre TEXT
+        )
+    """)
+
+
+def actualizar_dimension(conexion, nombres):
+    """
+    Registramos en la dimensión las claves que aún no existen y devolvemos el mapeo completo.
+
+    Parámetros:
+        conexion: Conexión SQLite donde vive la dimensión.
+        nombres: Iterable de nombres de municipio tal como llegan de las fuentes.
+
+    Retorna:
+        Diccionario clave normalizada -> id_municipio.
+    """
+    crear_dimension(conexion)
+    cambios_previos = conexion.total_changes
+    nuevos = {}
+    for nombre in nombres:
+        clave = normalizar_nombre(nombre)
+        if clave is not None:
+            nuevos.setdefault(clave, str(nombre).strip())
+    conexion.executemany(
+        f"INSERT OR IGNORE INTO {TABLA_DIMENSION} (clave, nombre) VALUES (?, ?)",
+        list(nuevos.items()),
+    )
+    if conexion.total_changes != cambios_previos:
+        esquema.registrar_version(conexion, TABLA_DIMENSION)
+    conexion.commit()
+    return dict(conexion.execute(f"SELECT clave, id_municipio FROM {TABLA_DIMENSION}").fetchall())
+
+
+def asignar_ids(df, mapeo, columna="municipio"):
+    """
+    Agregamos la columna entera 'id_municipio' a partir de los nombres de la columna indicada.
+    Los nombres sin clave quedan con -1, que nunca coincide en un merge.
+    """
+    claves = normalizar_serie(df[columna])
+    df[COLUMNA_ID] = claves.map(mapeo).fillna(-1).astype("int32")
+    return df
+
+
+def construir_dimension(ruta_bd, *fuentes, columna="municipio"):
+    """
+    Registramos en la dimensión los municipios de todas las fuentes y les asignamos 'id_municipio'.
+
+    Parámetros:
+        ruta_bd: Ruta de la base de datos donde se guarda la dimensión.
+        fuentes: DataFrames con la columna de nombres de municipio.
+    """
+    nombres = [valor for df in fuentes if columna in df.columns for valor in df[columna].dropna().unique()]
+    conexion = sqlite3.connect(ruta_bd)
+    try:
+        mapeo = actualizar_dimension(conexion, nombres)
+    finally:
+        conexion.close()
+    for df in fuentes:
+        if columna in df.columns:
+            asignar_ids(df, mapeo, columna)
+    return mapeo
+
+
+def tasa_coincidencia(izquierda, derecha):
+    """Porcentaje de filas de 'izquierda' cuyo id_municipio aparece en 'derecha'."""
+    if len(izquierda) == 0:
+        return 0.0
+    return float(izquierda[COLUMNA_ID].isin(derecha[COLUMNA_ID].unique()).mean() * 100)
@@ -0,0 +1,426 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+import metricas
+from datetime import datetime
+
+"""
+Perfil de calidad de datos en una sola pasada por bloques, con memoria constante por columna.
+Por cada columna se mantiene:
+
+  - Nulos, no nulos y valores no numéricos (conteos exactos).
+  - Mínimo y máximo (de los valores numéricos o, si la columna es de texto, del texto).
+  - Valores distintos estimados con HyperLogLog (2^PRECISION_HLL registros de un byte). Mientras
+    haya pocos valores distintos se guardan además sus huellas (hasta ocupar lo mismo que los
+    registros), como en la representación dispersa de HyperLogLog++, y el conteo es exacto.
+  - Cuantiles estimados con un t-digest de compresión COMPRESION_TDIGEST (centroides media/peso).
+  - Duplicados estimados (no nulos menos distintos); para la tabla, filas duplicadas estimadas
+    con un HyperLogLog de 2^PRECISION_HLL_FILAS registros sobre la huella de cada fila.
+
+El estado de un perfil es un diccionario de contadores y arreglos de NumPy que se puede
+serializar con pickle; combinar_perfiles une los perfiles parciales de distintos bloques o
+procesos con el mismo resultado que si se hubieran procesado juntos (salvo el redondeo del t-digest).
+Los números y su versión en texto ('5' y 5.0) cuentan como el mismo valor, igual que en la limpieza.
+
+Los perfiles se escriben en JSON junto a cada auditoría .txt (mismo nombre, extensión .json).
+Para comparar las estimaciones con los valores exactos: python src/bigdata/perfilador.py --filas 1000000
+"""
+
+# Generamos los Perfiles de Datos junto a las Auditorías (Desactivar con PERFIL_DATOS=0)
+GENERAR_PERFIL = os.environ.get("PERFIL_DATOS", "1") == "1"
+
+# Precisión de HyperLogLog: 2^p Registros por Columna (Error Relativo ~1.04/sqrt(2^p); entre 11 y 18)
+PRECISION_HLL = min(18, max(11, int(os.environ.get("PERFIL_PRECISION_HLL", "12"))))
+
+# Precisión del HyperLogLog de las Huellas de Fila (las Filas Duplicadas son una Diferencia de Dos
+# Conteos Grandes, así que Necesitan más Registros que una Columna)
+PRECISION_HLL_FILAS = min(18, max(11, int(os.environ.get("PERFIL_PRECISION_HLL_FILAS", "16"))))
+
+# Compresión del t-digest (Máximo de Centroides por Columna ~ Compresión / 2)
+COMPRESION_TDIGEST = int(os.environ.get("PERFIL_COMPRESION_TDIGEST", "200"))
+
+# Cuantiles que se Reportan
+CUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Filas por Bloque al Perfilar un DataFrame o una Tabla de SQLite
+TAMANO_BLOQUE_PERFIL = 50_000
+
+# Huella de los Valores Nulos y Multiplicador para Combinar las Huellas de una Fila
+_HUELLA_NULO = np.uint64(0x9E3779B97F4A7C15)
+_PRIMO_FILA = np.uint64(0x100000001B3)
+
+
+# 1. HyperLogLog
+
+def _hll_vacio(precision=None):
+    """HyperLogLog vacío: registros y huellas exactas (None cuando superan el límite)."""
+    return {"registros": np.zeros(1 << (precision or PRECISION_HLL), dtype=np.uint8), "huellas": np.empty(0, dtype=np.uint64)}
+
+
+def _unir_huellas(hll, huellas):
+    """Unimos huellas exactas; si superan 1/8 del número de registros (misma memoria) las descartamos."""
+    if hll["huellas"] is None or huellas is None:
+        hll["huellas"] = None
+        return
+    unidas = np.union1d(hll["huellas"], huellas)
+    hll["huellas"] = unidas if len(unidas) <= len(hll["registros"]) // 8 else None
+
+
+def _agregar_hll(hll, huellas):
+    """
+    Agregamos huellas de 64 bits: los primeros p bits eligen el registro y el rango es la posición
+    del primer bit en 1 de los restantes (64 - p <= 53 bits, exactos en float64).
+    """
+    if not len(huellas):
+        return
+    registros = hll["registros"]
+    p = int(np.log2(len(registros)))
+    indices = (huellas >> np.uint64(64 - p)).astype(np.intp)
+    restantes = (huellas & np.uint64((1 << (64 - p)) - 1)).astype(np.float64)
+    rangos = (64 - p) - np.frexp(restantes)[1] + 1
+    np.maximum.at(registros, indices, rangos.astype(np.uint8))
+    _unir_huellas(hll, huellas)
+
+
+def _combinar_hll(destino, origen):
+    """Combinamos dos HyperLogLog (máximo por registro y unión de las huellas exactas)."""
+    np.maximum(destino["registros"], origen["registros"], out=destino["registros"])
+    _unir_huellas(destino, origen["huellas"])
+
+
+def estimar_distintos(hll):
+    """
+    Conteo exacto si aún se guardan las huellas; si no, estimación de HyperLogLog con la corrección
+    de conteo lineal para cardinalidades pequeñas.
+    """
+    if hll["huellas"] is not None:
+        return len(hll["huellas"])
+    registros = hll["registros"]
+    m = len(registros)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimacion = alfa * m * m / np.sum(np.ldexp(1.0, -registros.astype(np.int64)))
+    vacios = int(np.count_nonzero(registros == 0))
+    if estimacion <= 2.5 * m and vacios:
+        estimacion = m * np.log(m / vacios)
+    return int(round(estimacion))
+
+
+# 2. t-digest
+
+def _comprimir_digest(medias, pesos):
+    """
+    Agrupamos los centroides ordenados según la función de escala k1 del t-digest: cada grupo
+    abarca como máximo una unidad de k(q) = compresión / (2π) · asin(2q - 1), lo que deja centroides
+    pequeños en las colas (cuantiles extremos precisos) y grandes en el centro.
+    """
+    if len(medias) <= 1:
+        return medias, pesos
+    orden = np.argsort(medias, kind="mergesort")
+    medias, pesos = medias[orden], pesos[orden]
+    acumulado = np.cumsum(pesos)
+    centro = (acumulado - pesos / 2) / acumulado[-1]
+    escala = COMPRESION_TDIGEST / (2 * np.pi) * np.arcsin(2 * centro - 1)
+    grupos = np.floor(escala).astype(np.int64)
+    grupos -= grupos[0]
+    peso_grupo = np.bincount(grupos, weights=pesos)
+    suma_grupo = np.bincount(grupos, weights=medias * pesos)
+    ocupados = peso_grupo > 0
+    return suma_grupo[ocupados] / peso_grupo[ocupados], peso_grupo[ocupados]
+
+
+def _agregar_digest(estado, valores):
+    """Agregamos valores (peso 1) a los centroides de la columna."""
+    if not len(valores):
+        return
+    estado["medias"], estado["pesos"] = _comprimir_digest(
+        np.concatenate([estado["medias"], valores]), np.concatenate([estado["pesos"], np.ones(len(valores))])
+    )
+
+
+def estimar_cuantiles(estado, cuantiles=CUANTILES):
+    """Interpolamos los cuantiles entre los centros acumulados de los centroides (acotados por mínimo y máximo)."""
+    medias, pesos = estado["medias"], estado["pesos"]
+    if not len(medias):
+        return {f"p{int(q * 100):02d}": None for q in cuantiles}
+    acumulado = np.cumsum(pesos)
+    total = acumulado[-1]
+    posiciones = np.concatenate([[0.0], acumulado - pesos / 2, [total]])
+    valores = np.concatenate([[estado["minimo"]], medias, [estado["maximo"]]])
+    return {f"p{int(q * 100):02d}": float(np.interp(q * total, posiciones, valores)) for q in cuantiles}
+
+
+# 3. Estado del Perfil
+
+def _columna_vacia():
+    """Estado inicial de una columna."""
+    return {
+        "nulos": 0,
+        "no_nulos": 0,
+        "no_numericos": 0,
+        "minimo": None,
+        "maximo": None,
+        "minimo_texto": None,
+        "maximo_texto": None,
+        "distintos": _hll_vacio(),
+        "medias": np.empty(0),
+        "pesos": np.empty(0),
+    }
+
+
+def nuevo_perfil():
+    """Perfil vacío: filas, HyperLogLog de las huellas de fila y estado por columna."""
+    return {"filas": 0, "filas_distintas": _hll_vacio(PRECISION_HLL_FILAS), "columnas": {}}
+
+
+def _menor(a, b):
+    """Mínimo que ignora los None."""
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _mayor(a, b):
+    """Máximo que ignora los None."""
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _huellas(valores):
+    """Huellas de 64 bits de un arreglo (vacío si no hay valores)."""
+    return pd.util.hash_array(valores) if len(valores) else np.empty(0, dtype=np.uint64)
+
+
+def _separar_valores(serie):
+    """
+    Separamos los valores no nulos de una columna en números (float64) y textos. Las columnas de
+    objetos y categóricas se factorizan primero, de modo que la conversión a número, las huellas y
+    el mínimo y máximo del texto se calculan una vez por valor distinto del bloque.
+
+    Retorna:
+        Diccionario con la máscara de nulos, los números (uno por fila numérica), la cantidad de
+        valores no numéricos, los textos distintos, la huella de cada valor no nulo y las huellas distintas.
+    """
+    nulos = serie.isna().to_numpy()
+    valores = serie[~nulos]
+    if is_datetime64_any_dtype(valores):
+        valores = valores.astype(str)
+    if is_numeric_dtype(valores) and not is_bool_dtype(valores):
+        numeros = valores.to_numpy(dtype=np.float64)
+        huellas = _huellas(numeros)
+        return {
+            "nulos": nulos, "numeros": numeros, "no_numericos": 0, "textos": np.empty(0, dtype=object),
+            "huellas": huellas, "huellas_distintas": huellas,
+        }
+    codigos, unicos = pd.factorize(valores.astype(object))
+    convertidos = pd.to_numeric(pd.Series(unicos, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+    es_numero = ~np.isnan(convertidos)
+    textos = pd.Series(unicos[~es_numero], dtype=object).astype(str).to_numpy(dtype=object)
+    huellas_unicos = np.empty(len(unicos), dtype=np.uint64)
+    huellas_unicos[es_numero] = _huellas(convertidos[es_numero])
+    huellas_unicos[~es_numero] = _huellas(textos)
+    numero_por_fila = es_numero[codigos]
+    return {
+        "nulos": nulos,
+        "numeros": convertidos[codigos][numero_por_fila],
+        "no_numericos": int((~numero_por_fila).sum()),
+        "textos": textos,
+        "huellas": huellas_unicos[codigos],
+        "huellas_distintas": huellas_unicos,
+    }
+
+
+def _actualizar_columna(estado, serie):
+    """Actualizamos el estado de una columna con un bloque y devolvemos la huella de cada fila (nulos incluidos)."""
+    separados = _separar_valores(serie)
+    nulos, numeros, textos = separados["nulos"], separados["numeros"], separados["textos"]
+
+    estado["nulos"] += int(nulos.sum())
+    estado["no_nulos"] += len(separados["huellas"])
+    estado["no_numericos"] += separados["no_numericos"]
+    _agregar_hll(estado["distintos"], separados["huellas_distintas"])
+    if len(numeros):
+        estado["minimo"] = _menor(estado["minimo"], float(numeros.min()))
+        estado["maximo"] = _mayor(estado["maximo"], float(numeros.max()))
+        _agregar_digest(estado, numeros[np.isfinite(numeros)])
+    if len(textos):
+        estado["minimo_texto"] = _menor(estado["minimo_texto"], min(textos))
+        estado["maximo_texto"] = _mayor(estado["maximo_texto"], max(textos))
+
+    huellas = np.full(len(nulos), _HUELLA_NULO, dtype=np.uint64)
+    huellas[~nulos] = separados["huellas"]
+    return huellas
+
+
+def actualizar_perfil(perfil, df):
+    """Agregamos un bloque (DataFrame) al perfil. Retorna el mismo perfil, modificado."""
+    perfil["filas"] += len(df)
+    huellas_filas = np.zeros(len(df), dtype=np.uint64)
+    for columna, serie in df.items():
+        estado = perfil["columnas"].setdefault(str(columna), _columna_vacia())
+        huellas_filas = (huellas_filas ^ _actualizar_columna(estado, serie)) * _PRIMO_FILA
+    if len(df):
+        _agregar_hll(perfil["filas_distintas"], pd.util.hash_array(huellas_filas))
+    return perfil
+
+
+def combinar_perfiles(*perfiles):
+    """
+    Combinamos perfiles parciales (de bloques o procesos distintos) en uno nuevo: los conteos se
+    suman, los mínimos y máximos se comparan, los registros de HyperLogLog se combinan con el
+    máximo (y sus huellas exactas con la unión) y los centroides de los t-digest se unen y se vuelven a comprimir.
+    """
+    combinado = nuevo_perfil()
+    for perfil in perfiles:
+        combinado["filas"] += perfil["filas"]
+        _combinar_hll(combinado["filas_distintas"], perfil["filas_distintas"])
+        for columna, estado in perfil["columnas"].items():
+            destino = combinado["columnas"].setdefault(columna, _columna_vacia())
+            for contador in ("nulos", "no_nulos", "no_numericos"):
+                destino[contador] += estado[contador]
+            for clave in ("minimo", "minimo_texto"):
+                destino[clave] = _menor(destino[clave], estado[clave])
+            for clave in ("maximo", "maximo_texto"):
+                destino[clave] = _mayor(destino[clave], estado[clave])
+            _combinar_hll(destino["distintos"], estado["distintos"])
+            destino["medias"], destino["pesos"] = _comprimir_digest(
+                np.concatenate([destino["medias"], estado["medias"]]),
+                np.concatenate([destino["pesos"], estado["pesos"]]),
+            )
+    return combinado
+
+
+# 4. Perfilado de Bloques, DataFrames y Tablas
+
+@metricas.instrumentar
+def perfilar_bloques(bloques):
+    """Perfilamos un iterable de DataFrames en una sola pasada."""
+    perfil = nuevo_perfil()
+    for bloque in bloques:
+        actualizar_perfil(perfil, bloque)
+    return perfil
+
+
+def perfilar_dataframe(df, tamano_bloque=TAMANO_BLOQUE_PERFIL):
+    """Perfilamos un DataFrame en memoria recorriéndolo por bloques."""
+    return perfilar_bloques(df.iloc[inicio:inicio + tamano_bloque] for inicio in range(0, len(df), tamano_bloque))
+
+
+def perfilar_tabla(conexion, tabla, tamano_bloque=TAMANO_BLOQUE_PERFIL):
+    """Perfilamos una tabla de SQLite leyéndola por bloques (sin cargarla completa)."""
+    return perfilar_bloques(pd.read_sql_query(f'SELECT * FROM "{tabla}"', conexion, chunksize=tamano_bloque))
+
+
+# 5. Resumen y Escritura
+
+def resumir_perfil(perfil):
+    """Convertimos el estado del perfil en un diccionario serializable en JSON."""
+    filas_distintas = min(perfil["filas"], estimar_distintos(perfil["filas_distintas"]))
+    columnas = {}
+    for columna, estado in perfil["columnas"].items():
+        distintos = min(estado["no_nulos"], estimar_distintos(estado["distintos"]))
+        numericos = estado["no_nulos"] - estado["no_numericos"]
+        tipo = "vacia" if not estado["no_nulos"] else "numerica" if not estado["no_numericos"] else (
+            "texto" if not numericos else "mixta"
+        )
+        resumen = {
+            "tipo": tipo,
+            "nulos": estado["nulos"],
+            "no_nulos": estado["no_nulos"],
+            "no_numericos": estado["no_numericos"],
+            "distintos_estimados": distintos,
+            "duplicados_estimados": estado["no_nulos"] - distintos,
+        }
+        if numericos:
+            resumen.update(minimo=estado["minimo"], maximo=estado["maximo"], cuantiles=estimar_cuantiles(estado))
+        else:
+            resumen.update(minimo=estado["minimo_texto"], maximo=estado["maximo_texto"])
+        columnas[columna] = resumen
+    return {
+        "filas": perfil["filas"],
+        "filas_distintas_estimadas": filas_distintas,
+        "filas_duplicadas_estimadas": perfil["filas"] - filas_distintas,
+        "columnas": columnas,
+    }
+
+
+def ruta_perfil(ruta_auditoria):
+    """Ruta del perfil JSON que acompaña a una auditoría .txt."""
+    return os.path.splitext(ruta_auditoria)[0] + ".json"
+
+
+def escribir_perfiles(ruta_auditoria, perfiles):
+    """
+    Escribimos en JSON, junto a la auditoría, el resumen de cada perfil (nombre -> perfil).
+
+    Retorna:
+        Ruta del archivo escrito.
+    """
+    ruta = ruta_perfil(ruta_auditoria)
+    contenido = {
+        "generado_en": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {
+            "precision_hll": PRECISION_HLL,
+            "error_relativo_hll": round(1.04 / np.sqrt(1 << PRECISION_HLL), 4),
+            "precision_hll_filas": PRECISION_HLL_FILAS,
+            "compresion_tdigest": COMPRESION_TDIGEST,
+        },
+        "perfiles": {nombre: resumir_perfil(perfil) for nombre, perfil in perfiles.items()},
+    }
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(contenido, archivo, ensure_ascii=False, indent=2)
+    print(f"Perfil de Datos Generado en: {ruta}")
+    return ruta
+
+
+# 6. Comparación con los Valores Exactos
+
+def comparar_con_exacto(filas, bloques=8, semilla=42):
+    """
+    Perfilamos un DataFrame sintético en 'bloques' perfiles parciales que luego se combinan,
+    y comparamos distintos, duplicados y cuantiles con los valores exactos de pandas.
+
+    Retorna:
+        Lista de diccionarios (columna, métrica, exacto, estimado, error relativo) y el tiempo del perfil.
+    """
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "fecha": rng.integers(20200101, 20201231, filas),
+        "casos": np.where(rng.random(filas) < 0.05, np.nan, rng.lognormal(8, 2, filas).round()),
+        "municipio": rng.choice([f"MUNICIPIO {i}" for i in range(1_000)], filas),
+    })
+    df = pd.concat([df, df.sample(frac=0.1, random_state=semilla)], ignore_index=True)
+
+    inicio = time.perf_counter()
+    tamano = -(-len(df) // bloques)
+    parciales = [perfilar_dataframe(df.iloc[i:i + tamano]) for i in range(0, len(df), tamano)]
+    resumen = resumir_perfil(combinar_perfiles(*parciales))
+    duracion = time.perf_counter() - inicio
+
+    def _fila(columna, metrica, exacto, estimado):
+        error = abs(estimado - exacto) / abs(exacto) if exacto else 0.0
+        return {"columna": columna, "metrica": metrica, "exacto": exacto, "estimado": estimado, "error": error}
+
+    resultados = [_fila("(filas)", "duplicadas", int(df.duplicated().sum()), resumen["filas_duplicadas_estimadas"])]
+    for columna in df.columns:
+        resultados.append(_fila(columna, "distintos", int(df[columna].nunique()), resumen["columnas"][columna]["distintos_estimados"]))
+    for nombre, estimado in resumen["columnas"]["casos"]["cuantiles"].items():
+        resultados.append(_fila("casos", nombre, float(df["casos"].quantile(int(nombre[1:]) / 100)), estimado))
+    return resultados, duracion
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara el perfil estimado con los valores exactos.")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--bloques", type=int, default=8, help="Perfiles parciales que se combinan.")
+    opciones = parser.parse_args()
+
+    resultados, duracion = comparar_con_exacto(opciones.filas, opciones.bloques)
+    print(f"=== PERFIL ESTIMADO VS EXACTO ({opciones.filas:,} filas + 10% duplicadas, {opciones.bloques} bloques) ===")
+    for fila in resultados:
+        print(
+            f"  {fila['columna']:<10} {fila['metrica']:<11} exacto {fila['exacto']:>16,.1f}  "
+            f"estimado {fila['estimado']:>16,.1f}  error {fila['error']:>7.2%}"
+        )
+    print(f"Tiempo del Perfil: {duracion:.2f} s")
@@ -0,0 +1,416 @@
+import os
+import sys
+import time
+import pickle
+import sqlite3
+import hashlib
+import argparse
+import pandas as pd
+from graphlib import TopologicalSorter
+
+import ingestion
+import cleaning
+import enrichment
+import almacenamiento
+import esquema
+import http_cache
+import socrata
+import municipios
+import planificador
+import salida_excel
+import series_tiempo
+import perfilador
+
+"""
+Ejecutor del flujo completo (EA1 -> EA2 -> EA3) modelado como un grafo de dependencias:
+
+  extraer_datos_api -> insertar_datos -> simular_datos_sucios -> operaciones_de_limpieza --+--> series_tiempo
+                                     +--> generar_archivo_muestra                         |
+  leer_delitos_informaticos --+                                                           +-> enriquecer
+  leer_inventario_bovinos ----+-> dimension_municipios -> integrar_fuentes_externas ------+
+
+Los DataFrames pasan en memoria de un nodo a otro (sin releer SQLite ni CSV entre etapas) y los
+nodos independientes se ejecutan en paralelo con el planificador (hilos para E/S, procesos para
+cálculo): las lecturas externas se solapan con la ingesta y el Excel de muestra con la limpieza.
+Los nodos que escriben en ingestion.db son de tipo 'db' y el planificador los ejecuta uno tras
+otro en un único hilo, de modo que nunca hay dos escritores de SQLite a la vez.
+Cada nodo calcula una huella a partir del código de los módulos que usa y de las huellas de
+sus entradas; si coincide con la guardada en la caché, el nodo se omite y se reutiliza su salida.
+Los nodos fuente (sin dependencias) siempre se ejecutan y su huella es la de su salida, de modo
+que un cambio en el API o en el CSV invalida solo los nodos que dependen de él.
+Los nodos que escriben archivos o tablas (ARTEFACTOS) guardan además la huella de esas salidas
+(tamaño y fecha de modificación de los archivos, versión de las tablas): si se borraron o
+cambiaron fuera del pipeline, el nodo vuelve a ejecutarse aunque su huella coincida.
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Carpeta Donde se Guardan las Salidas de Cada Nodo y su Huella
+RUTA_CACHE_PIPELINE = os.path.join(BASE_DIR, "static", "cache", "pipeline")
+
+# Huella de las Tablas por su Contenido Completo en Lugar de su Versión (Lee y Recorre Cada Tabla)
+HUELLA_TABLAS_POR_CONTENIDO = os.environ.get("PIPELINE_HUELLA_CONTENIDO", "0") == "1"
+
+
+# 1. Huellas
+
+def huella_valor(valor):
+    """Calculamos una huella estable de una salida (DataFrame, lista, tupla, diccionario u objeto serializable)."""
+    resumen = hashlib.sha256()
+    if isinstance(valor, pd.DataFrame):
+        resumen.update(repr(list(zip(valor.columns, map(str, valor.dtypes)))).encode("utf-8"))
+        if len(valor):
+            filas = pd.util.hash_pandas_object(valor, index=False).to_numpy()
+            resumen.update(filas.tobytes())
+    elif isinstance(valor, (tuple, list)) and any(isinstance(elemento, pd.DataFrame) for elemento in valor):
+        for elemento in valor:
+            resumen.update(huella_valor(elemento).encode("utf-8"))
+    else:
+        resumen.update(pickle.dumps(valor, protocol=4))
+    return resumen.hexdigest()
+
+
+def _huella_modulos(modulos):
+    """Huella del código fuente de los módulos que usa un nodo (un cambio en el código invalida la caché)."""
+    resumen = hashlib.sha256()
+    for modulo in modulos:
+        with open(modulo.__file__, "rb") as archivo:
+            resumen.update(archivo.read())
+    return resumen.hexdigest()
+
+
+def _huella_archivo(ruta):
+    """Tamaño y fecha de modificación de un archivo, o de cada archivo de una carpeta (None si no existe)."""
+    if os.path.isdir(ruta):
+        return sorted(
+            (os.path.relpath(os.path.join(carpeta, nombre), ruta),) + _huella_archivo(os.path.join(carpeta, nombre))
+            for carpeta, _, nombres in os.walk(ruta) for nombre in nombres
+        )
+    if not os.path.exists(ruta):
+        return None
+    estado = os.stat(ruta)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def _huella_tabla(conexion, tabla):
+    """
+    Huella de una tabla de SQLite (None si no existe): la versión que cada escritura registra en
+    'resumen_tablas' (ver esquema.registrar_version) y el último rowid, dos búsquedas por índice.
+    Solo si la tabla no tiene versión, o con PIPELINE_HUELLA_CONTENIDO=1, se lee y se recorre completa.
+    """
+    existe = conexion.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (tabla,)).fetchone()
+    if existe is None:
+        return None
+    version = None if HUELLA_TABLAS_POR_CONTENIDO else esquema.leer_version(conexion, tabla)
+    if version is not None:
+        return "version", version, conexion.execute(f"SELECT MAX(rowid) FROM {tabla};").fetchone()[0]
+    return "contenido", huella_valor(pd.read_sql_query(f"SELECT * FROM {tabla} ORDER BY rowid", conexion))
+
+
+def huella_artefactos(nombre):
+    """
+    Huella de los archivos y tablas que escribe un nodo (ARTEFACTOS), o None si no escribe ninguno.
+    Se calcula al guardar la caché y se vuelve a calcular antes de reutilizarla.
+    """
+    if nombre not in ARTEFACTOS:
+        return None
+    archivos, tablas = ARTEFACTOS[nombre]()
+    huellas = [_huella_archivo(ruta) for ruta in archivos]
+    if tablas:
+        if os.path.exists(ingestion.DB_PATH):
+            conexion = sqlite3.connect(f"file:{ingestion.DB_PATH}?mode=ro", uri=True)
+            try:
+                huellas.extend(_huella_tabla(conexion, tabla) for tabla in tablas)
+            finally:
+                conexion.close()
+        else:
+            huellas.extend(None for _ in tablas)
+    return huellas
+
+
+def _leer_cache(nombre, huella):
+    """
+    Devolvemos (True, salida) si la caché del nodo tiene la misma huella y sus artefactos no cambiaron
+    desde que se guardó; (False, None) en otro caso.
+    """
+    ruta = os.path.join(RUTA_CACHE_PIPELINE, f"{nombre}.pkl")
+    if not os.path.exists(ruta):
+        return False, None
+    try:
+        with open(ruta, "rb") as archivo:
+            huella_guardada, salida, artefactos = pickle.load(archivo)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return False, None
+    if huella_guardada != huella or artefactos != huella_artefactos(nombre):
+        return False, None
+    return True, salida
+
+
+def _guardar_cache(nombre, huella, salida):
+    """Guardamos la salida del nodo junto a su huella y la de sus artefactos (escritura atómica)."""
+    os.makedirs(RUTA_CACHE_PIPELINE, exist_ok=True)
+    ruta = os.path.join(RUTA_CACHE_PIPELINE, f"{nombre}.pkl")
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        pickle.dump((huella, salida, huella_artefactos(nombre)), archivo, protocol=4)
+    os.replace(temporal, ruta)
+
+
+# 2. Nodos del Flujo
+
+def nodo_extraer_datos_api():
+    """EA1: Extraemos los registros del API (a través de la caché HTTP si es remoto)."""
+    datos = ingestion.extraer_datos_api()
+    print(f"¡Datos obtenidos! Se han obtenido {len(datos)} Registros Históricos del COVID-19 en EE.UU")
+    return datos
+
+
+def nodo_insertar_datos(datos):
+    """
+    EA1: Cargamos los registros en SQLite y generamos la auditoría; devolvemos 'covid_data' leída de vuelta,
+    ya que en modo incremental la tabla acumula ejecuciones anteriores y no coincide con lo descargado.
+    """
+    conn = ingestion.crear_db()
+    try:
+        resumen_incremental = None
+        if ingestion.MODO_INGESTA == "incremental":
+            resumen_incremental = ingestion.insertar_datos_incremental(conn, datos)
+        else:
+            ingestion.insertar_datos(conn, datos)
+        ingestion.generar_auditoria(datos, conn, resumen_incremental)
+        return pd.read_sql_query(f"SELECT {', '.join(ingestion.COLUMNAS_COVID)} FROM covid_data", conn)
+    finally:
+        conn.close()
+
+
+def nodo_generar_archivo_muestra(df):
+    """EA1: Generamos el Excel de muestra (se solapa con la simulación y la limpieza)."""
+    conn = sqlite3.connect(ingestion.DB_PATH)
+    try:
+        ingestion.generar_archivo_muestra(conn)
+    finally:
+        conn.close()
+    return len(df)
+
+
+def nodo_simular_datos_sucios(df):
+    """EA2: Simulamos los datos sucios y los guardamos (Parquet/CSV y 'covid_data_dirty')."""
+    df_sucio = cleaning.simular_datos_sucios(df)
+    print(f"\nDatos Sucios Simulados: {len(df_sucio)} Registros (Incluye Duplicados y Valores Nulos)\n")
+    cleaning.exportar_datos_sucios(df_sucio)
+    cleaning.guardar_tabla_sucia_en_db(df_sucio)
+    return df_sucio
+
+
+def nodo_operaciones_de_limpieza(df_sucio):
+    """EA2: Limpiamos, exportamos, escribimos la auditoría y actualizamos 'covid_data_cleaned'."""
+    df_limpio, detalles_auditoria = cleaning.operaciones_de_limpieza(df_sucio)
+    print("\nOperaciones de Limpieza y Transformación Aplicadas\n")
+    cleaning.exportar_datos_limpios(df_limpio, detalles_auditoria, df_sucio)
+    cleaning.actualizar_tabla_limpia(df_limpio)
+    return df_limpio
+
+
+def nodo_series_tiempo(df_limpio):
+    """Calculamos las métricas de ventana móvil sobre 'covid_data_cleaned' (solo la cola en modo incremental)."""
+    conexion = sqlite3.connect(series_tiempo.RUTA_BD)
+    try:
+        return series_tiempo.actualizar_series(conexion)
+    finally:
+        conexion.close()
+
+
+def nodo_leer_delitos_informaticos():
+    """EA3: Leemos el CSV de Delitos Informáticos."""
+    return enrichment.leer_delitos_informaticos_csv()
+
+
+def nodo_leer_inventario_bovinos():
+    """EA3: Leemos el Inventario Anual de Bovinos desde el API."""
+    return enrichment.leer_inventario_bovinos_api()
+
+
+def nodo_dimension_municipios(df_info, df_bovinos):
+    """EA3: Registramos los municipios de ambas fuentes en 'dim_municipio' y les asignamos 'id_municipio'."""
+    return enrichment.asignar_municipios(df_info, df_bovinos)
+
+
+def nodo_integrar_fuentes_externas(fuentes):
+    """EA3: Agregamos los delitos y los unimos con el inventario por municipio y año."""
+    df_info, df_bovinos = fuentes
+    df_info_agregado, detalles_agregacion = enrichment.agregar_delitos_informaticos(df_info)
+    df_externos, detalles_union = enrichment.integrar_fuentes_externas(df_info_agregado, df_bovinos)
+    return df_externos, detalles_agregacion, detalles_union
+
+
+def nodo_enriquecer(df_limpio, fuentes, integracion):
+    """EA3: Unimos el dataset limpio con las fuentes externas por periodo, exportamos y generamos el reporte."""
+    df_info, df_bovinos = fuentes
+    df_externos, detalles_agregacion, detalles_union = integracion
+    conexion = sqlite3.connect(enrichment.RUTA_BD)
+    try:
+        df_final, detalles_periodos = enrichment.enriquecer_por_periodos(df_limpio, df_externos, conexion)
+    finally:
+        conexion.close()
+    enrichment.exportar_dataset_enriquecido(df_final, detalles_periodos["huellas"])
+    enrichment.escribir_reporte_enriquecimiento(
+        enrichment.generar_reporte_enriquecimiento(
+            df_limpio, df_info, df_bovinos, df_externos, df_final, detalles_union, detalles_agregacion, detalles_periodos
+        ),
+        enrichment.perfilar_datasets(df_limpio, df_info, df_bovinos, df_externos, df_final),
+    )
+    return df_final
+
+
+# Grafo: nombre -> (dependencias, función, módulos cuyo código forma parte de la huella, tipo de tarea)
+# (los nodos que escriben en ingestion.db son 'db': el planificador los ejecuta de uno en uno)
+NODOS = {
+    "extraer_datos_api": ((), nodo_extraer_datos_api, (ingestion, http_cache), "io"),
+    "insertar_datos": (("extraer_datos_api",), nodo_insertar_datos, (ingestion, esquema, perfilador), "db"),
+    "generar_archivo_muestra": (("insertar_datos",), nodo_generar_archivo_muestra, (ingestion, salida_excel), "io"),
+    "simular_datos_sucios": (("insertar_datos",), nodo_simular_datos_sucios, (cleaning, almacenamiento, esquema), "db"),
+    "operaciones_de_limpieza": (
+        ("simular_datos_sucios",), nodo_operaciones_de_limpieza, (cleaning, almacenamiento, esquema, perfilador), "db",
+    ),
+    "series_tiempo": (("operaciones_de_limpieza",), nodo_series_tiempo, (series_tiempo,), "db"),
+    "leer_delitos_informaticos": ((), nodo_leer_delitos_informaticos, (enrichment, municipios), "io"),
+    "leer_inventario_bovinos": ((), nodo_leer_inventario_bovinos, (enrichment, socrata, http_cache, municipios), "io"),
+    "dimension_municipios": (
+        ("leer_delitos_informaticos", "leer_inventario_bovinos"), nodo_dimension_municipios, (enrichment, municipios), "db",
+    ),
+    "integrar_fuentes_externas": (
+        ("dimension_municipios",), nodo_integrar_fuentes_externas, (enrichment, municipios), "cpu",
+    ),
+    "enriquecer": (
+        ("operaciones_de_limpieza", "dimension_municipios", "integrar_fuentes_externas"),
+        nodo_enriquecer,
+        (enrichment, almacenamiento, esquema, perfilador),
+        "db",
+    ),
+}
+
+
+# Archivos y Tablas que Escribe Cada Nodo: nombre -> función que devuelve (rutas, tablas de ingestion.db)
+# (funciones para leer las rutas de los módulos al ejecutar, no al importar)
+ARTEFACTOS = {
+    "insertar_datos": lambda: ((ingestion.AUDIT_PATH,), ("covid_data",)),
+    "generar_archivo_muestra": lambda: ((ingestion.XLSX_PATH,), ()),
+    "simular_datos_sucios": lambda: (
+        (cleaning.RUTA_CSV_SUCIO, almacenamiento.ruta_capa("sucia")), ("covid_data_dirty",),
+    ),
+    "operaciones_de_limpieza": lambda: (
+        (cleaning.RUTA_CSV_LIMPIO, cleaning.RUTA_AUDITORIA, almacenamiento.ruta_capa("limpia")),
+        ("covid_data_cleaned",),
+    ),
+    "series_tiempo": lambda: ((), (series_tiempo.TABLA_SERIES,)),
+    "dimension_municipios": lambda: ((), (municipios.TABLA_DIMENSION,)),
+    "enriquecer": lambda: (
+        (
+            enrichment.RUTA_DATOS_ENRIQUECIDOS,
+            enrichment.RUTA_REPORTE_ENRIQUECIMIENTO,
+            almacenamiento.ruta_capa("enriquecida"),
+        ),
+        (enrichment.TABLA_HUELLAS_PERIODOS,),
+    ),
+}
+
+
+# 3. Ejecución
+
+def orden_de_ejecucion(objetivo=None):
+    """Devolvemos los nodos en orden topológico; con 'objetivo' solo ese nodo y sus ancestros."""
+    grafo = {nombre: set(dependencias) for nombre, (dependencias, _, _, _) in NODOS.items()}
+    if objetivo is not None:
+        if objetivo not in grafo:
+            raise KeyError(f"Nodo desconocido: {objetivo}")
+        necesarios, pendientes = set(), [objetivo]
+        while pendientes:
+            nombre = pendientes.pop()
+            if nombre not in necesarios:
+                necesarios.add(nombre)
+                pendientes.extend(grafo[nombre])
+        grafo = {nombre: grafo[nombre] for nombre in necesarios}
+    return list(TopologicalSorter(grafo).static_order())
+
+
+def ejecutar_nodo(nombre, forzar, *entradas):
+    """
+    Ejecutamos un nodo (o reutilizamos su salida de la caché) a partir de las salidas de sus dependencias.
+
+    Parámetros:
+        nombre: Nombre del nodo en NODOS.
+        forzar: Si es True se ignora la caché.
+        entradas: Tuplas (salida, huella, estado) de cada dependencia, en el orden declarado.
+
+    Retorna:
+        Tupla (salida, huella, estado) donde estado es 'ejecutado' o 'en caché'.
+    """
+    dependencias, funcion, modulos, _ = NODOS[nombre]
+    if not dependencias:
+        # Nodo fuente: siempre se ejecuta y su huella es la de su salida
+        salida = funcion()
+        return salida, huella_valor(salida), "ejecutado"
+
+    huella = hashlib.sha256(
+        (nombre + _huella_modulos(modulos + (sys.modules[__name__],))
+         + "".join(huella_entrada for _, huella_entrada, _ in entradas)).encode("utf-8")
+    ).hexdigest()
+    encontrado, salida = (False, None) if forzar else _leer_cache(nombre, huella)
+    if encontrado:
+        return salida, huella, "en caché"
+    salida = funcion(*(salida_entrada for salida_entrada, _, _ in entradas))
+    _guardar_cache(nombre, huella, salida)
+    return salida, huella, "ejecutado"
+
+
+def ejecutar(objetivo=None, forzar=False, hilos=None, procesos=None, ruta_traza=None):
+    """
+    Ejecutamos el grafo completo (o hasta 'objetivo'), omitiendo los nodos cuya huella coincide con la caché
+    y ejecutando en paralelo los nodos independientes.
+
+    Parámetros:
+        objetivo: Nombre del último nodo a ejecutar (None para todo el flujo).
+        forzar: Si es True se ignora la caché y se ejecutan todos los nodos.
+        hilos, procesos: Trabajadores del planificador (por defecto los de planificador.py).
+        ruta_traza: Si se indica, se guarda la línea de tiempo en formato Chrome Trace.
+
+    Retorna:
+        Diccionario nombre -> salida de cada nodo ejecutado o reutilizado.
+    """
+    tareas = {
+        nombre: planificador.tarea(ejecutar_nodo, nombre, forzar, dependencias=NODOS[nombre][0], tipo=NODOS[nombre][3])
+        for nombre in orden_de_ejecucion(objetivo)
+    }
+    resultados, traza = planificador.ejecutar(tareas, hilos=hilos, procesos=procesos)
+
+    print("\n=== RESUMEN DEL PIPELINE ===")
+    for evento in traza:
+        print(f"  {evento['tarea']:<28} {resultados[evento['tarea']][2]:<10} {evento['fin'] - evento['inicio']:>8.3f} s")
+    planificador.imprimir_linea_de_tiempo(traza, "LÍNEA DE TIEMPO DEL PIPELINE")
+    if ruta_traza:
+        print(f"Traza Guardada en: {planificador.guardar_traza(traza, ruta_traza)}")
+    return {nombre: salida for nombre, (salida, _, _) in resultados.items()}
+
+
+def main(argumentos=None):
+    """Punto de entrada de la línea de comandos (bigdata-pipeline)."""
+    parser = argparse.ArgumentParser(description="Ejecuta el flujo EA1 -> EA2 -> EA3 con caché por huellas.")
+    parser.add_argument("--hasta", choices=list(NODOS), help="Último nodo a ejecutar (por defecto todo el flujo).")
+    parser.add_argument("--forzar", action="store_true", help="Ignora la caché y ejecuta todos los nodos.")
+    parser.add_argument("--listar", action="store_true", help="Muestra los nodos en orden de ejecución y termina.")
+    parser.add_argument("--hilos", type=int, help="Hilos para los nodos de E/S.")
+    parser.add_argument("--procesos", type=int, help="Procesos para los nodos de cálculo (0 los ejecuta en hilos).")
+    parser.add_argument("--traza", help="Ruta del archivo JSON (Chrome Trace) con la línea de tiempo.")
+    args = parser.parse_args(argumentos)
+
+    if args.listar:
+        for nombre in orden_de_ejecucion(args.hasta):
+            dependencias = NODOS[nombre][0]
+            print(f"{nombre}" + (f" <- {', '.join(dependencias)}" if dependencias else ""))
+        return 0
+
+    ejecutar(args.hasta, args.forzar, args.hilos, args.procesos, args.traza)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import os
+import json
+import importlib
+import time
+import threading
+import multiprocessing
+import metricas
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+"""
+Planificador de tareas con dependencias. Ejecuta en cuanto están listas las tareas cuyas
+dependencias ya terminaron, de modo que las ramas independientes (lecturas, exportaciones)
+se solapan en lugar de correr una tras otra:
+
+  - Las tareas de tipo 'io' (red, disco, lecturas de SQLite) corren en un grupo de hilos.
+  - Las tareas de tipo 'db' (las que escriben en SQLite) corren en un único hilo propio, una tras
+    otra, porque SQLite admite un solo escritor a la vez: dos escrituras solapadas terminarían en
+    'database is locked' o en un cambio de esquema a mitad de otra transacción.
+  - Las tareas de tipo 'cpu' (transformaciones puras) corren en un grupo de procesos iniciados
+    con 'spawn' (seguro junto a los hilos), por lo que su función, argumentos y resultado deben
+    poder serializarse con pickle y la función debe poder importarse desde su módulo.
+
+Cada ejecución devuelve una traza con el inicio y fin de cada tarea, que puede imprimirse como
+línea de tiempo (con la ruta crítica) o guardarse en formato Chrome Trace (chrome://tracing).
+"""
+
+# Hilos para las Tareas de Entrada/Salida
+HILOS_PLANIFICADOR = int(os.environ.get("PLANIFICADOR_HILOS", "4"))
+
+# Procesos para las Tareas de Cálculo (0 = Ejecutarlas También en Hilos)
+PROCESOS_PLANIFICADOR = int(os.environ.get("PLANIFICADOR_PROCESOS", str(min(4, os.cpu_count() or 1))))
+
+# Ancho en Caracteres de las Barras de la Línea de Tiempo
+ANCHO_LINEA_DE_TIEMPO = 40
+
+
+def tarea(funcion, *argumentos, dependencias=(), tipo="io"):
+    """
+    Describimos una tarea para el planificador.
+
+    Parámetros:
+        funcion: Función a ejecutar; recibe 'argumentos' seguidos de los resultados de sus dependencias.
+        dependencias: Nombres de las tareas que deben terminar antes.
+        tipo: 'io' (hilos), 'db' (hilo único de escritura en SQLite) o 'cpu' (procesos).
+    """
+    if tipo not in ("io", "db", "cpu"):
+        raise ValueError(f"Tipo de tarea no válido: {tipo}")
+    return {"funcion": funcion, "argumentos": argumentos, "dependencias": tuple(dependencias), "tipo": tipo}
+
+
+def _medir(funcion, argumentos):
+    """Ejecutamos la función registrando el instante de inicio y de fin (en el hilo o proceso que la corre)."""
+    inicio = time.time()
+    resultado = funcion(*argumentos)
+    return resultado, inicio, time.time(), os.getpid(), threading.current_thread().name
+
+
+def _precargar(modulo):
+    """Importamos un módulo en el proceso trabajador (no devolvemos el módulo, que no se puede serializar)."""
+    importlib.import_module(modulo)
+
+
+def ejecutar(tareas, hilos=None, procesos=None):
+    """
+    Ejecutamos un conjunto de tareas respetando sus dependencias.
+
+    Parámetros:
+        tareas: Diccionario nombre -> tarea (ver 'tarea').
+        hilos: Hilos para las tareas 'io' (por defecto HILOS_PLANIFICADOR); las tareas 'db' usan siempre un solo hilo.
+        procesos: Procesos para las tareas 'cpu' (por defecto PROCESOS_PLANIFICADOR; 0 las ejecuta en hilos).
+
+    Retorna:
+        Diccionario nombre -> resultado y la traza (lista de diccionarios por tarea).
+    """
+    hilos = HILOS_PLANIFICADOR if hilos is None else hilos
+    procesos = PROCESOS_PLANIFICADOR if procesos is None else procesos
+    for nombre, definicion in tareas.items():
+        faltantes = [dep for dep in definicion["dependencias"] if dep not in tareas]
+        if faltantes:
+            raise KeyError(f"La tarea '{nombre}' depende de tareas inexistentes: {faltantes}")
+
+    resultados, traza, en_curso = {}, [], {}
+    pendientes = dict(tareas)
+    origen = time.time()
+    grupo_hilos = ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix="io")
+    # Un solo hilo para las escrituras en SQLite: nunca hay dos transacciones de escritura a la vez
+    grupo_bd = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+    usa_procesos = procesos > 0 and any(definicion["tipo"] == "cpu" for definicion in tareas.values())
+    # Los procesos registran sus métricas con el identificador de esta ejecución
+    grupo_procesos = ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=metricas.iniciar_proceso_trabajador,
+        initargs=(metricas.id_ejecucion(),),
+    ) if usa_procesos else None
+    if grupo_procesos is not None:
+        # Iniciamos los procesos e importamos los módulos de las tareas 'cpu' de inmediato,
+        # para que ese arranque se solape con las tareas de E/S
+        modulos = {definicion["funcion"].__module__ for definicion in tareas.values() if definicion["tipo"] == "cpu"}
+        for _ in range(procesos):
+            for modulo in modulos:
+                grupo_procesos.submit(_precargar, modulo)
+    try:
+        while pendientes or en_curso:
+            # Enviamos todas las tareas cuyas dependencias ya tienen resultado
+            listas = [nombre for nombre, definicion in pendientes.items()
+                      if all(dep in resultados for dep in definicion["dependencias"])]
+            for nombre in listas:
+                definicion = pendientes.pop(nombre)
+                argumentos = definicion["argumentos"] + tuple(resultados[dep] for dep in definicion["dependencias"])
+                if definicion["tipo"] == "db":
+                    grupo = grupo_bd
+                elif definicion["tipo"] == "cpu" and grupo_procesos:
+                    grupo = grupo_procesos
+                else:
+                    grupo = grupo_hilos
+                en_curso[grupo.submit(_medir, definicion["funcion"], argumentos)] = nombre
+
+            if not en_curso:
+                raise RuntimeError(f"Dependencias circulares entre las tareas: {sorted(pendientes)}")
+
+            terminadas, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                nombre = en_curso.pop(futuro)
+                resultado, inicio, fin, pid, hilo = futuro.result()  # Propaga la excepción de la tarea
+                resultados[nombre] = resultado
+                traza.append({
+                    "tarea": nombre,
+                    "tipo": tareas[nombre]["tipo"],
+                    "dependencias": list(tareas[nombre]["dependencias"]),
+                    "inicio": inicio - origen,
+                    "fin": fin - origen,
+                    "pid": pid,
+                    "hilo": hilo,
+                })
+    except BaseException:
+        for futuro in en_curso:
+            futuro.cancel()
+        raise
+    finally:
+        grupo_hilos.shutdown(wait=True)
+        grupo_bd.shutdown(wait=True)
+        if grupo_procesos is not None:
+            grupo_procesos.shutdown(wait=True)
+
+    traza.sort(key=lambda evento: evento["inicio"])
+    return resultados, traza
+
+
+def ruta_critica(traza):
+    """Calculamos la cadena de dependencias que determina la duración total (la que termina más tarde)."""
+    eventos = {evento["tarea"]: evento for evento in traza}
+    if not eventos:
+        return []
+    actual = max(eventos.values(), key=lambda evento: evento["fin"])
+    ruta = [actual["tarea"]]
+    while actual["dependencias"]:
+        actual = max((eventos[dep] for dep in actual["dependencias"] if dep in eventos), key=lambda evento: evento["fin"])
+        ruta.append(actual["tarea"])
+    return ruta[::-1]
+
+
+def imprimir_linea_de_tiempo(traza, titulo="LÍNEA DE TIEMPO"):
+    """Imprimimos el inicio, fin y duración de cada tarea con una barra proporcional y la ruta crítica."""
+    if not traza:
+        return
+    total = max(evento["fin"] for evento in traza) or 1e-9
+    ancho_nombre = max(len(evento["tarea"]) for evento in traza)
+    print(f"\n=== {titulo} ({total:.3f} s) ===")
+    for evento in traza:
+        desde = int(evento["inicio"] / total * ANCHO_LINEA_DE_TIEMPO)
+        hasta = max(desde + 1, int(round(evento["fin"] / total * ANCHO_LINEA_DE_TIEMPO)))
+        barra = " " * desde + "█" * (hasta - desde) + " " * (ANCHO_LINEA_DE_TIEMPO - hasta)
+        print(
+            f"  {evento['tarea']:<{ancho_nombre}} {evento['tipo']:<3} |{barra}| "
+            f"{evento['inicio']:7.3f} -> {evento['fin']:7.3f} s ({evento['fin'] - evento['inicio']:.3f} s)"
+        )
+    print(f"  Ruta Crítica: {' -> '.join(ruta_critica(traza))}")
+
+
+def guardar_traza(traza, ruta):
+    """Guardamos la traza en formato Chrome Trace (se abre en chrome://tracing o Perfetto)."""
+    eventos = [{
+        "name": evento["tarea"],
+        "cat": evento["tipo"],
+        "ph": "X",
+        "ts": evento["inicio"] * 1e6,
+        "dur": (evento["fin"] - evento["inicio"]) * 1e6,
+        "pid": evento["pid"],
+        "tid": evento["hilo"],
+    } for evento in traza]
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"traceEvents": eventos}, archivo, ensure_ascii=False, indent=2)
+    return ruta
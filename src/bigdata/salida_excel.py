@@ -0,0 +1,173 @@
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+"""
+Escritura de archivos Excel (.xlsx) compartida por ingestion.py y script.py.
+
+  - Motor 'streaming' (por defecto): openpyxl en modo solo escritura. Cada fila se agrega al
+    archivo a medida que llega, sin construir el modelo de celdas en memoria, así que la memoria
+    se mantiene constante sin importar el número de filas.
+  - Motor 'pandas': DataFrame.to_excel con el modelo completo de openpyxl (el comportamiento anterior).
+
+GENERAR_EXCEL=0 permite omitir los Excel en ejecuciones sin interfaz (CI, contenedores).
+Para comparar ambos motores: python src/bigdata/salida_excel.py --filas 100000
+"""
+
+# Generamos los Archivos Excel (Desactivar con GENERAR_EXCEL=0)
+GENERAR_EXCEL = os.environ.get("GENERAR_EXCEL", "1") == "1"
+
+# Motor de Escritura: "streaming" (openpyxl Solo Escritura) o "pandas" (DataFrame.to_excel)
+MOTOR_EXCEL = os.environ.get("MOTOR_EXCEL", "streaming").lower()
+
+# Nombre de la Hoja (el Mismo que Usa pandas por Defecto)
+NOMBRE_HOJA = "Sheet1"
+
+# Filas que se Convierten a la Vez al Recorrer un DataFrame en Modo Streaming
+TAMANO_BLOQUE_EXCEL = 10_000
+
+
+def _valor_celda(valor):
+    """Convertimos los nulos de pandas/NumPy a celdas vacías y los escalares de NumPy a tipos de Python."""
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, float) and valor != valor:
+        return None
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+        return None if isinstance(valor, float) and valor != valor else valor
+    return valor
+
+
+def escribir_filas(ruta, columnas, filas, motor=None, hoja=NOMBRE_HOJA):
+    """
+    Escribimos un Excel a partir de un iterable de filas (tuplas), p.ej. un cursor de SQLite.
+
+    Parámetros:
+        ruta: Archivo .xlsx de salida.
+        columnas: Encabezados de las columnas.
+        filas: Iterable de tuplas en el orden de 'columnas' (se recorre una sola vez).
+        motor: 'streaming' o 'pandas' (por defecto MOTOR_EXCEL).
+
+    Retorna:
+        Número de filas escritas (sin contar el encabezado).
+    """
+    motor = motor or MOTOR_EXCEL
+    if motor == "pandas":
+        df = pd.DataFrame.from_records(filas, columns=list(columnas))
+        df.to_excel(ruta, index=False, sheet_name=hoja)
+        return len(df)
+    if motor != "streaming":
+        raise ValueError(f"Motor de Excel no válido: {motor}")
+
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    libro = Workbook(write_only=True)
+    try:
+        hoja_excel = libro.create_sheet(hoja)
+        encabezado = []
+        for columna in columnas:
+            celda = WriteOnlyCell(hoja_excel, value=str(columna))
+            celda.font = Font(bold=True)  # Encabezado en negrita, como en to_excel
+            encabezado.append(celda)
+        hoja_excel.append(encabezado)
+
+        total = 0
+        for fila in filas:
+            hoja_excel.append([_valor_celda(valor) for valor in fila])
+            total += 1
+        libro.save(ruta)
+    finally:
+        libro.close()
+    return total
+
+
+def _filas_dataframe(df, tamano_bloque=TAMANO_BLOQUE_EXCEL):
+    """Recorremos un DataFrame por bloques como tuplas, con los nulos ya convertidos a None."""
+    for inicio in range(0, len(df), tamano_bloque):
+        bloque = df.iloc[inicio:inicio + tamano_bloque]
+        bloque = bloque.astype(object).where(bloque.notna(), None)
+        yield from bloque.itertuples(index=False, name=None)
+
+
+def escribir_dataframe(ruta, df, motor=None, hoja=NOMBRE_HOJA):
+    """Escribimos un DataFrame en Excel sin índice (equivalente a df.to_excel(ruta, index=False))."""
+    motor = motor or MOTOR_EXCEL
+    if motor == "pandas":
+        df.to_excel(ruta, index=False, sheet_name=hoja)
+        return len(df)
+    return escribir_filas(ruta, df.columns, _filas_dataframe(df), motor=motor, hoja=hoja)
+
+
+def _escribir_midiendo(ruta, df, motor, memoria):
+    """Escribimos el DataFrame con un motor y devolvemos el tiempo y, si se pide, el pico de memoria en MB."""
+    if memoria:
+        tracemalloc.start()
+    try:
+        inicio = time.perf_counter()
+        escribir_dataframe(ruta, df, motor=motor)
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if memoria else None
+    finally:
+        if memoria:
+            tracemalloc.stop()
+    return duracion, pico
+
+
+def comparar_motores(filas, carpeta, memoria=False, semilla=42):
+    """
+    Medimos el tiempo de ambos motores escribiendo un DataFrame sintético con las columnas de
+    la muestra de 'covid_data'. Con 'memoria' se repite la escritura bajo tracemalloc para medir
+    el pico de memoria (en una pasada aparte, porque tracemalloc ralentiza mucho la escritura).
+
+    Retorna:
+        Lista de diccionarios con una fila por motor.
+    """
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "date": rng.integers(20200113, 20210307, filas),
+        "positive": rng.integers(0, 30_000_000, filas),
+        "death": rng.integers(0, 550_000, filas),
+        "hospitalizedCurrently": np.where(rng.random(filas) < 0.1, np.nan, rng.integers(0, 130_000, filas)),
+        "totalTestResults": rng.integers(0, 365_000_000, filas),
+        "positiveIncrease": rng.integers(0, 300_000, filas),
+        "deathIncrease": rng.integers(0, 4_500, filas),
+        "timestamp": "2025-01-01 00:00:00",
+    })
+    resultados = []
+    for motor in ("pandas", "streaming"):
+        ruta = os.path.join(carpeta, f"comparacion_{motor}.xlsx")
+        duracion, _ = _escribir_midiendo(ruta, df, motor, memoria=False)
+        pico = _escribir_midiendo(ruta, df, motor, memoria=True)[1] if memoria else None
+        resultados.append({
+            "motor": motor,
+            "filas": filas,
+            "tiempo_s": duracion,
+            "memoria_pico_mb": pico,
+            "tamano_kb": os.path.getsize(ruta) / 1024,
+        })
+        os.remove(ruta)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los motores de escritura de Excel.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--memoria", action="store_true", help="Medir también el pico de memoria (más lento).")
+    opciones = parser.parse_args()
+
+    print("=== COMPARACIÓN DE MOTORES DE EXCEL ===")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for filas in opciones.filas:
+            for fila in comparar_motores(filas, carpeta, opciones.memoria):
+                memoria = f"{fila['memoria_pico_mb']:>9.1f} MB" if fila["memoria_pico_mb"] is not None else ""
+                print(
+                    f"{fila['filas']:>9,} filas  {fila['motor']:<10} {fila['tiempo_s']:>8.3f} s "
+                    f"{memoria}  ({fila['tamano_kb']:,.0f} KB)"
+                )
@@ -0,0 +1,312 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import metricas
+import cleaning
+import esquema
+from datetime import datetime
+
+"""
+Métricas epidemiológicas de ventana móvil sobre covid_data_cleaned, guardadas en la tabla
+'covid_series_tiempo' (una fila por fecha):
+
+  - promedio_7d_* / promedio_14d_*: promedio móvil de incremento_positivos e incremento_fallecidos.
+  - crecimiento_7d_*: variación porcentual del promedio de 7 días respecto al de 7 días antes.
+  - positividad_7d: positivos nuevos de la semana sobre las pruebas nuevas de la semana
+    (diferencia de total_resultados acumulado), en porcentaje.
+
+Las ventanas se calculan con rolling de pandas sobre una serie diaria continua: los días sin
+registros quedan como NaN y anulan las ventanas que los contienen en lugar de acortarlas.
+Los valores de total_resultados imputados con la mediana en la limpieza (columnas_imputadas) se
+descartan: no son parte de la serie acumulada.
+
+La limpieza reescribe toda la tabla en cada ejecución, así que no basta con mirar las fechas nuevas:
+se guarda una huella de la serie diaria de cada mes (AAAAMM) en 'covid_series_tiempo_periodos' y,
+en modo incremental, se recalcula desde el primer mes cuya huella cambió (con los días previos que
+necesitan las ventanas); esas filas y las huellas se reemplazan en una sola transacción.
+
+Uso:
+    python src/bigdata/series_tiempo.py
+"""
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_BD = os.path.join(BASE_DIR, "static", "db", "ingestion.db")
+
+# Tablas de Entrada y de Salida
+TABLA_ORIGEN = "covid_data_cleaned"
+TABLA_SERIES = "covid_series_tiempo"
+
+# Huellas de la Serie Diaria por Mes (AAAAMM) de la Última Ejecución
+TABLA_HUELLAS_SERIES = "covid_series_tiempo_periodos"
+
+# Columnas de covid_data_cleaned que Usan las Métricas
+COLUMNAS_ENTRADA = [
+    "fecha", "total_resultados", "incremento_positivos", "incremento_fallecidos", cleaning.COLUMNA_IMPUTADAS,
+]
+
+# Valores de columnas_imputadas en los que total_resultados fue Imputado con la Mediana
+ETIQUETAS_TOTAL_IMPUTADO = [
+    etiqueta for etiqueta in cleaning.etiquetas_imputadas(cleaning.COLUMNAS_NUMERICAS_LIMPIEZA)
+    if "total_resultados" in etiqueta.split(",")
+]
+
+# Ventanas Móviles en Días
+VENTANAS = (7, 14)
+
+# Días Previos que Necesita Cada Fecha (el Promedio de 14 Días y el Crecimiento Semanal Usan 13)
+DIAS_HISTORIA = max(max(VENTANAS), 2 * 7) - 1
+
+# Recalculamos Solo la Cola de la Serie (Desactivar con SERIES_INCREMENTAL=0)
+SERIES_INCREMENTAL = os.environ.get("SERIES_INCREMENTAL", "1") == "1"
+
+# Columnas de la Tabla de Series
+COLUMNAS_SERIES = [
+    "fecha",
+    "incremento_positivos",
+    "incremento_fallecidos",
+    "promedio_7d_positivos",
+    "promedio_14d_positivos",
+    "promedio_7d_fallecidos",
+    "promedio_14d_fallecidos",
+    "crecimiento_7d_positivos",
+    "crecimiento_7d_fallecidos",
+    "positividad_7d",
+]
+
+
+# 1. Lectura
+
+def _entero_a_fecha(fecha):
+    """Convertimos una fecha AAAAMMDD (entero) a Timestamp."""
+    return pd.Timestamp(str(int(fecha)))
+
+
+def _fecha_a_entero(fecha):
+    """Convertimos un Timestamp a entero AAAAMMDD."""
+    return int(fecha.strftime("%Y%m%d"))
+
+
+def cargar_entradas(conexion):
+    """
+    Leemos las columnas de COLUMNAS_ENTRADA de covid_data_cleaned ordenadas por fecha.
+    Una tabla limpia anterior a la columna de columnas imputadas se lee como si no hubiera imputaciones.
+    """
+    existentes = {fila[1] for fila in conexion.execute(f"PRAGMA table_info({TABLA_ORIGEN})")}
+    seleccion = [
+        columna if columna in existentes else f"'{cleaning.SIN_IMPUTACION}' AS {columna}"
+        for columna in COLUMNAS_ENTRADA
+    ]
+    consulta = f"SELECT {', '.join(seleccion)} FROM {TABLA_ORIGEN} WHERE fecha IS NOT NULL ORDER BY fecha"
+    return pd.read_sql_query(consulta, conexion)
+
+
+def serie_diaria(df):
+    """
+    Reducimos las entradas a una fila por día y completamos el calendario.
+    Los valores de total_resultados imputados con la mediana se descartan; de los demás registros
+    repetidos de un día tomamos el máximo porque es una serie acumulada (un día con todos sus valores
+    imputados queda en NaN). Los incrementos de los registros repetidos de un día son iguales.
+
+    Retorna:
+        DataFrame indexado por fecha (frecuencia diaria) y la columna 'observado' (False en los días
+        que no estaban en la tabla).
+    """
+    imputados = df[cleaning.COLUMNA_IMPUTADAS].isin(ETIQUETAS_TOTAL_IMPUTADO).to_numpy()
+    df = df.assign(total_resultados=df["total_resultados"].mask(imputados))
+    diario = df.groupby("fecha", sort=True).agg(
+        total_resultados=("total_resultados", "max"),
+        incremento_positivos=("incremento_positivos", "first"),
+        incremento_fallecidos=("incremento_fallecidos", "first"),
+    )
+    diario.index = pd.to_datetime(diario.index.astype("int64").astype(str), format="%Y%m%d")
+    diario = diario.astype("float64")
+    diario["observado"] = True
+    if diario.empty:
+        return diario
+    diario = diario.asfreq("D")
+    diario["observado"] = diario["observado"].notna()
+    return diario
+
+
+# 2. Cálculo
+
+@metricas.instrumentar
+def calcular_metricas(diario):
+    """
+    Calculamos las métricas de ventana móvil sobre la serie diaria (operaciones vectorizadas de pandas).
+    Una ventana sin todos sus días observados queda en NaN.
+
+    Retorna:
+        DataFrame con COLUMNAS_SERIES, una fila por día observado.
+    """
+    resultado = pd.DataFrame(index=diario.index)
+    for columna, sufijo in (("incremento_positivos", "positivos"), ("incremento_fallecidos", "fallecidos")):
+        resultado[columna] = diario[columna]
+        for ventana in VENTANAS:
+            resultado[f"promedio_{ventana}d_{sufijo}"] = diario[columna].rolling(ventana, min_periods=ventana).mean()
+        anterior = resultado[f"promedio_7d_{sufijo}"].shift(7)
+        resultado[f"crecimiento_7d_{sufijo}"] = (resultado[f"promedio_7d_{sufijo}"] / anterior - 1) * 100
+
+    positivos_semana = diario["incremento_positivos"].rolling(7, min_periods=7).sum()
+    pruebas_semana = diario["total_resultados"].diff(7)
+    resultado["positividad_7d"] = (positivos_semana / pruebas_semana.where(pruebas_semana > 0)) * 100
+
+    resultado = resultado.replace([np.inf, -np.inf], np.nan)
+    resultado = resultado[diario["observado"].to_numpy()]
+    resultado.insert(0, "fecha", [_fecha_a_entero(fecha) for fecha in resultado.index])
+    return resultado.reset_index(drop=True)[COLUMNAS_SERIES]
+
+
+# 3. Persistencia
+
+def crear_tabla_series(conexion):
+    """Creamos la tabla de series si no existe (la fecha es la clave primaria, así que ya está indexada)."""
+    columnas = ",\n            ".join(f"{columna} REAL" for columna in COLUMNAS_SERIES[1:])
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_SERIES} (
+            fecha INTEGER PRIMARY KEY,
+            {columnas},
+            actualizado_en TEXT
+        )
+    """)
+
+
+def huellas_periodos(diario):
+    """
+    Huella de la serie diaria de cada mes (incluye los días sin registros del calendario).
+
+    Retorna:
+        Diccionario periodo (AAAAMM) -> huella en texto.
+    """
+    if diario.empty:
+        return {}
+    filas = pd.util.hash_pandas_object(diario, index=True).to_numpy()
+    periodos = (diario.index.year * 100 + diario.index.month).to_numpy()
+    return {
+        int(periodo): f"{int(filas[periodos == periodo].sum(dtype=np.uint64)):016x}"
+        for periodo in np.unique(periodos)
+    }
+
+
+def _leer_huellas_guardadas(conexion):
+    """Leemos las huellas de la ejecución anterior (creando la tabla si no existe)."""
+    conexion.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLA_HUELLAS_SERIES} (
+            periodo INTEGER PRIMARY KEY,
+            huella TEXT NOT NULL,
+            actualizado_en TEXT
+        )
+    """)
+    return dict(conexion.execute(f"SELECT periodo, huella FROM {TABLA_HUELLAS_SERIES}").fetchall())
+
+
+def fecha_inicio_recalculo(conexion, huellas):
+    """
+    Primera fecha (AAAAMMDD) cuyas métricas hay que recalcular: el primer día del primer mes cuya
+    huella no coincide con la guardada (meses nuevos, modificados o que ya no están).
+    None si hay que reconstruir toda la serie (no hay huellas o la tabla de series está vacía)
+    y 0 si no cambió ningún mes.
+    """
+    crear_tabla_series(conexion)
+    anteriores = _leer_huellas_guardadas(conexion)
+    if not anteriores or conexion.execute(f"SELECT 1 FROM {TABLA_SERIES} LIMIT 1").fetchone() is None:
+        return None
+    cambiados = {
+        periodo for periodo in set(huellas) | set(anteriores) if huellas.get(periodo) != anteriores.get(periodo)
+    }
+    return min(cambiados) * 100 + 1 if cambiados else 0
+
+
+@metricas.instrumentar
+def actualizar_series(conexion, incremental=None):
+    """
+    Calculamos y guardamos las métricas de ventana móvil. En modo incremental se calculan solo
+    las fechas desde fecha_inicio_recalculo (con DIAS_HISTORIA días previos para las ventanas) y se
+    reemplazan las filas desde esa fecha; si no hay huellas guardadas o el modo está desactivado se
+    reconstruye completa. Las huellas se guardan en la misma transacción que las filas.
+
+    Retorna:
+        Diccionario con el modo, la fecha desde la que se recalculó y las filas recalculadas y totales.
+    """
+    incremental = SERIES_INCREMENTAL if incremental is None else incremental
+    diario = serie_diaria(cargar_entradas(conexion))
+    huellas = huellas_periodos(diario)
+    desde = fecha_inicio_recalculo(conexion, huellas) if incremental else None
+
+    if desde == 0:
+        df_series = pd.DataFrame(columns=COLUMNAS_SERIES)
+    elif desde is not None:
+        lectura = _entero_a_fecha(desde) - pd.Timedelta(days=DIAS_HISTORIA)
+        df_series = calcular_metricas(diario.loc[lectura:])
+        df_series = df_series[df_series["fecha"] >= desde]
+    else:
+        df_series = calcular_metricas(diario)
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    filas = [
+        tuple(None if pd.isna(valor) else valor for valor in fila) + (ahora,)
+        for fila in df_series.astype(object).itertuples(index=False, name=None)
+    ]
+
+    crear_tabla_series(conexion)
+    _leer_huellas_guardadas(conexion)
+    with conexion:
+        if desde is None:
+            conexion.execute(f"DELETE FROM {TABLA_SERIES}")
+        elif desde:
+            conexion.execute(f"DELETE FROM {TABLA_SERIES} WHERE fecha >= ?", (desde,))
+        conexion.executemany(
+            f"INSERT INTO {TABLA_SERIES} ({', '.join(COLUMNAS_SERIES)}, actualizado_en) "
+            f"VALUES ({', '.join('?' for _ in COLUMNAS_SERIES)}, ?)",
+            filas,
+        )
+        conexion.execute(f"DELETE FROM {TABLA_HUELLAS_SERIES}")
+        conexion.executemany(
+            f"INSERT INTO {TABLA_HUELLAS_SERIES} (periodo, huella, actualizado_en) VALUES (?, ?, ?)",
+            [(periodo, huella, ahora) for periodo, huella in huellas.items()],
+        )
+        esquema.registrar_version(conexion, TABLA_SERIES)
+    total = conexion.execute(f"SELECT COUNT(*) FROM {TABLA_SERIES}").fetchone()[0]
+
+    detalles = {
+        "modo": "incremental" if desde is not None else "completo",
+        "desde": desde or None,
+        "filas_recalculadas": len(df_series),
+        "filas_totales": total,
+    }
+    if desde == 0:
+        print(f"Series de tiempo: sin cambios en covid_data_cleaned ({total} fechas).")
+    elif desde is not None:
+        print(f"Series de tiempo: {len(df_series)} de {total} fechas recalculadas (desde {desde}).")
+    else:
+        print(f"Series de tiempo: {total} fechas calculadas (reconstrucción completa).")
+    return detalles
+
+
+def leer_series(conexion, desde=None):
+    """Leemos la tabla de series ordenada por fecha (opcionalmente desde una fecha AAAAMMDD)."""
+    consulta = f"SELECT {', '.join(COLUMNAS_SERIES)} FROM {TABLA_SERIES}"
+    parametros = ()
+    if desde is not None:
+        consulta += " WHERE fecha >= ?"
+        parametros = (int(desde),)
+    return pd.read_sql_query(consulta + " ORDER BY fecha", conexion, params=parametros)
+
+
+# 4. Función Principal
+
+def main():
+    """Actualizamos la tabla de series de tiempo a partir de covid_data_cleaned y mostramos los últimos días."""
+    print("\n=== Iniciando Cálculo de Series de Tiempo ===")
+    conexion = sqlite3.connect(RUTA_BD)
+    try:
+        actualizar_series(conexion)
+        ultimos = leer_series(conexion).tail(7)
+    finally:
+        conexion.close()
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(ultimos.round(2).to_string(index=False))
+    print("=== Cálculo de Series de Tiempo Finalizado ===\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import requests
+import http_cache
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"""
+Cliente paginado para APIs Socrata (datos.gov.co). Una consulta sin '$limit' queda truncada
+en el tamaño de página por defecto del servidor, por lo que aquí:
+
+  - Contamos los registros con '$select=count(*)' y repartimos la descarga en páginas
+    '$limit'/'$offset' ordenadas por ':id' para que sean estables.
+  - Descargamos las páginas en paralelo con un grupo acotado de hilos que comparten una
+    sesión de requests con pool de conexiones y reintentos con espera exponencial.
+  - Permitimos enviar '$select' y '$where' para traer solo las columnas y filas necesarias.
+  - Cada página pasa por la caché HTTP compartida (http_cache).
+"""
+
+# Registros por Página (Socrata Admite Hasta 50.000 por Petición)
+TAMANO_PAGINA = int(os.environ.get("SOCRATA_TAMANO_PAGINA", "5000"))
+
+# Hilos que Descargan Páginas de Forma Concurrente
+HILOS = int(os.environ.get("SOCRATA_HILOS", "4"))
+
+# Reintentos por Petición ante Errores de Conexión o Respuestas 429/5xx
+REINTENTOS = 4
+
+# Factor de Espera Exponencial Entre Reintentos (Segundos)
+FACTOR_ESPERA = 0.5
+
+
+def crear_sesion(hilos=HILOS, reintentos=REINTENTOS, factor_espera=FACTOR_ESPERA):
+    """Creamos una Sesión de requests con Pool de Conexiones del Tamaño del Grupo de Hilos y Reintentos con Backoff"""
+    politica = Retry(
+        total=reintentos,
+        backoff_factor=factor_espera,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(pool_connections=hilos, pool_maxsize=hilos, max_retries=politica)
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def _filtros(select=None, where=None):
+    """Armamos los Parámetros SoQL Comunes a Todas las Páginas"""
+    params = {}
+    if select:
+        params["$select"] = select if isinstance(select, str) else ",".join(select)
+    if where:
+        params["$where"] = where
+    return params
+
+
+def contar_registros(url, where=None, sesion=None):
+    """Consultamos Cuántos Registros Devuelve la Consulta con '$select=count(*)'"""
+    params = {"$select": "count(*)"}
+    if where:
+        params["$where"] = where
+    respuesta = http_cache.leer_json(http_cache.obtener(url, params=params, sesion=sesion))
+    if not respuesta:
+        return 0
+    return int(next(iter(respuesta[0].values())))
+
+
+def descargar_pagina(url, offset, tamano_pagina=TAMANO_PAGINA, select=None, where=None, sesion=None):
+    """Descargamos una Página de la Consulta Ordenada por ':id'"""
+    params = _filtros(select, where)
+    params.update({"$order": ":id", "$limit": tamano_pagina, "$offset": offset})
+    return http_cache.leer_json(http_cache.obtener(url, params=params, sesion=sesion))
+
+
+def descargar_todo(url, select=None, where=None, tamano_pagina=TAMANO_PAGINA, hilos=HILOS):
+    """
+    Descargamos todos los registros de una consulta Socrata en páginas concurrentes.
+
+    Retorna:
+        Lista de registros (diccionarios) en el orden de ':id'.
+    """
+    with crear_sesion(hilos) as sesion:
+        total = contar_registros(url, where=where, sesion=sesion)
+        offsets = list(range(0, total, tamano_pagina))
+        print(f"Socrata: {total} Registros en {len(offsets)} Páginas de {tamano_pagina} ({hilos} Hilos)")
+
+        with ThreadPoolExecutor(max_workers=hilos) as grupo:
+            paginas = list(grupo.map(
+                lambda offset: descargar_pagina(url, offset, tamano_pagina, select, where, sesion),
+                offsets,
+            ))
+
+        # Si el Conjunto Creció Desde el Conteo, Seguimos Paginando Hasta una Página Incompleta
+        siguiente = total if not offsets else offsets[-1] + tamano_pagina
+        while paginas and len(paginas[-1]) == tamano_pagina:
+            paginas.append(descargar_pagina(url, siguiente, tamano_pagina, select, where, sesion))
+            siguiente += tamano_pagina
+
+    return [registro for pagina in paginas for registro in pagina]
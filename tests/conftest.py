@@ -0,0 +1,33 @@
+import os
+import sys
+import json
+import pytest
+
+"""
+Configuración común de las pruebas: los módulos de src/bigdata se importan entre sí por nombre
+(import metricas, import esquema...), igual que al ejecutar los scripts, así que agregamos esa
+carpeta a sys.path. Las métricas se desactivan para no escribir en static/metricas.
+"""
+RUTA_MODULOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "bigdata")
+
+# Respuesta Guardada del API de COVID (420 Registros Diarios)
+RUTA_FIXTURE_COVID = os.path.join(RUTA_MODULOS, "static", "fixtures", "covid_us_daily.json")
+
+if RUTA_MODULOS not in sys.path:
+    sys.path.insert(0, RUTA_MODULOS)
+
+os.environ.setdefault("METRICAS", "0")
+
+
+@pytest.fixture
+def df_covid():
+    """DataFrame con los registros del fixture del API, con las columnas de la tabla 'covid_data'."""
+    import pandas as pd
+    import ingestion
+
+    with open(RUTA_FIXTURE_COVID, encoding="utf-8") as archivo:
+        registros = json.load(archivo)
+    return pd.DataFrame.from_records(
+        [tuple(registro.get(columna) for columna in ingestion.COLUMNAS_COVID) for registro in registros],
+        columns=list(ingestion.COLUMNAS_COVID),
+    )
@@ -0,0 +1,78 @@
+import sqlite3
+import pandas as pd
+import pytest
+import almacenamiento
+import cleaning
+import cleaning_sql
+import esquema
+
+"""
+Pruebas de equivalencia entre la limpieza por bloques y la limpieza en memoria sobre los mismos
+datos sucios, con bloques pequeños para que haya bloques con columnas completamente nulas.
+"""
+
+# Registros por Bloque en las Pruebas
+TAMANO_BLOQUE_PRUEBA = 40
+
+
+@pytest.fixture
+def conexion(tmp_path, monkeypatch):
+    monkeypatch.setattr(cleaning, "RUTA_CSV_LIMPIO", str(tmp_path / "Tabla_Datos_Limpios.csv"))
+    monkeypatch.setattr(almacenamiento, "RUTA_PARQUET", str(tmp_path / "parquet"))
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    yield conexion
+    conexion.close()
+
+
+def _linea(detalles, prefijo):
+    return next(linea for linea in detalles if linea.startswith(prefijo))
+
+
+def _bloques(df, tamano):
+    return (df.iloc[inicio:inicio + tamano] for inicio in range(0, len(df), tamano))
+
+
+# Sin depender de que pandas convierta en silencio las columnas de objetos al imputar
+@pytest.mark.filterwarnings("error::FutureWarning")
+def test_por_bloques_equivale_a_pandas_en_memoria(conexion, df_covid, monkeypatch):
+    df_sucio = cleaning.simular_datos_sucios(df_covid)
+    # Un número y su forma de texto son filas distintas para pandas, aunque caigan en bloques distintos
+    numero = df_sucio.iloc[[0]].copy()
+    texto = numero.copy()
+    texto["positive"] = str(float(numero["positive"].iloc[0]))
+    df_sucio = pd.concat([df_sucio, numero, texto], ignore_index=True)
+    assert any(
+        bloque[columna].isna().all()
+        for bloque in _bloques(df_sucio, TAMANO_BLOQUE_PRUEBA) for columna in cleaning.COLUMNAS_NUMERICAS_LIMPIEZA
+    )
+
+    # Registramos los tipos de cada bloque limpio antes de que SQLite los pierda
+    tipos_bloques = []
+    cargar_tabla_sombra = esquema.cargar_tabla_sombra
+
+    def registrar_tipos(conexion, tabla, df, **opciones):
+        tipos_bloques.append(df.dtypes.to_dict())
+        return cargar_tabla_sombra(conexion, tabla, df, **opciones)
+
+    monkeypatch.setattr(esquema, "cargar_tabla_sombra", registrar_tipos)
+
+    df_pandas, detalles_pandas = cleaning.operaciones_de_limpieza(df_sucio)
+    cantidad, detalles_bloques, _ = cleaning.operaciones_de_limpieza_por_bloques(
+        _bloques(df_sucio, TAMANO_BLOQUE_PRUEBA), conexion, tamano_bloque=TAMANO_BLOQUE_PRUEBA
+    )
+    df_bloques = pd.read_sql_query("SELECT * FROM covid_data_cleaned", conexion)
+
+    assert cantidad == len(df_pandas)
+    for prefijo in ("Duplicados Iniciales", "Duplicados Finales Eliminados", "Registros Finales"):
+        assert _linea(detalles_bloques, prefijo) == _linea(detalles_pandas, prefijo)
+    for columna in cleaning.COLUMNAS_NUMERICAS_LIMPIEZA:
+        prefijo = f"Valores Nulos en '{columna}'"
+        assert _linea(detalles_bloques, prefijo) == _linea(detalles_pandas, prefijo)
+    assert cleaning_sql._iguales(df_pandas, df_bloques)
+    # Los bloques con una columna completamente nula conservan los tipos de la limpieza en memoria
+    assert len(tipos_bloques) > 1
+    # (sin las columnas de fecha de auditoría, cuyas categorías dependen del reloj)
+    auditoria = ["anio_auditoria", "mes_auditoria", "dia_auditoria", "fecha_completa_auditoria"]
+    tipos_pandas = df_pandas.drop(columns=auditoria).dtypes.to_dict()
+    for tipos in tipos_bloques:
+        assert {columna: tipos[columna] for columna in tipos_pandas} == tipos_pandas
@@ -0,0 +1,65 @@
+import sqlite3
+import pandas as pd
+import pytest
+import cleaning
+import cleaning_sql
+import esquema
+
+"""
+Pruebas de equivalencia entre el backend SQL de limpieza y el de pandas sobre los mismos datos
+sucios: pandas limpia el DataFrame en memoria y SQL una copia guardada en SQLite.
+"""
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    yield conexion
+    conexion.close()
+
+
+def _linea(detalles, prefijo):
+    return next(linea for linea in detalles if linea.startswith(prefijo))
+
+
+def test_tabla_sucia_conserva_el_tipo_de_los_valores_mezclados(conexion, df_covid):
+    df_sucio = cleaning.simular_datos_sucios(df_covid)
+    esquema.reemplazar_tabla(conexion, "covid_data_dirty", df_sucio)
+
+    tipos = dict(conexion.execute("SELECT DISTINCT typeof(positive), 1 FROM covid_data_dirty").fetchall())
+    assert {"real", "text"} <= set(tipos)
+    releido = pd.read_sql_query("SELECT * FROM covid_data_dirty", conexion)
+    assert int(releido.duplicated().sum()) == int(df_sucio.duplicated().sum())
+
+
+def test_sql_equivale_a_pandas_en_memoria(conexion, df_covid):
+    df_sucio = cleaning.simular_datos_sucios(df_covid)
+    # Un número y su forma de texto son filas distintas para pandas
+    numero = df_sucio.iloc[[0]].copy()
+    texto = numero.copy()
+    texto["positive"] = str(float(numero["positive"].iloc[0]))
+    df_sucio = pd.concat([df_sucio, numero, texto], ignore_index=True)
+
+    df_pandas, detalles_pandas = cleaning.operaciones_de_limpieza(df_sucio)
+    esquema.reemplazar_tabla(conexion, "covid_data_dirty", df_sucio)
+    detalles_sql = cleaning_sql.operaciones_de_limpieza_sql(conexion)
+    df_sql = pd.read_sql_query("SELECT * FROM covid_data_cleaned", conexion)
+
+    for prefijo in ("Duplicados Iniciales", "Duplicados Finales Eliminados", "Valores Nulos en 'positive'"):
+        assert _linea(detalles_sql, prefijo) == _linea(detalles_pandas, prefijo)
+    assert cleaning_sql._iguales(df_pandas, df_sql)
+
+
+def test_comparar_con_pandas(tmp_path, df_covid):
+    ruta = str(tmp_path / "ingestion.db")
+    resultado = cleaning_sql.comparar_con_pandas(ruta, repeticiones=1, df_sucio=cleaning.simular_datos_sucios(df_covid))
+
+    assert resultado["equivalentes"]
+    assert resultado["duplicados_iniciales"]["pandas"] == resultado["duplicados_iniciales"]["sql"]
+    conexion = sqlite3.connect(ruta)
+    try:
+        tablas = {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conexion.close()
+    assert cleaning_sql.TABLA_COMPARACION_SUCIA not in tablas
+    assert cleaning_sql.TABLA_COMPARACION not in tablas
@@ -0,0 +1,58 @@
+import sys
+import types
+import pytest
+import cli
+
+"""
+Pruebas de la línea de comandos: 'cli todo' omite las etapas siguientes a la ingesta si el origen
+no cambió, y el arranque de 'cli' cumple el presupuesto de importación sin librerías pesadas.
+"""
+
+
+@pytest.fixture
+def etapas_falsas(monkeypatch):
+    """Reemplazamos el módulo de cada etapa por uno falso que registra su ejecución."""
+    ejecutadas = []
+    resultado_ingesta = {"valor": True}
+    for etapa, modulo in cli.ETAPAS.items():
+        falso = types.ModuleType(modulo)
+        if etapa == "ingesta":
+            falso.main = lambda: ejecutadas.append("ingesta") or resultado_ingesta["valor"]
+        else:
+            falso.main = lambda etapa=etapa: ejecutadas.append(etapa)
+        monkeypatch.setitem(sys.modules, modulo, falso)
+    return ejecutadas, resultado_ingesta
+
+
+def test_todo_omite_las_etapas_si_el_origen_no_cambio(etapas_falsas):
+    ejecutadas, resultado_ingesta = etapas_falsas
+    resultado_ingesta["valor"] = False
+    assert cli.main(["todo"]) == 0
+    assert ejecutadas == ["ingesta"]
+
+
+def test_todo_ejecuta_todo_si_el_origen_cambio_o_se_fuerza(etapas_falsas):
+    ejecutadas, resultado_ingesta = etapas_falsas
+    assert cli.main(["todo"]) == 0
+    assert ejecutadas == list(cli.ETAPAS)
+
+    ejecutadas.clear()
+    resultado_ingesta["valor"] = False
+    assert cli.main(["todo", "--forzar"]) == 0
+    assert ejecutadas == list(cli.ETAPAS)
+
+
+def test_arranque_dentro_del_presupuesto():
+    cumple, milisegundos, pesados, costosos = cli.verificar_importacion("cli")
+    assert pesados == []
+    assert cumple, f"'cli' importa en {milisegundos:.1f} ms (presupuesto {cli.PRESUPUESTO_IMPORTACION_MS:.0f} ms): {costosos}"
+
+
+def test_importtime_detecta_librerias_pesadas(tmp_path, monkeypatch):
+    # Módulo sintético que sí usa pandas al importarse
+    (tmp_path / "modulo_con_pandas.py").write_text("import pandas as pd\nVACIO = pd.DataFrame()\n", encoding="utf-8")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+
+    cumple, _, pesados, _ = cli.verificar_importacion("modulo_con_pandas", limite_ms=float("inf"), repeticiones=1)
+    assert not cumple
+    assert "pandas" in pesados
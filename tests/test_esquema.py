@@ -0,0 +1,67 @@
+import sys
+import sqlite3
+import subprocess
+import pytest
+import esquema
+
+"""
+Pruebas de la verificación de planes de consulta (EXPLAIN QUERY PLAN) de esquema.py sobre una
+base de datos pequeña creada en la carpeta temporal de pytest.
+"""
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    """Base de datos con covid_data (30 fechas) y su índice de fecha, sin las demás tablas."""
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    conexion.execute("CREATE TABLE covid_data (date INTEGER, positive REAL, hash TEXT)")
+    conexion.executemany(
+        "INSERT INTO covid_data VALUES (?, ?, ?)",
+        [(20210101 + dia, float(dia), f"h{dia}") for dia in range(30)],
+    )
+    esquema.crear_indices(conexion)
+    conexion.commit()
+    yield conexion
+    conexion.close()
+
+
+def _indices(conexion):
+    return {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_planes_usan_el_indice_de_fecha(conexion):
+    resultados = esquema.verificar_planes(conexion)
+
+    # Solo se revisan las consultas de covid_data: las tablas que no existen se omiten
+    assert [descripcion for descripcion, _, _ in resultados] == [
+        "Muestra de Excel (últimas fechas)",
+        "Resumen mensual (rango de un mes)",
+    ]
+    for _, usa_indice, plan in resultados:
+        assert usa_indice
+        assert any(esquema.nombre_indice("covid_data") in paso for paso in plan)
+
+
+def test_verificacion_falla_si_falta_el_indice(conexion):
+    esquema.eliminar_indices(conexion, ["covid_data"])
+    conexion.commit()
+
+    resultados = esquema.verificar_planes(conexion)
+
+    assert resultados
+    assert not any(usa_indice for _, usa_indice, _ in resultados)
+    # La verificación solo lee: no vuelve a crear el índice
+    assert esquema.nombre_indice("covid_data") not in _indices(conexion)
+    assert not conexion.in_transaction
+
+
+def test_modulo_falla_sin_indice_y_no_modifica_la_base(tmp_path, conexion):
+    esquema.eliminar_indices(conexion, ["covid_data"])
+    conexion.commit()
+    ruta = str(tmp_path / "ingestion.db")
+
+    proceso = subprocess.run([sys.executable, esquema.__file__, ruta], capture_output=True, text=True)
+
+    assert proceso.returncode != 0
+    assert "ERROR" in proceso.stdout
+    assert esquema.nombre_indice("covid_data") not in _indices(conexion)
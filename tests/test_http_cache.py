@@ -0,0 +1,102 @@
+import gzip
+import pytest
+import requests
+import http_cache
+
+"""
+Pruebas de la caché HTTP con una sesión falsa que responde sin ir a la red.
+"""
+
+
+class RespuestaFalsa:
+    def __init__(self, estado, cuerpo=b"", cabeceras=None):
+        self.status_code = estado
+        self.headers = cabeceras or {}
+        self._cuerpo = cuerpo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.close()
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+    def iter_content(self, chunk_size=1):
+        for inicio in range(0, len(self._cuerpo), chunk_size):
+            yield self._cuerpo[inicio:inicio + chunk_size]
+
+
+class SesionFalsa:
+    """Responde con 'responder(params, cabeceras)' y guarda las cabeceras de cada petición."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.peticiones = []
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=None):
+        self.peticiones.append(dict(headers or {}))
+        return self.responder(params, headers or {})
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "RUTA_CACHE_HTTP", str(tmp_path / "http"))
+    monkeypatch.setattr(http_cache, "ULTIMOS_RESULTADOS", {})
+
+
+def test_paginas_con_la_misma_url_no_se_pisan():
+    cuerpos = {0: b"[1, 2]", 2: b"[3]"}
+    sesion = SesionFalsa(lambda params, _: RespuestaFalsa(200, cuerpos[params["$offset"]], {"ETag": "v1"}))
+    url = "https://datos.example/recurso.json"
+    http_cache.obtener(url, params={"$limit": 2, "$offset": 0}, sesion=sesion)
+    http_cache.obtener(url, params={"$limit": 2, "$offset": 2}, sesion=sesion)
+
+    # Segunda ejecución: la primera página cambia y la segunda no
+    cuerpos[0] = b"[1, 2, 9]"
+    http_cache.obtener(url, params={"$limit": 2, "$offset": 0}, ttl=0, sesion=sesion)
+    http_cache.obtener(url, params={"$limit": 2, "$offset": 2}, ttl=0, sesion=sesion)
+
+    assert http_cache.fue_modificado(url, {"$offset": 0, "$limit": 2})
+    assert not http_cache.fue_modificado(url, {"$limit": 2, "$offset": 2})
+
+
+def test_304_sin_copia_local_repite_sin_validadores(monkeypatch):
+    def responder(_, cabeceras):
+        # Un intermediario que contesta 304 a cualquier petición condicional
+        if cabeceras:
+            return RespuestaFalsa(304)
+        return RespuestaFalsa(200, b'{"ok": true}', {"ETag": "v2"})
+
+    sesion = SesionFalsa(responder)
+    url = "https://api.example/datos.json"
+    http_cache.obtener(url, sesion=sesion)
+
+    # El cuerpo desaparece después de leer los metadatos, así que el 304 no tiene copia que reutilizar
+    ruta_cuerpo, _ = http_cache._rutas(http_cache._clave(url))
+    leer_metadatos = http_cache._leer_metadatos
+
+    def leer_y_borrar_cuerpo(ruta_meta, ruta):
+        metadatos = leer_metadatos(ruta_meta, ruta)
+        http_cache.os.remove(ruta_cuerpo)
+        return metadatos
+
+    monkeypatch.setattr(http_cache, "_leer_metadatos", leer_y_borrar_cuerpo)
+    sesion.peticiones.clear()
+    resultado = http_cache.obtener(url, ttl=0, sesion=sesion)
+
+    assert sesion.peticiones == [{"If-None-Match": "v2"}, {}]
+    assert resultado["estado"] == "descarga"
+    with gzip.open(resultado["ruta"], "rb") as archivo:
+        assert archivo.read() == b'{"ok": true}'
+
+
+def test_304_repetido_sin_copia_local_es_un_error():
+    sesion = SesionFalsa(lambda *_: RespuestaFalsa(304))
+    with pytest.raises(requests.HTTPError):
+        http_cache.obtener("https://api.example/datos.json", sesion=sesion)
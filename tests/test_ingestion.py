@@ -0,0 +1,87 @@
+import json
+import pytest
+import esquema
+import ingestion
+from conftest import RUTA_FIXTURE_COVID
+
+"""
+Pruebas de la ingesta incremental: el filtro por la marca de agua y el resumen mensual cuando una
+actualización mueve la fecha de un registro.
+"""
+
+# Columnas del Resumen Mensual que no Dependen del Reloj
+COLUMNAS_RESUMEN = (
+    "mes, registros, primera_fecha, ultima_fecha, incremento_positivos, incremento_fallecidos, "
+    "positivos_acumulados, fallecidos_acumulados"
+)
+
+
+@pytest.fixture
+def conexion(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "DB_PATH", str(tmp_path / "ingestion.db"))
+    conexion = ingestion.crear_db()
+    yield conexion
+    conexion.close()
+
+
+@pytest.fixture
+def registros():
+    with open(RUTA_FIXTURE_COVID, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _resumen_mensual(conexion):
+    return conexion.execute(f"SELECT {COLUMNAS_RESUMEN} FROM {esquema.TABLA_RESUMEN_MENSUAL} ORDER BY mes").fetchall()
+
+
+def test_la_marca_de_agua_omite_lo_ya_ingerido(conexion, registros, monkeypatch):
+    primero = ingestion.insertar_datos_incremental(conexion, registros, tamano_lote=100)
+    assert primero == {"insertados": 420, "actualizados": 0, "sin_cambios": 0, "omitidos_por_marca": 0}
+
+    # Solo se buscan en la tabla las claves de cada lote, nunca la tabla completa
+    busquedas = []
+    buscar_existentes = ingestion._buscar_existentes
+
+    def registrar_busqueda(conn, claves):
+        claves = list(claves)
+        busquedas.append(len(claves))
+        return buscar_existentes(conn, claves)
+
+    monkeypatch.setattr(ingestion, "_buscar_existentes", registrar_busqueda)
+    nuevo = dict(registros[0], hash="nuevo", date=20210308, lastModified="2021-03-08T24:00:00Z")
+    segundo = ingestion.insertar_datos_incremental(conexion, [nuevo] + registros, tamano_lote=100)
+
+    assert segundo == {"insertados": 1, "actualizados": 0, "sin_cambios": 0, "omitidos_por_marca": 420}
+    assert busquedas == [100, 100, 100, 100, 21]
+    assert conexion.execute("SELECT COUNT(*) FROM covid_data").fetchone()[0] == 421
+    assert ingestion.obtener_watermark(conexion)["ultima_modificacion"] == "2021-03-08T24:00:00Z"
+
+
+def test_hash_nuevo_con_lastmodified_antiguo_se_inserta(conexion, registros):
+    ingestion.insertar_datos_incremental(conexion, registros)
+    marca = ingestion.obtener_watermark(conexion)["ultima_modificacion"]
+
+    # Un registro cargado tarde (backfill) conserva un lastModified anterior a la marca de agua
+    tardio = dict(registros[0], hash="tardio", date=20200101, lastModified="2020-01-01T24:00:00Z")
+    resumen = ingestion.insertar_datos_incremental(conexion, [tardio] + registros)
+
+    assert resumen == {"insertados": 1, "actualizados": 0, "sin_cambios": 0, "omitidos_por_marca": 420}
+    fila = conexion.execute("SELECT date, lastModified FROM covid_data WHERE hash = 'tardio'").fetchone()
+    assert fila == (20200101, "2020-01-01T24:00:00Z")
+    assert ingestion.obtener_watermark(conexion)["ultima_modificacion"] == marca
+
+
+def test_actualizacion_que_cambia_de_mes_recalcula_ambos_meses(conexion, registros):
+    ingestion.insertar_datos_incremental(conexion, registros)
+    movido = next(registro for registro in registros if registro["date"] == 20210301)
+    movido = dict(movido, date=20210228, lastModified="2021-03-09T24:00:00Z")
+
+    resumen = ingestion.insertar_datos_incremental(conexion, [movido])
+    conexion.commit()
+
+    assert resumen["actualizados"] == 1
+    incremental = _resumen_mensual(conexion)
+    esquema.actualizar_resumen_mensual(conexion)
+    assert incremental == _resumen_mensual(conexion)
+    marzo = next(fila for fila in incremental if fila[0] == 202103)
+    assert marzo[2] == 20210302
@@ -0,0 +1,66 @@
+import json
+import pytest
+import ingestion
+from conftest import RUTA_FIXTURE_COVID
+
+"""
+Pruebas del parser incremental ingestion.iterar_arreglo_json: el resultado debe ser el mismo que
+json.loads sin importar dónde caigan los cortes entre fragmentos.
+"""
+
+# Arreglo con los Casos Difíciles: Multibyte, Escapes, Corchetes y Comas Dentro de Cadenas,
+# Anidamiento, Números y Literales que Pueden Quedar Partidos
+ARREGLO_DIFICIL = (
+    ' \n[ {"municipio": "Itagüí", "nota": "a, b ] c \\"[x]\\" \\u00e9 😀"},'
+    ' {"anidado": [[1, 2], {"x": [null, true, false]}]}, 12345, -0.5e-3, "texto",'
+    ' true, false, null, [], {} ]\n'
+)
+
+
+def _fragmentos(datos, tamano):
+    return [datos[inicio:inicio + tamano] for inicio in range(0, len(datos), tamano)]
+
+
+@pytest.mark.parametrize("tamano", [1, 2, 3, 5, 7, 64, 10_000])
+def test_cortes_en_cualquier_posicion(tamano):
+    datos = ARREGLO_DIFICIL.encode("utf-8")
+    assert list(ingestion.iterar_arreglo_json(_fragmentos(datos, tamano))) == json.loads(ARREGLO_DIFICIL)
+
+
+def test_fixture_del_api_por_fragmentos():
+    with open(RUTA_FIXTURE_COVID, "rb") as archivo:
+        datos = archivo.read()
+    for tamano in (1000, 4096, 65536):
+        assert list(ingestion.iterar_arreglo_json(_fragmentos(datos, tamano))) == json.loads(datos)
+
+
+def test_numero_al_final_de_un_fragmento_no_se_corta():
+    # "12" llega como "1" y "2": el primer fragmento por sí solo ya es un número válido
+    assert list(ingestion.iterar_arreglo_json([b"[1", b"2, 3", b"4]"])) == [12, 34]
+    # "-0" y "1" también son números válidos antes de recibir ".5" y "e3"
+    assert list(ingestion.iterar_arreglo_json([b"[-0", b".5, 1", b"e3]"])) == [-0.5, 1000.0]
+
+
+@pytest.mark.parametrize("datos", [b"[]", b"  [ ]  ", b"[\n]"])
+def test_arreglo_vacio(datos):
+    assert list(ingestion.iterar_arreglo_json(_fragmentos(datos, 1))) == []
+
+
+def test_fragmentos_vacios_intermedios():
+    assert list(ingestion.iterar_arreglo_json([b"", b"[1,", b"", b" 2]", b""])) == [1, 2]
+
+
+def test_respuesta_que_no_es_un_arreglo():
+    with pytest.raises(ValueError, match="no es un Arreglo"):
+        list(ingestion.iterar_arreglo_json([b'{"a": 1}']))
+
+
+@pytest.mark.parametrize("datos", [b"", b"[", b'[{"a": 1}', b'[{"a": 1}, {"b"'])
+def test_arreglo_truncado(datos):
+    with pytest.raises(ValueError):
+        list(ingestion.iterar_arreglo_json(_fragmentos(datos, 2)))
+
+
+def test_elemento_invalido():
+    with pytest.raises(json.JSONDecodeError):
+        list(ingestion.iterar_arreglo_json([b'[{"a": 1}, {a: 2}]']))
@@ -0,0 +1,71 @@
+import time
+import sqlite3
+import pytest
+import metricas
+
+"""
+Pruebas del decorador metricas.instrumentar con las métricas activas y acumuladas en memoria.
+"""
+
+
+@pytest.fixture
+def registros(monkeypatch):
+    """Activamos la instrumentación y capturamos los registros sin escribirlos."""
+    capturados = []
+    monkeypatch.setattr(metricas, "METRICAS_ACTIVAS", True)
+    monkeypatch.setattr(metricas, "registrar", capturados.append)
+    return capturados
+
+
+def test_generador_mide_el_tiempo_dentro_del_generador(registros):
+    @metricas.instrumentar
+    def bloques(cantidad):
+        for _ in range(cantidad):
+            time.sleep(0.02)
+            yield [0] * 10
+
+    for _ in bloques(3):
+        time.sleep(0.05)  # Tiempo del consumidor: no cuenta para el generador
+
+    (registro,) = registros
+    assert registro["funcion"] == "bloques"
+    assert 0.05 <= registro["duracion_s"] < 0.15
+    assert registro["filas_salida"] == 30
+    assert registro["error"] is None
+
+
+def test_generador_cerrado_antes_del_final_no_es_error(registros):
+    @metricas.instrumentar
+    def infinito():
+        while True:
+            yield [0]
+
+    generador = infinito()
+    next(generador)
+    generador.close()
+
+    assert registros[0]["error"] is None
+    assert registros[0]["filas_salida"] == 1
+
+
+def test_registros_se_escriben_al_vaciar(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas, "RUTA_METRICAS_JSONL", str(tmp_path / "metricas.jsonl"))
+    monkeypatch.setattr(metricas, "RUTA_BD_METRICAS", str(tmp_path / "ingestion.db"))
+    monkeypatch.setattr(metricas, "METRICAS_ACTIVAS", True)
+    monkeypatch.setattr(metricas, "_PENDIENTES", [])
+
+    @metricas.instrumentar
+    def etapa():
+        return [1, 2, 3]
+
+    etapa()
+    etapa()
+    assert not (tmp_path / "metricas.jsonl").exists()
+
+    metricas.vaciar()
+    assert len((tmp_path / "metricas.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    try:
+        assert conexion.execute("SELECT COUNT(*), MIN(rss_pico_proceso_mb) > 0 FROM metrics").fetchone() == (2, 1)
+    finally:
+        conexion.close()
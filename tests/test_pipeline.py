@@ -0,0 +1,71 @@
+import sqlite3
+import pandas as pd
+import pytest
+import esquema
+import ingestion
+import pipeline
+
+"""
+Pruebas de la huella de las tablas que usa la caché del pipeline: se toma de la versión que
+registra cada escritura, sin leer la tabla, y solo se recorre completa como respaldo.
+"""
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    yield conexion
+    conexion.close()
+
+
+def test_huella_por_version_sin_leer_la_tabla(conexion, df_covid, monkeypatch):
+    esquema.reemplazar_tabla(conexion, "covid_data_dirty", df_covid)
+    esquema.reemplazar_tabla(conexion, "otra_tabla", pd.DataFrame({"valor": [1, 2, 3]}))
+    monkeypatch.setattr(pipeline.pd, "read_sql_query", lambda *_, **__: pytest.fail("La huella leyó la tabla completa"))
+
+    huellas = [pipeline._huella_tabla(conexion, tabla) for tabla in ("covid_data_dirty", "otra_tabla")]
+    assert all(huella[0] == "version" for huella in huellas)
+    assert huellas == [pipeline._huella_tabla(conexion, tabla) for tabla in ("covid_data_dirty", "otra_tabla")]
+
+    # Una nueva escritura cambia la huella aunque el contenido sea el mismo
+    monkeypatch.undo()
+    esquema.reemplazar_tabla(conexion, "otra_tabla", pd.DataFrame({"valor": [1, 2, 3]}))
+    assert pipeline._huella_tabla(conexion, "otra_tabla") != huellas[1]
+    assert pipeline._huella_tabla(conexion, "covid_data_dirty") == huellas[0]
+
+
+def test_tabla_sin_version_usa_el_contenido(conexion, monkeypatch):
+    conexion.execute("CREATE TABLE externa (valor INTEGER)")
+    conexion.execute("INSERT INTO externa VALUES (1)")
+    conexion.commit()
+    huella = pipeline._huella_tabla(conexion, "externa")
+    assert huella[0] == "contenido"
+
+    esquema.reemplazar_tabla(conexion, "externa", pd.DataFrame({"valor": [1]}))
+    assert pipeline._huella_tabla(conexion, "externa")[0] == "version"
+    monkeypatch.setattr(pipeline, "HUELLA_TABLAS_POR_CONTENIDO", True)
+    assert pipeline._huella_tabla(conexion, "externa") == huella
+    assert pipeline._huella_tabla(conexion, "no_existe") is None
+
+
+def test_base_anterior_a_las_versiones(conexion):
+    # resumen_tablas sin la columna 'version': la lectura no falla y la escritura la agrega
+    conexion.execute(f"CREATE TABLE {esquema.TABLA_RESUMEN} (tabla TEXT PRIMARY KEY, filas INTEGER, "
+                     "primera_fecha INTEGER, ultima_fecha INTEGER, actualizado_en TEXT)")
+    assert esquema.leer_version(conexion, "covid_data") is None
+    esquema.registrar_version(conexion, "covid_data")
+    esquema.registrar_version(conexion, "covid_data")
+    assert esquema.leer_version(conexion, "covid_data") == 2
+
+
+def test_insertar_datos_incremental_devuelve_la_tabla(tmp_path, df_covid, monkeypatch):
+    monkeypatch.setattr(ingestion, "DB_PATH", str(tmp_path / "ingestion.db"))
+    monkeypatch.setattr(ingestion, "MODO_INGESTA", "incremental")
+    monkeypatch.setattr(ingestion, "generar_auditoria", lambda *_, **__: None)
+    registros = df_covid.to_dict("records")
+
+    pipeline.nodo_insertar_datos(registros[:400])
+    # La segunda carga solo trae 20 registros, pero la limpieza debe recibir la tabla acumulada
+    df = pipeline.nodo_insertar_datos(registros[400:])
+    assert len(df) == len(registros)
+    assert list(df.columns) == list(ingestion.COLUMNAS_COVID)
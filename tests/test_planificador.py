@@ -0,0 +1,27 @@
+import time
+
+import planificador
+
+"""
+Pruebas del planificador: las tareas 'db' (escrituras en SQLite) corren de una en una en un solo hilo.
+"""
+
+
+def _esperar(segundos):
+    time.sleep(segundos)
+    return segundos
+
+
+def test_tareas_db_no_se_solapan():
+    tareas = {f"escritura_{i}": planificador.tarea(_esperar, 0.05, tipo="db") for i in range(4)}
+    tareas["lectura"] = planificador.tarea(_esperar, 0.05)
+    _, traza = planificador.ejecutar(tareas, hilos=4, procesos=0)
+
+    escrituras = sorted((evento for evento in traza if evento["tipo"] == "db"), key=lambda evento: evento["inicio"])
+    assert {evento["hilo"] for evento in escrituras} == {escrituras[0]["hilo"]}
+    for anterior, siguiente in zip(escrituras, escrituras[1:]):
+        assert siguiente["inicio"] >= anterior["fin"]
+    # La lectura corre en el grupo de hilos de E/S, en paralelo con las escrituras
+    lectura = next(evento for evento in traza if evento["tarea"] == "lectura")
+    assert lectura["hilo"] != escrituras[0]["hilo"]
+    assert lectura["inicio"] < escrituras[-1]["inicio"]
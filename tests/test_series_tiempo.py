@@ -0,0 +1,54 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+import series_tiempo
+
+"""
+Pruebas de series_tiempo.py sobre una tabla covid_data_cleaned sintética de 90 días.
+"""
+
+
+@pytest.fixture
+def conexion(tmp_path):
+    fechas = pd.date_range("2020-04-01", periods=90, freq="D")
+    incrementos = np.arange(90) * 10 + 100
+    df = pd.DataFrame({
+        "fecha": [int(fecha.strftime("%Y%m%d")) for fecha in fechas],
+        "total_resultados": (np.arange(90) * 1000.0 + 5000).cumsum(),
+        "incremento_positivos": incrementos,
+        "incremento_fallecidos": incrementos // 10,
+        "columnas_imputadas": "ninguna",
+    })
+    conexion = sqlite3.connect(str(tmp_path / "ingestion.db"))
+    df.to_sql(series_tiempo.TABLA_ORIGEN, conexion, index=False)
+    yield conexion
+    conexion.close()
+
+
+def test_total_imputado_no_entra_en_la_serie(conexion):
+    # Un registro repetido del último día con total_resultados imputado (mediana mayor al valor real)
+    conexion.execute(f"""
+        INSERT INTO {series_tiempo.TABLA_ORIGEN}
+        SELECT fecha, 1e12, incremento_positivos, incremento_fallecidos, 'hospitalizados,total_resultados'
+        FROM {series_tiempo.TABLA_ORIGEN} ORDER BY fecha DESC LIMIT 1
+    """)
+    diario = series_tiempo.serie_diaria(series_tiempo.cargar_entradas(conexion))
+
+    assert diario["total_resultados"].iloc[-1] < 1e12
+    assert diario["total_resultados"].is_monotonic_increasing
+
+
+def test_incremental_detecta_cambios_en_la_historia(conexion):
+    series_tiempo.actualizar_series(conexion, incremental=False)
+    assert series_tiempo.actualizar_series(conexion, incremental=True)["filas_recalculadas"] == 0
+
+    # Una revisión de un día de abril (no solo de la cola) invalida desde ese mes
+    conexion.execute(f"UPDATE {series_tiempo.TABLA_ORIGEN} SET incremento_positivos = 0 WHERE fecha = 20200415")
+    conexion.commit()
+    detalles = series_tiempo.actualizar_series(conexion, incremental=True)
+    incremental = series_tiempo.leer_series(conexion)
+    series_tiempo.actualizar_series(conexion, incremental=False)
+
+    assert detalles["desde"] == 20200401
+    pd.testing.assert_frame_equal(incremental, series_tiempo.leer_series(conexion))
@@ -0,0 +1,146 @@
+import json
+import pytest
+import http_cache
+import socrata
+
+"""
+Pruebas de la paginación de socrata.descargar_todo con una sesión falsa de requests que
+responde como un recurso Socrata ('$select=count(*)', '$limit', '$offset' y '$where').
+"""
+
+URL = "https://datos.example/resource/abcd-1234.json"
+
+
+class RespuestaFalsa:
+    def __init__(self, datos):
+        self.status_code = 200
+        self.headers = {}
+        self._cuerpo = json.dumps(datos).encode("utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.close()
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield self._cuerpo
+
+
+class RecursoSocrata:
+    """Sesión falsa: 'registros' son los datos actuales y 'conteo' lo que responde count(*)."""
+
+    def __init__(self, registros, conteo=None):
+        self.registros = registros
+        self.conteo = len(registros) if conteo is None else conteo
+        self.peticiones = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        pass
+
+    def get(self, url, params=None, headers=None, stream=False, timeout=None):
+        params = dict(params or {})
+        self.peticiones.append(params)
+        if params.get("$select") == "count(*)":
+            return RespuestaFalsa([{"count": str(self.conteo)}])
+        filas = self.registros
+        if "$where" in params:
+            filas = [fila for fila in filas if fila["anio"] == params["$where"].split("=")[1].strip("' ")]
+        inicio = params["$offset"]
+        return RespuestaFalsa(filas[inicio:inicio + params["$limit"]])
+
+    def paginas(self):
+        return [params for params in self.peticiones if "$offset" in params]
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "RUTA_CACHE_HTTP", str(tmp_path / "http"))
+    monkeypatch.setattr(http_cache, "ULTIMOS_RESULTADOS", {})
+
+
+@pytest.fixture
+def recurso(monkeypatch):
+    """Reemplazamos la sesión de requests de socrata por el recurso falso."""
+    def crear(registros, conteo=None):
+        falso = RecursoSocrata(registros, conteo)
+        monkeypatch.setattr(socrata, "crear_sesion", lambda *argumentos, **opciones: falso)
+        return falso
+    return crear
+
+
+def _registros(cantidad):
+    return [{":id": f"row-{numero:03d}", "anio": "2020" if numero % 2 else "2021"} for numero in range(cantidad)]
+
+
+def test_descarga_todas_las_paginas_en_orden(recurso):
+    registros = _registros(12)
+    falso = recurso(registros)
+
+    assert socrata.descargar_todo(URL, tamano_pagina=5, hilos=3) == registros
+    paginas = falso.paginas()
+    assert sorted(params["$offset"] for params in paginas) == [0, 5, 10]
+    assert all(params["$order"] == ":id" and params["$limit"] == 5 for params in paginas)
+
+
+def test_conjunto_que_crecio_despues_del_conteo(recurso):
+    registros = _registros(13)
+    falso = recurso(registros, conteo=10)
+
+    assert socrata.descargar_todo(URL, tamano_pagina=5, hilos=2) == registros
+    assert sorted(params["$offset"] for params in falso.paginas()) == [0, 5, 10]
+
+
+def test_total_multiplo_del_tamano_de_pagina(recurso):
+    registros = _registros(10)
+    falso = recurso(registros)
+
+    assert socrata.descargar_todo(URL, tamano_pagina=5, hilos=2) == registros
+    # La última página está completa, así que se pide una más (vacía) y se termina
+    assert sorted(params["$offset"] for params in falso.paginas()) == [0, 5, 10]
+
+
+def test_consulta_sin_registros(recurso):
+    falso = recurso([])
+    assert socrata.descargar_todo(URL, tamano_pagina=5) == []
+    assert falso.paginas() == []
+
+
+def test_select_y_where_llegan_al_conteo_y_a_las_paginas(recurso):
+    registros = _registros(9)
+    falso = recurso(registros, conteo=4)
+    where = "anio = '2021'"
+
+    resultado = socrata.descargar_todo(URL, select=[":id", "anio"], where=where, tamano_pagina=2, hilos=2)
+
+    assert resultado == [fila for fila in registros if fila["anio"] == "2021"]
+    assert falso.peticiones[0] == {"$select": "count(*)", "$where": where}
+    assert all(params["$select"] == ":id,anio" and params["$where"] == where for params in falso.paginas())
+
+
+def test_cada_pagina_se_guarda_en_su_propia_entrada_de_cache(recurso):
+    registros = _registros(12)
+    recurso(registros)
+    socrata.descargar_todo(URL, tamano_pagina=5, hilos=3)
+
+    # Segunda ejecución dentro del TTL: ninguna petición llega al recurso
+    falso = recurso(registros)
+    assert socrata.descargar_todo(URL, tamano_pagina=5, hilos=3) == registros
+    assert falso.peticiones == []
+
+
+def test_sesion_con_pool_y_reintentos():
+    with socrata.crear_sesion(hilos=3) as sesion:
+        adaptador = sesion.get_adapter(URL)
+        assert adaptador.max_retries.total == socrata.REINTENTOS
+        assert 429 in adaptador.max_retries.status_forcelist
+        assert adaptador._pool_maxsize == 3